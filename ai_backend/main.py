@@ -3,18 +3,66 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 import uvicorn
 from loguru import logger
+import asyncio
 import os
+from typing import Any, Dict, List, Optional
 from dotenv import load_dotenv
 
-# Import our modules
-from models.baby_weight_predictor import BabyWeightPredictor
-from models.diabetes_predictor import DiabetesPredictor
-from utils.data_processor import DataProcessor
-from schemas.prediction_schemas import BabyWeightRequest, DiabetesRequest, PredictionResponse
+# Import our modules, timing the heavy ones for the startup report
+from utils.startup_report import startup_report
+
+with startup_report.timed("import models.baby_weight_predictor"):
+    from models.baby_weight_predictor import BabyWeightPredictor, trajectory_ages
+with startup_report.timed("import models.diabetes_predictor"):
+    from models.diabetes_predictor import DiabetesPredictor
+with startup_report.timed("import utils.data_processor"):
+    from utils.data_processor import DataProcessor
+from models.hyperparameter_search import search_settings
+from utils.micro_batcher import MicroBatcher
+from utils.prediction_cache import PredictionCache
+from utils.model_executor import get_model_executor
+from utils.training_jobs import TrainingJobManager
+from utils.training_store import get_training_store
+from schemas.prediction_schemas import (
+    BabyWeightRequest, BabyWeightTrajectoryRequest, BabyWeightTrajectoryResponse, DiabetesRequest,
+    PredictionResponse, ModelTrainingRequest, TrainingJobResponse
+)
 
 # Load environment variables
 load_dotenv()
 
+# Largest number of rows accepted by the batch prediction endpoints
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "1000"))
+
+# Micro-batching of concurrent single-row prediction requests
+MICRO_BATCHING_ENABLED = os.getenv("MICRO_BATCHING_ENABLED", "true").lower() == "true"
+MICRO_BATCH_WINDOW_MS = float(os.getenv("MICRO_BATCH_WINDOW_MS", "5"))
+MICRO_BATCH_MAX_SIZE = int(os.getenv("MICRO_BATCH_MAX_SIZE", "64"))
+
+# How often each worker checks the model registry for versions promoted elsewhere
+MODEL_REFRESH_INTERVAL = float(os.getenv("MODEL_REFRESH_INTERVAL", "30"))
+
+# Cache of model outputs for repeated feature rows; with a path set the cache is
+# shared by every worker on the host through a SQLite file
+PREDICTION_CACHE_ENABLED = os.getenv("PREDICTION_CACHE_ENABLED", "true").lower() == "true"
+PREDICTION_CACHE_SIZE = int(os.getenv("PREDICTION_CACHE_SIZE", "10000"))
+PREDICTION_CACHE_TTL = float(os.getenv("PREDICTION_CACHE_TTL", "300"))
+PREDICTION_CACHE_PATH = os.getenv("PREDICTION_CACHE_PATH", "")
+
+# CSV uploads at least this large are validated and cleaned chunk by chunk
+DATA_STREAMING_THRESHOLD_MB = float(os.getenv("DATA_STREAMING_THRESHOLD_MB", "100"))
+DATA_CHUNK_SIZE = int(os.getenv("DATA_CHUNK_SIZE", "100000"))
+# "sample" (reservoir sample) or "kll" (mergeable quantile sketches saved with the output)
+DATA_QUANTILE_METHOD = os.getenv("DATA_QUANTILE_METHOD", "sample").lower()
+# Processed-data format: parquet, feather, csv or auto (Parquet when pyarrow is installed)
+DATA_OUTPUT_FORMAT = os.getenv("DATA_OUTPUT_FORMAT", "auto").lower()
+# Worker processes for ingesting the upload directory (unset = one per CPU, 1 = serial)
+DATA_INGEST_WORKERS = int(os.getenv("DATA_INGEST_WORKERS", "0")) or None
+
+# Never train during startup; a pod without a usable saved model stays unready
+# until one is promoted (picked up by the refresh loop) or trained via /jobs
+STRICT_STARTUP = os.getenv("STRICT_STARTUP", "false").lower() == "true"
+
 # Initialize FastAPI app
 app = FastAPI(
     title="MommyCare AI Predictions API",
@@ -35,32 +83,135 @@ app.add_middleware(
 baby_weight_predictor = None
 diabetes_predictor = None
 data_processor = None
+baby_weight_batcher = None
+diabetes_batcher = None
+training_jobs = None
+predictors = {}
+prediction_caches = {}
+model_watcher = None
+model_loader = None
+
+def build_prediction_cache(model_type: str) -> Optional[PredictionCache]:
+    if not PREDICTION_CACHE_ENABLED:
+        return None
+    prediction_caches[model_type] = PredictionCache(
+        model_type,
+        max_entries=PREDICTION_CACHE_SIZE,
+        ttl_seconds=PREDICTION_CACHE_TTL,
+        path=PREDICTION_CACHE_PATH or None
+    )
+    return prediction_caches[model_type]
+
+async def load_models():
+    """Load every predictor concurrently; failures leave that predictor unready"""
+    with startup_report.timed("load models"):
+        results = await asyncio.gather(
+            *(predictor.load_model(allow_training=not STRICT_STARTUP) for predictor in predictors.values()),
+            return_exceptions=True
+        )
+    for (model_type, predictor), result in zip(predictors.items(), results):
+        if isinstance(result, Exception):
+            logger.error(f"{model_type} model unavailable after {predictor.load_time}s: {result}")
+        else:
+            logger.info(f"{model_type} model ready in {predictor.load_time}s (version {predictor.model_version})")
+        startup_report.record(
+            f"load {model_type}",
+            predictor.load_time or 0.0,
+            state=predictor.state,
+            artifacts_ms=predictor.load_stats.get('artifacts')
+        )
+    if models_ready():
+        startup_report.mark_ready()
+
+async def watch_model_versions():
+    """Pick up versions promoted or rolled back by other workers"""
+    while True:
+        await asyncio.sleep(MODEL_REFRESH_INTERVAL)
+        for model_type, predictor in predictors.items():
+            try:
+                await predictor.refresh()
+            except Exception as e:
+                logger.error(f"Error refreshing {model_type} model: {e}")
 
 @app.on_event("startup")
 async def startup_event():
     """Initialize models and data processor on startup"""
     global baby_weight_predictor, diabetes_predictor, data_processor
+    global baby_weight_batcher, diabetes_batcher, training_jobs, model_watcher, model_loader
     
     try:
         logger.info("Initializing AI models...")
         
         # Initialize data processor
-        data_processor = DataProcessor()
+        data_processor = DataProcessor(
+            chunk_size=DATA_CHUNK_SIZE,
+            streaming_threshold_mb=DATA_STREAMING_THRESHOLD_MB,
+            quantile_method=DATA_QUANTILE_METHOD,
+            ingest_workers=DATA_INGEST_WORKERS,
+            output_format=DATA_OUTPUT_FORMAT,
+            training_store=get_training_store()
+        )
+        
+        # Create the predictors; their models load in the background so the
+        # process answers liveness probes straight away
+        baby_weight_predictor = BabyWeightPredictor(cache=build_prediction_cache("baby_weight"))
+        diabetes_predictor = DiabetesPredictor(cache=build_prediction_cache("diabetes"))
+        
+        predictors.update({
+            "baby_weight": baby_weight_predictor,
+            "diabetes": diabetes_predictor
+        })
+        model_loader = asyncio.ensure_future(load_models())
         
-        # Initialize baby weight predictor
-        baby_weight_predictor = BabyWeightPredictor()
-        await baby_weight_predictor.load_model()
+        # Background training jobs
+        training_jobs = TrainingJobManager(predictors)
         
-        # Initialize diabetes predictor
-        diabetes_predictor = DiabetesPredictor()
-        await diabetes_predictor.load_model()
+        if MODEL_REFRESH_INTERVAL > 0:
+            model_watcher = asyncio.ensure_future(watch_model_versions())
         
-        logger.info("AI models initialized successfully!")
+        # Coalesce concurrent single-row requests into vectorized model calls
+        if MICRO_BATCHING_ENABLED:
+            baby_weight_batcher = MicroBatcher(
+                "baby_weight",
+                baby_weight_predictor.predict_batch,
+                max_batch_size=MICRO_BATCH_MAX_SIZE,
+                max_wait_ms=MICRO_BATCH_WINDOW_MS
+            )
+            diabetes_batcher = MicroBatcher(
+                "diabetes",
+                diabetes_predictor.predict_batch,
+                max_batch_size=MICRO_BATCH_MAX_SIZE,
+                max_wait_ms=MICRO_BATCH_WINDOW_MS
+            )
+            logger.info(f"Micro-batching enabled (window={MICRO_BATCH_WINDOW_MS}ms, max batch={MICRO_BATCH_MAX_SIZE})")
+        
+        logger.info(f"AI service started; loading models in the background (strict startup: {STRICT_STARTUP})")
         
     except Exception as e:
         logger.error(f"Error initializing models: {e}")
         raise e
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Drain queued prediction requests and running training jobs before the process exits"""
+    if model_watcher:
+        model_watcher.cancel()
+    if model_loader and not model_loader.done():
+        model_loader.cancel()
+    
+    for batcher in (baby_weight_batcher, diabetes_batcher):
+        if batcher:
+            await batcher.close()
+    
+    if training_jobs:
+        await training_jobs.close()
+    
+    for cache in prediction_caches.values():
+        await cache.close()
+    
+    # Stop the inference threads and training workers
+    get_model_executor().shutdown(wait=False)
+
 @app.get("/")
 async def root():
     """Health check endpoint"""
@@ -70,14 +221,75 @@ async def root():
         "version": "1.0.0"
     }
 
+def models_ready() -> bool:
+    return bool(predictors) and all(predictor.is_ready for predictor in predictors.values())
+
 @app.get("/health")
 async def health_check():
     """Detailed health check"""
     return {
-        "status": "healthy",
+        "status": "healthy" if models_ready() else "starting",
         "models": {
-            "baby_weight_predictor": baby_weight_predictor is not None,
-            "diabetes_predictor": diabetes_predictor is not None
+            "baby_weight_predictor": baby_weight_predictor is not None and baby_weight_predictor.is_ready,
+            "diabetes_predictor": diabetes_predictor is not None and diabetes_predictor.is_ready
+        },
+        "predictors": {
+            model_type: predictor.status() for model_type, predictor in predictors.items()
+        },
+        "model_versions": {
+            model_type: predictor.model_version for model_type, predictor in predictors.items()
+        },
+        "model_loading": {
+            model_type: predictor.load_stats for model_type, predictor in predictors.items()
+        },
+        "executor": get_model_executor().stats()
+    }
+
+@app.get("/health/live")
+async def liveness():
+    """Liveness probe: the process is up and serving requests"""
+    return {"status": "alive"}
+
+@app.get("/health/ready")
+async def readiness():
+    """Readiness probe: every predictor has a model loaded (503 otherwise)"""
+    ready = models_ready()
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={
+            "ready": ready,
+            "predictors": {
+                model_type: predictor.status() for model_type, predictor in predictors.items()
+            }
+        }
+    )
+
+@app.get("/stats/startup")
+async def startup_stats():
+    """Import and model load time per phase since process start"""
+    return startup_report.report()
+
+@app.get("/stats/cache")
+async def cache_stats():
+    """Hit, miss and eviction counters of the prediction caches"""
+    return {
+        "enabled": PREDICTION_CACHE_ENABLED,
+        "caches": {model_type: cache.stats() for model_type, cache in prediction_caches.items()}
+    }
+
+@app.get("/stats/training-data")
+async def training_data_stats():
+    """Rows and parts of the consolidated training dataset of each data type"""
+    return get_training_store().stats()
+
+@app.get("/stats/batching")
+async def batching_stats():
+    """Queue depth and batch size statistics for the prediction micro-batchers"""
+    return {
+        "enabled": MICRO_BATCHING_ENABLED,
+        "batchers": {
+            "baby_weight": baby_weight_batcher.stats() if baby_weight_batcher else None,
+            "diabetes": diabetes_batcher.stats() if diabetes_batcher else None
         }
     }
 
@@ -88,15 +300,20 @@ async def predict_baby_weight(request: BabyWeightRequest):
         logger.info(f"Received baby weight prediction request: {request}")
         
         # Validate input data
-        if not baby_weight_predictor:
-            raise HTTPException(status_code=503, detail="Baby weight predictor not initialized")
+        if not baby_weight_predictor or not baby_weight_predictor.is_ready:
+            raise HTTPException(status_code=503, detail="Baby weight model not ready")
         
-        # Make prediction
-        prediction = await baby_weight_predictor.predict(request)
+        # Make prediction (coalesced with concurrent requests when micro-batching is on)
+        if baby_weight_batcher:
+            prediction = await baby_weight_batcher.submit(request)
+        else:
+            prediction = await baby_weight_predictor.predict(request)
         
         logger.info(f"Baby weight prediction completed: {prediction}")
         return prediction
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error in baby weight prediction: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -108,33 +325,221 @@ async def predict_diabetes(request: DiabetesRequest):
         logger.info(f"Received diabetes prediction request: {request}")
         
         # Validate input data
-        if not diabetes_predictor:
-            raise HTTPException(status_code=503, detail="Diabetes predictor not initialized")
+        if not diabetes_predictor or not diabetes_predictor.is_ready:
+            raise HTTPException(status_code=503, detail="Diabetes model not ready")
         
-        # Make prediction
-        prediction = await diabetes_predictor.predict(request)
+        # Make prediction (coalesced with concurrent requests when micro-batching is on)
+        if diabetes_batcher:
+            prediction = await diabetes_batcher.submit(request)
+        else:
+            prediction = await diabetes_predictor.predict(request)
         
         logger.info(f"Diabetes prediction completed: {prediction}")
         return prediction
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error in diabetes prediction: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/train/baby-weight")
-async def train_baby_weight_model():
-    """Retrain baby weight model with new data"""
+@app.post("/predict/baby-weight/batch", response_model=List[PredictionResponse])
+async def predict_baby_weight_batch(batch: List[BabyWeightRequest]):
+    """Predict baby weight for many maternal profiles in one call"""
     try:
-        logger.info("Starting baby weight model training...")
+        logger.info(f"Received baby weight batch prediction request with {len(batch)} rows")
+        
+        if not baby_weight_predictor or not baby_weight_predictor.is_ready:
+            raise HTTPException(status_code=503, detail="Baby weight model not ready")
+        
+        if len(batch) > MAX_BATCH_SIZE:
+            raise HTTPException(status_code=413, detail=f"Batch size exceeds the limit of {MAX_BATCH_SIZE} rows")
+        
+        # Score the whole batch with a single model call
+        predictions = await baby_weight_predictor.predict_batch(batch)
         
-        # Train the model
-        await baby_weight_predictor.train_model()
+        logger.info(f"Baby weight batch prediction completed for {len(predictions)} rows")
+        return predictions
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in baby weight batch prediction: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/predict/baby-weight/trajectory", response_model=BabyWeightTrajectoryResponse)
+async def predict_baby_weight_trajectory(request: BabyWeightTrajectoryRequest):
+    """Predict the birth weight curve of one maternal profile over a range of gestational ages"""
+    try:
+        logger.info(f"Received baby weight trajectory request: {request}")
         
-        logger.info("Baby weight model training completed!")
-        return {"message": "Model training completed successfully"}
+        if not baby_weight_predictor or not baby_weight_predictor.is_ready:
+            raise HTTPException(status_code=503, detail="Baby weight model not ready")
         
+        n_points = len(trajectory_ages(
+            request.gestational_age_start, request.gestational_age_end, request.gestational_age_step
+        ))
+        if n_points > MAX_BATCH_SIZE:
+            raise HTTPException(status_code=413, detail=f"Trajectory exceeds the limit of {MAX_BATCH_SIZE} points")
+        
+        # Score every point of the curve with a single model call
+        trajectory = await baby_weight_predictor.predict_trajectory(request)
+        
+        logger.info(f"Baby weight trajectory completed for {n_points} points")
+        return trajectory
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in baby weight trajectory prediction: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/predict/diabetes/batch", response_model=List[PredictionResponse])
+async def predict_diabetes_batch(batch: List[DiabetesRequest]):
+    """Predict gestational diabetes risk for many patients in one call"""
+    try:
+        logger.info(f"Received diabetes batch prediction request with {len(batch)} rows")
+        
+        if not diabetes_predictor or not diabetes_predictor.is_ready:
+            raise HTTPException(status_code=503, detail="Diabetes model not ready")
+        
+        if len(batch) > MAX_BATCH_SIZE:
+            raise HTTPException(status_code=413, detail=f"Batch size exceeds the limit of {MAX_BATCH_SIZE} rows")
+        
+        # Score the whole batch with a single model call
+        predictions = await diabetes_predictor.predict_batch(batch)
+        
+        logger.info(f"Diabetes batch prediction completed for {len(predictions)} rows")
+        return predictions
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in diabetes batch prediction: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+def queue_training_job(model_type: str, data_file_path: Optional[str] = None,
+                       hyperparameters: Optional[Dict[str, Any]] = None,
+                       incremental: bool = False) -> TrainingJobResponse:
+    """Hand a training request to the job manager"""
+    try:
+        if not training_jobs:
+            raise HTTPException(status_code=503, detail="Training job manager not initialized")
+        
+        # Jobs only read training data that went through the upload directories
+        if data_file_path:
+            data_file_path = data_processor.resolve_data_path(data_file_path)
+        # Reject bad search options now rather than failing the job later
+        if hyperparameters and 'search' in hyperparameters:
+            search_settings(hyperparameters)
+        
+        job = training_jobs.submit(
+            model_type,
+            data_file_path=data_file_path,
+            hyperparameters=hyperparameters,
+            incremental=incremental
+        )
+        return job.to_response()
+        
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error submitting training job: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/train/baby-weight", response_model=TrainingJobResponse, status_code=202)
+async def train_baby_weight_model(incremental: bool = False):
+    """Retrain baby weight model with new data in the background"""
+    logger.info(f"Queueing {'incremental ' if incremental else ''}baby weight model training...")
+    return queue_training_job("baby_weight", incremental=incremental)
+
+@app.post("/train/diabetes", response_model=TrainingJobResponse, status_code=202)
+async def train_diabetes_model(incremental: bool = False):
+    """Retrain diabetes model with new data in the background"""
+    logger.info(f"Queueing {'incremental ' if incremental else ''}diabetes model training...")
+    return queue_training_job("diabetes", incremental=incremental)
+
+@app.post("/jobs", response_model=TrainingJobResponse, status_code=202)
+async def submit_training_job(request: ModelTrainingRequest):
+    """Queue a training job and return its ID immediately"""
+    # An empty path means the predictor's default training data
+    return queue_training_job(
+        request.model_type,
+        data_file_path=request.data_file_path or None,
+        hyperparameters=request.hyperparameters,
+        incremental=request.incremental
+    )
+
+@app.get("/jobs", response_model=List[TrainingJobResponse])
+async def list_training_jobs():
+    """List recent training jobs, newest first"""
+    if not training_jobs:
+        raise HTTPException(status_code=503, detail="Training job manager not initialized")
+    return [job.to_response() for job in training_jobs.list()]
+
+@app.get("/jobs/{job_id}", response_model=TrainingJobResponse)
+async def get_training_job(job_id: str):
+    """Poll the progress, candidate scores and timing of a training job"""
+    if not training_jobs:
+        raise HTTPException(status_code=503, detail="Training job manager not initialized")
+    
+    job = training_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Training job {job_id} not found")
+    return job.to_response()
+
+def get_predictor(model_type: str):
+    """Look up a predictor by model type, raising 404 for unknown types"""
+    predictor = predictors.get(model_type.strip().lower().replace('-', '_'))
+    if predictor is None:
+        raise HTTPException(status_code=404, detail=f"Unknown model type '{model_type}'")
+    return predictor
+
+def describe_models(predictor) -> Dict[str, Any]:
+    return {
+        "serving_version": predictor.model_version,
+        "current_version": predictor.registry.current_version(),
+        "versions": predictor.registry.list_versions()
+    }
+
+@app.get("/models")
+async def list_models():
+    """Saved model versions and the version each predictor is serving"""
+    return {model_type: describe_models(predictor) for model_type, predictor in predictors.items()}
+
+@app.get("/models/{model_type}")
+async def get_model_versions(model_type: str):
+    """Saved versions for one model type"""
+    return describe_models(get_predictor(model_type))
+
+@app.post("/models/{model_type}/promote/{version}")
+async def promote_model_version(model_type: str, version: str):
+    """Serve a previously saved model version"""
+    predictor = get_predictor(model_type)
+    try:
+        await predictor.promote(version)
+        logger.info(f"Promoted {model_type} model version {version}")
+        return {"message": f"Now serving {model_type} model version {version}", "version": version}
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error promoting {model_type} model: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/models/{model_type}/rollback")
+async def rollback_model_version(model_type: str):
+    """Go back to the previously promoted model version"""
+    predictor = get_predictor(model_type)
+    try:
+        version = await predictor.rollback()
+        logger.info(f"Rolled {model_type} model back to version {version}")
+        return {"message": f"Now serving {model_type} model version {version}", "version": version}
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
-        logger.error(f"Error in model training: {e}")
+        logger.error(f"Error rolling back {model_type} model: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/upload-data")
@@ -144,11 +549,15 @@ async def upload_training_data():
         logger.info("Processing uploaded training data...")
         
         # Process the uploaded data
-        await data_processor.process_new_data()
+        result = await data_processor.process_new_data()
+        if 'error' in result:
+            raise HTTPException(status_code=500, detail=result['error'])
         
         logger.info("Training data processed successfully!")
-        return {"message": "Training data processed successfully"}
+        return {"message": "Training data processed successfully", "summary": result.get('summary')}
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error processing training data: {e}")
         raise HTTPException(status_code=500, detail=str(e))
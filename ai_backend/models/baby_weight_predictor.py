@@ -1,69 +1,258 @@
 import pandas as pd
 import numpy as np
-from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
-from sklearn.linear_model import LinearRegression
-from sklearn.model_selection import train_test_split, cross_val_score
-from sklearn.preprocessing import StandardScaler
-from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
 import joblib
 import os
+import time
 from datetime import datetime
 from loguru import logger
-from typing import Dict, Any, Optional
-import xgboost as xgb
-import lightgbm as lgb
+from typing import Dict, Any, Optional, List, Callable
 
-from schemas.prediction_schemas import BabyWeightRequest, PredictionResponse, RiskLevel
+from utils.model_executor import get_model_executor
+from utils.prediction_cache import PredictionCache
+from utils.table_io import read_table
+from utils.training_store import get_training_store
+from models.training import (
+    compile_serving_model, incremental_update, select_best_model, supports_incremental_update
+)
+from models.hyperparameter_search import tune_candidates
+from models.registry import ModelBundle, ModelRegistry
+from models.distillation import distill_model
+from models.inference import compile_fused_model
+from schemas.prediction_schemas import (
+    BabyWeightRequest, BabyWeightTrajectoryRequest, BabyWeightTrajectoryResponse, PredictionResponse,
+    RiskLevel, TrajectoryPoint
+)
+
+# Stop candidates whose partial validation score cannot catch up with the best one
+TRAINING_EARLY_ABANDON = os.getenv("TRAINING_EARLY_ABANDON", "false").lower() == "true"
+TRAINING_ABANDON_MARGIN = float(os.getenv("TRAINING_ABANDON_MARGIN", "0.02"))
+
+# Serving budgets for model selection: candidates over the p99 single-row latency or
+# artifact size are skipped, and scores within the tolerance of the best count as a
+# tie won by the faster model (0 disables a budget)
+TRAINING_LATENCY_BUDGET_MS = float(os.getenv("TRAINING_LATENCY_BUDGET_MS", "0")) or None
+TRAINING_SIZE_BUDGET_MB = float(os.getenv("TRAINING_SIZE_BUDGET_MB", "0")) or None
+TRAINING_SCORE_TOLERANCE = float(os.getenv("TRAINING_SCORE_TOLERANCE", "0"))
+
+# Cut a winning random forest back to the fewest trees / shallowest depth scoring
+# within this tolerance of the full forest before serving it
+TRAINING_COMPACT_FORESTS = os.getenv("TRAINING_COMPACT_FORESTS", "true").lower() == "true"
+TRAINING_COMPACTION_TOLERANCE = float(os.getenv("TRAINING_COMPACTION_TOLERANCE", "0.002"))
+
+# Optionally distill the served model into a small student; rows the student is least
+# sure about (about this share of traffic) still go to the full model, and the student
+# is only served if the combined score stays within the tolerance of the full model's
+TRAINING_DISTILL = os.getenv("TRAINING_DISTILL", "false").lower() == "true"
+TRAINING_DISTILL_ROUTE_FRACTION = float(os.getenv("TRAINING_DISTILL_ROUTE_FRACTION", "0.05"))
+TRAINING_DISTILL_TOLERANCE = float(os.getenv("TRAINING_DISTILL_TOLERANCE", "0.005"))
+
+# Incremental retraining: trees / boosting rounds added per update, and how far
+# below the production model's holdout score an update may land and still be promoted
+TRAINING_INCREMENTAL_ESTIMATORS = int(os.getenv("TRAINING_INCREMENTAL_ESTIMATORS", "20"))
+TRAINING_INCREMENTAL_TOLERANCE = float(os.getenv("TRAINING_INCREMENTAL_TOLERANCE", "0.005"))
+
+# Columns the model is trained and served on, in order
+MODEL_FEATURES = ['gestation_weeks', 'age', 'height', 'weight', 'parity', 'smoke', 'bmi']
+
+# Columns read from data files (everything preprocessing needs, nothing more)
+REQUIRED_COLUMNS = ['case', 'bwt', 'gestation', 'parity', 'age', 'height', 'weight', 'smoke']
 
 class BabyWeightPredictor:
-    def __init__(self, model_path: str = "models/saved/baby_weight_model.joblib"):
+    def __init__(self, model_path: str = "models/saved/baby_weight_model.joblib",
+                 cache: Optional[PredictionCache] = None):
         self.model_path = model_path
-        self.model = None
-        self.scaler = StandardScaler()
-        self.model_version = "1.0.0"
+        # Served model, scaler and metadata, replaced as a single reference
+        self.bundle: Optional[ModelBundle] = None
+        # Optional cache of model outputs for repeated feature rows
+        self.cache = cache
+        # not_loaded -> loading -> (training) -> ready | failed, reported by the readiness probe
+        self.state = "not_loaded"
+        self.load_error: Optional[str] = None
+        self.load_time: Optional[float] = None
+        self.registry = ModelRegistry(
+            os.path.splitext(os.path.basename(model_path))[0],
+            root=os.path.dirname(model_path)
+        )
         self.feature_names = [
             'gestation', 'age', 'height', 'weight', 'parity', 'smoke'
         ]
         
-    async def load_model(self):
-        """Load the trained model from disk"""
+    @property
+    def model(self):
+        """Raw estimator, or the fused inference object when only that was loaded"""
+        if self.bundle is None:
+            return None
+        return self.bundle.model if self.bundle.model is not None else self.bundle.inference_model
+    
+    @property
+    def scaler(self):
+        return self.bundle.scaler if self.bundle else None
+    
+    @property
+    def model_version(self) -> str:
+        return self.bundle.version if self.bundle else "unversioned"
+    
+    @property
+    def load_stats(self) -> Dict[str, Any]:
+        """Per-artifact timings of the last registry load"""
+        return self.registry.last_load
+    
+    @property
+    def is_ready(self) -> bool:
+        return self.bundle is not None
+    
+    def status(self) -> Dict[str, Any]:
+        """Lifecycle state reported by the readiness probe"""
+        return {
+            'state': self.state,
+            'ready': self.is_ready,
+            'model_version': self.model_version,
+            'load_time': self.load_time,
+            'error': self.load_error
+        }
+    
+    async def load_model(self, allow_training: bool = True):
+        """Load the current model version from the registry.
+
+        Falls back to training a new model when nothing usable is saved, unless
+        ``allow_training`` is off, in which case the load fails instead.
+        """
+        started = time.perf_counter()
+        self.state = "loading"
+        self.load_error = None
         try:
-            if os.path.exists(self.model_path):
-                logger.info(f"Loading existing model from {self.model_path}")
-                self.model = joblib.load(self.model_path)
-                
-                # Load the fitted scaler
-                scaler_path = self.model_path.replace('.joblib', '_scaler.joblib')
-                if os.path.exists(scaler_path):
-                    logger.info(f"Loading fitted scaler from {scaler_path}")
-                    self.scaler = joblib.load(scaler_path)
-                else:
-                    logger.warning("Scaler not found, retraining model...")
-                    await self.train_model()
-            else:
+            try:
+                loaded = await self._load_saved_model()
+            except Exception as e:
+                logger.error(f"Error loading model: {e}")
+                if not allow_training:
+                    raise
+                loaded = False
+            
+            if not loaded:
+                if not allow_training:
+                    raise FileNotFoundError(f"No saved model found and training at startup is disabled")
                 logger.warning("No existing model found. Training new model...")
+                self.state = "training"
                 await self.train_model()
         except Exception as e:
-            logger.error(f"Error loading model: {e}")
-            await self.train_model()
+            self.state = "failed"
+            self.load_error = str(e)
+            raise
+        finally:
+            self.load_time = round(time.perf_counter() - started, 3)
     
-    def load_csv_data(self, file_path: str) -> pd.DataFrame:
-        """Load baby weight data from CSV file"""
+    async def _load_saved_model(self) -> bool:
+        """Serve the registry's current version, importing legacy pickles if needed"""
+        executor = get_model_executor()
+        
+        if self.registry.current_version():
+            logger.info(f"Loading model version {self.registry.current_version()} from {self.registry.root}")
+            self._serve(await executor.run_inference(self.registry.load_serving))
+            return True
+        
+        # Pre-registry deployments kept a bare model and scaler next to each other
+        scaler_path = self.model_path.replace('.joblib', '_scaler.joblib')
+        if os.path.exists(self.model_path) and os.path.exists(scaler_path):
+            logger.info(f"Importing legacy model from {self.model_path} into the registry")
+            self._serve(await executor.run_inference(self._import_legacy_artifacts, scaler_path))
+            return True
+        
+        return False
+    
+    def _serve(self, bundle: ModelBundle):
+        """Swap in the bundle used for predictions"""
+        self.bundle = bundle
+        self.state = "ready"
+        self.load_error = None
+        if self.cache is not None:
+            self.cache.invalidate(keep_version=bundle.version)
+    
+    def _import_legacy_artifacts(self, scaler_path: str) -> ModelBundle:
+        """Register the legacy model and scaler pickles as version 1.0.0 (blocking)"""
+        model, scaler = joblib.load(self.model_path), joblib.load(scaler_path)
+        bundle = ModelBundle(
+            model,
+            scaler,
+            MODEL_FEATURES,
+            metrics={'source': 'legacy'},
+            version="1.0.0",
+            fused=compile_fused_model(model, scaler, self._parity_rows())
+        )
+        if not self.registry.has_version(bundle.version):
+            self.registry.save(bundle)
+        self.registry.promote(bundle.version)
+        return bundle
+    
+    def _parity_rows(self, n_rows: int = 256) -> np.ndarray:
+        """Raw feature rows to check a fused artifact against its model: ingested data, else synthetic rows"""
+        store = get_training_store()
+        if store.has_data('baby_weight'):
+            df = store.load('baby_weight', columns=REQUIRED_COLUMNS, parts=1)
+        else:
+            df = self.generate_sample_data()
+        return self.preprocess_data(df)[MODEL_FEATURES].to_numpy(dtype=float)[:n_rows]
+    
+    def _publish(self, bundle: ModelBundle, X_check: Optional[np.ndarray] = None,
+                 promote: bool = True) -> ModelBundle:
+        """Fuse if needed, save and (unless told otherwise) promote a freshly trained bundle (blocking)"""
+        if bundle.fused is None:
+            bundle.fused = compile_fused_model(bundle.model, bundle.scaler, X_check)
+        self.registry.save(bundle)
+        if not promote:
+            return bundle
+        self.registry.promote(bundle.version)
+        # Serve from the saved artifact so this worker maps the same pages as its peers
+        return self.registry.load_serving(bundle.version)
+    
+    async def promote(self, version: str) -> str:
+        """Serve a previously saved version"""
+        executor = get_model_executor()
+        bundle = await executor.run_inference(self.registry.load_serving, version)
+        await executor.run_inference(self.registry.promote, version)
+        self._serve(bundle)
+        return version
+    
+    async def rollback(self) -> str:
+        """Go back to the version served before the current one"""
+        executor = get_model_executor()
+        version = await executor.run_inference(self.registry.rollback)
+        self._serve(await executor.run_inference(self.registry.load_serving, version))
+        return version
+    
+    async def refresh(self) -> bool:
+        """Pick up a version promoted by another worker; returns True if the model changed"""
+        current = self.registry.current_version()
+        if current is None or (self.bundle and self.bundle.version == current):
+            return False
+        self._serve(await get_model_executor().run_inference(self.registry.load_serving, current))
+        logger.info(f"Switched model to version {current}")
+        return True
+    
+    def load_data(self, file_path: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """Load baby weight data from a CSV, Excel, Parquet or Feather file.
+        
+        ``columns`` limits what is read; Parquet and Feather files (the
+        processed-data formats) then load just those columns, already typed.
+        """
         try:
-            logger.info(f"Loading data from CSV file: {file_path}")
+            logger.info(f"Loading data from: {file_path}")
             
-            # Load the CSV file
-            df = pd.read_csv(file_path)
+            df = read_table(file_path, columns=columns)
             
-            logger.info(f"Loaded {len(df)} records from CSV file")
+            logger.info(f"Loaded {len(df)} records from {os.path.basename(file_path)}")
             logger.info(f"Columns: {df.columns.tolist()}")
             
             return df
             
         except Exception as e:
-            logger.error(f"Error loading CSV data: {e}")
+            logger.error(f"Error loading data: {e}")
             raise e
     
+    def load_csv_data(self, file_path: str) -> pd.DataFrame:
+        """Load baby weight data from CSV file"""
+        return self.load_data(file_path)
+    
     def preprocess_data(self, df: pd.DataFrame) -> pd.DataFrame:
         """Preprocess the data for training"""
         try:
@@ -76,9 +265,7 @@ class BabyWeightPredictor:
             processed_df = processed_df.dropna()
             
             # Ensure all required columns exist
-            required_columns = [
-                'case', 'bwt', 'gestation', 'parity', 'age', 'height', 'weight', 'smoke'
-            ]
+            required_columns = REQUIRED_COLUMNS
             
             # Check if we have the required columns
             missing_columns = [col for col in required_columns if col not in processed_df.columns]
@@ -105,28 +292,248 @@ class BabyWeightPredictor:
             logger.error(f"Error preprocessing data: {e}")
             raise e
     
-    async def train_model(self, data_file_path: Optional[str] = None):
+    async def train_model(self, data_file_path: Optional[str] = None,
+                          progress_callback: Optional[Callable[..., None]] = None,
+                          early_abandon: Optional[bool] = None, incremental: bool = False,
+                          hyperparameters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Train the baby weight prediction model"""
         try:
             logger.info("Starting model training...")
+            executor = get_model_executor()
+            report = progress_callback or (lambda progress, stage, candidate=None: None)
+            if early_abandon is None:
+                early_abandon = TRAINING_EARLY_ABANDON
+            
+            if incremental and not data_file_path:
+                summary = await self._train_incremental(report)
+                if summary is not None:
+                    return summary
+            
+            # Load, split and scale the data in a training worker
+            report(0.02, "preparing data")
+            data = await executor.run_training(prepare_baby_weight_data, data_file_path)
+            
+            # Apply requested hyperparameters and/or tune them on the training rows
+            candidates = self.build_candidates()
+            tuning = {'params': {}, 'search': None}
+            if hyperparameters:
+                tuning = await tune_candidates(
+                    candidates, data['X_train'], data['y_train'],
+                    metric='r2',
+                    executor=executor,
+                    hyperparameters=hyperparameters,
+                    checkpoint_dir=os.path.join(self.registry.root, 'searches'),
+                    dataset=data['dataset'],
+                    progress_callback=report
+                )
+            
+            # Fit every candidate concurrently and keep the best one
+            report(0.1, "fitting candidate models")
+            result = await select_best_model(
+                candidates,
+                data['X_train'], data['y_train'], data['X_test'], data['y_test'],
+                metric='r2',
+                executor=executor,
+                early_abandon=early_abandon,
+                abandon_margin=TRAINING_ABANDON_MARGIN,
+                progress_callback=report,
+                scaler=data['scaler'],
+                X_profile=data['X_test_raw'],
+                latency_budget_ms=TRAINING_LATENCY_BUDGET_MS,
+                size_budget_mb=TRAINING_SIZE_BUDGET_MB,
+                score_tolerance=TRAINING_SCORE_TOLERANCE
+            )
+            
+            # Fuse the winner for serving; a forest is also compacted
+            report(0.87, "compiling inference artifact")
+            fused, compaction = await executor.run_training(
+                compile_serving_model, result['model'], data['scaler'], data['X_test_raw'], data['y_test'],
+                'r2', TRAINING_COMPACTION_TOLERANCE if TRAINING_COMPACT_FORESTS else None
+            )
+            distillation = None
+            if TRAINING_DISTILL:
+                report(0.88, "distilling student model")
+                fused, distillation = await executor.run_training(
+                    distill_baby_weight_model, fused, data['scaler'], data['X_train_raw'], data['X_test_raw'], data['y_test']
+                )
+            
+            bundle = ModelBundle(
+                result['model'],
+                data['scaler'],
+                MODEL_FEATURES,
+                fused=fused,
+                metrics={
+                    'best_model': result['best_model'],
+                    'best_score': result['best_score'],
+                    'scores': result['scores'],
+                    'fit_times': result['fit_times'],
+                    'training_rows': len(data['y_train']),
+                    'data_file_path': data_file_path,
+                    'dataset': data['dataset'],
+                    'hyperparameters': tuning['params'].get(result['best_model'], {}),
+                    'serving_cost': result['serving_costs'].get(result['best_model']),
+                    'serving_costs': result['serving_costs'],
+                    'selection': result['selection'],
+                    'compaction': compaction,
+                    'distillation': distillation,
+                    'search': tuning['search']
+                }
+            )
+            
+            # Save the bundle as a new version, promote it, then swap the served
+            # reference so predictions never pair a new model with an old scaler
+            report(0.9, "saving model")
+            self._serve(await executor.run_inference(self._publish, bundle))
+            
+            logger.info(f"Model training completed. Best R² score: {result['best_score']:.4f}")
+            logger.info(f"Model version {bundle.version} saved to {self.registry.root}")
+            
+            summary = {key: value for key, value in result.items() if key != 'model'}
+            summary['model_version'] = bundle.version
+            summary['search'] = tuning['search']
+            return summary
             
+        except Exception as e:
+            logger.error(f"Error training model: {e}")
+            raise e
+    
+    async def _train_incremental(self, report: Callable[[float, str], None]) -> Optional[Dict[str, Any]]:
+        """Update the served model with the rows ingested since its version was trained.
+        
+        Returns None when the served model cannot be updated that way, so the
+        caller falls back to a full refit.
+        """
+        if self.bundle is None:
+            logger.info("No baby weight model is served yet; running a full retrain")
+            return None
+        
+        executor = get_model_executor()
+        base_version = self.bundle.version
+        report(0.05, "updating production model")
+        update = await executor.run_training(update_baby_weight_model, self.model_path, base_version)
+        if 'fallback' in update:
+            logger.info(f"Cannot update {base_version} incrementally ({update['fallback']}); running a full retrain")
+            return None
+        
+        # Promote only if the update held up on the holdout; otherwise keep it for inspection
+        bundle = update['bundle']
+        report(0.9, "saving model")
+        published = await executor.run_inference(self._publish, bundle, update['X_holdout'], update['accepted'])
+        if update['accepted']:
+            self._serve(published)
+        
+        metrics = bundle.metrics
+        summary = {
+            'best_model': metrics['best_model'],
+            'best_score': metrics['best_score'],
+            'scores': {metrics['best_model']: metrics['best_score'], 'production': metrics['base_score']},
+            'fit_times': metrics['fit_times'],
+            'abandoned': [],
+            'training_mode': 'incremental',
+            'base_version': base_version,
+            'new_rows': metrics['new_rows'],
+            'promoted': update['accepted'],
+            'model_version': bundle.version,
+            'message': (
+                f"Updated {metrics['best_model']} {base_version} with {metrics['new_rows']} new rows: "
+                f"holdout r2 {metrics['best_score']:.4f} vs {metrics['base_score']:.4f}; "
+                + (f"promoted {bundle.version}" if update['accepted'] else f"kept {base_version}, saved {bundle.version} unpromoted")
+            )
+        }
+        logger.info(summary['message'])
+        return summary
+    
+    def prepare_incremental_update(self, base_version: str) -> Dict[str, Any]:
+        """Continue training ``base_version`` on the training store rows added since it was trained (blocking).
+        
+        Returns ``{'fallback': reason}`` when that version cannot be updated
+        incrementally and needs a full refit instead.
+        """
+        base = self.registry.load(base_version)
+        dataset = base.metrics.get('dataset') or {}
+        if dataset.get('source') != 'training_store':
+            return {'fallback': "it was not trained on the training store"}
+        if base.model is None or not supports_incremental_update(base.model):
+            return {'fallback': f"{type(base.model).__name__} cannot be updated incrementally"}
+        
+        store = get_training_store()
+        parts = store.manifest('baby_weight')['parts']
+        if len(parts) <= dataset['parts']:
+            return {'fallback': f"no baby weight data has been ingested since version {base_version}"}
+        
+        # Parts are append-only, so rows of the parts the base saw come first
+        df = store.load('baby_weight', columns=REQUIRED_COLUMNS, parts=len(parts))
+        seen_rows = sum(part['rows'] for part in parts[:dataset['parts']])
+        old_df = self.preprocess_data(df.iloc[:seen_rows])
+        new_df = self.preprocess_data(df.iloc[seen_rows:])
+        
+        result = incremental_update(
+            base.model,
+            base.scaler,
+            new_df[MODEL_FEATURES].to_numpy(dtype=float),
+            new_df['bwt'].to_numpy(),
+            old_df[MODEL_FEATURES].to_numpy(dtype=float),
+            old_df['bwt'].to_numpy(),
+            metric='r2',
+            extra_estimators=TRAINING_INCREMENTAL_ESTIMATORS,
+            tolerance=TRAINING_INCREMENTAL_TOLERANCE
+        )
+        if 'fallback' in result:
+            return result
+        
+        best_model = base.metrics.get('best_model', type(base.model).__name__)
+        bundle = ModelBundle(
+            result['model'],
+            base.scaler,
+            MODEL_FEATURES,
+            metrics={
+                'best_model': best_model,
+                'best_score': result['score'],
+                'fit_times': {best_model: result['fit_time']},
+                'training_mode': 'incremental',
+                'base_version': base_version,
+                'base_score': result['base_score'],
+                'new_rows': result['new_rows'],
+                'holdout_rows': result['holdout_rows'],
+                'training_rows': base.metrics.get('training_rows', 0) + result['new_rows'],
+                'data_file_path': None,
+                'dataset': {'source': 'training_store', 'parts': len(parts), 'rows': len(df)}
+            }
+        )
+        return {'bundle': bundle, 'accepted': result['accepted'], 'X_holdout': result['X_holdout']}
+    
+    def prepare_training_data(self, data_file_path: Optional[str] = None) -> Dict[str, Any]:
+        """Load, split and scale the training data (blocking)"""
+        from sklearn.model_selection import train_test_split
+        from sklearn.preprocessing import StandardScaler
+        
+        try:
             # Load data
+            store = get_training_store()
             if data_file_path:
-                df = self.load_csv_data(data_file_path)
+                df = self.load_data(data_file_path, columns=REQUIRED_COLUMNS)
+                dataset = {'source': data_file_path}
+            elif store.has_data('baby_weight'):
+                # Everything ingested so far, already deduplicated across uploads
+                parts = len(store.manifest('baby_weight')['parts'])
+                df = store.load('baby_weight', columns=REQUIRED_COLUMNS, parts=parts)
+                dataset = {'source': 'training_store', 'parts': parts, 'rows': len(df)}
             else:
                 # Use the babies.csv file in uploads directory
                 upload_path = "uploads/babies.csv"
                 if os.path.exists(upload_path):
-                    df = self.load_csv_data(upload_path)
+                    df = self.load_data(upload_path, columns=REQUIRED_COLUMNS)
+                    dataset = {'source': upload_path}
                 else:
                     # Use sample data if no file provided
                     df = self.generate_sample_data()
+                    dataset = {'source': 'sample'}
             
             # Preprocess data
             processed_df = self.preprocess_data(df)
             
             # Prepare features and target
-            X = processed_df[['gestation_weeks', 'age', 'height', 'weight', 'parity', 'smoke', 'bmi']]
+            X = processed_df[MODEL_FEATURES]
             y = processed_df['bwt']
             
             # Split data
@@ -134,52 +541,41 @@ class BabyWeightPredictor:
                 X, y, test_size=0.2, random_state=42
             )
             
-            # Scale features
-            X_train_scaled = self.scaler.fit_transform(X_train)
-            X_test_scaled = self.scaler.transform(X_test)
-            
-            # Train multiple models and select the best one
-            models = {
-                'random_forest': RandomForestRegressor(n_estimators=100, random_state=42),
-                'gradient_boosting': GradientBoostingRegressor(random_state=42),
-                'xgboost': xgb.XGBRegressor(random_state=42),
-                'lightgbm': lgb.LGBMRegressor(random_state=42)
+            # Scale features with a fresh scaler so the served one is never mutated mid-fit
+            scaler = StandardScaler()
+            X_train_scaled = scaler.fit_transform(X_train)
+            X_test_scaled = scaler.transform(X_test)
+            
+            return {
+                'X_train': X_train_scaled,
+                'X_test': X_test_scaled,
+                'X_train_raw': X_train.to_numpy(dtype=float),
+                'X_test_raw': X_test.to_numpy(dtype=float),
+                'y_train': y_train.to_numpy(),
+                'y_test': y_test.to_numpy(),
+                'scaler': scaler,
+                'dataset': dataset
             }
             
-            best_model = None
-            best_score = -np.inf
-            
-            for name, model in models.items():
-                logger.info(f"Training {name}...")
-                model.fit(X_train_scaled, y_train)
-                
-                # Evaluate model
-                y_pred = model.predict(X_test_scaled)
-                score = r2_score(y_test, y_pred)
-                
-                logger.info(f"{name} R² score: {score:.4f}")
-                
-                if score > best_score:
-                    best_score = score
-                    best_model = model
-            
-            self.model = best_model
-            
-            # Save the model
-            os.makedirs(os.path.dirname(self.model_path), exist_ok=True)
-            joblib.dump(self.model, self.model_path)
-            
-            # Save scaler
-            scaler_path = self.model_path.replace('.joblib', '_scaler.joblib')
-            joblib.dump(self.scaler, scaler_path)
-            
-            logger.info(f"Model training completed. Best R² score: {best_score:.4f}")
-            logger.info(f"Model saved to {self.model_path}")
-            
         except Exception as e:
-            logger.error(f"Error training model: {e}")
+            logger.error(f"Error preparing baby weight training data: {e}")
             raise e
     
+    def build_candidates(self) -> Dict[str, Any]:
+        """Candidate models compared during training"""
+        # Training-only libraries are imported here so serving processes never load them
+        from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
+        from sklearn.linear_model import LinearRegression
+        import xgboost as xgb
+        import lightgbm as lgb
+        
+        return {
+            'random_forest': RandomForestRegressor(n_estimators=100, random_state=42),
+            'gradient_boosting': GradientBoostingRegressor(random_state=42),
+            'xgboost': xgb.XGBRegressor(random_state=42),
+            'lightgbm': lgb.LGBMRegressor(random_state=42)
+        }
+    
     def generate_sample_data(self) -> pd.DataFrame:
         """Generate sample data for training if no CSV file is available"""
         logger.info("Generating sample training data...")
@@ -225,97 +621,178 @@ class BabyWeightPredictor:
         
         return pd.DataFrame(data)
     
+    def _build_input_data(self, request: BabyWeightRequest) -> Dict[str, float]:
+        """Map a request onto the model feature layout"""
+        return {
+            'gestation_weeks': request.gestational_age,
+            'age': request.maternal_age,
+            'height': request.maternal_height,
+            'weight': request.maternal_weight,
+            'parity': request.previous_pregnancies,
+            'smoke': request.smoking_status,
+            'bmi': request.maternal_weight / ((request.maternal_height / 100) ** 2)
+        }
+    
+    def _build_response(self, request: BabyWeightRequest, input_data: Dict[str, float],
+                        predicted_weight: float, model_version: str) -> PredictionResponse:
+        """Turn a raw model output into a prediction response"""
+        # Ensure prediction is reasonable
+        if predicted_weight < 1000 or predicted_weight > 6000:
+            logger.warning(f"Unrealistic prediction: {predicted_weight}g, using fallback calculation")
+            # Use a simple formula as fallback
+            base_weight = 2500 + (request.gestational_age - 24) * 100
+            age_factor = 0 if 25 <= request.maternal_age <= 35 else (50 if request.maternal_age > 35 else -50)
+            height_factor = (request.maternal_height - 165) * 5
+            weight_factor = (request.maternal_weight - 65) * 3
+            parity_factor = request.previous_pregnancies * 50
+            smoke_factor = request.smoking_status * -100
+            
+            predicted_weight = base_weight + age_factor + height_factor + weight_factor + parity_factor + smoke_factor
+            predicted_weight = max(2000, min(5000, predicted_weight))
+        
+        # Final clipping to reasonable range
+        predicted_weight = max(2000, min(5000, predicted_weight))
+        
+        # Determine weight category and risk level
+        if predicted_weight < 2500:
+            weight_category = "Low Birth Weight"
+            risk_level = RiskLevel.LOW
+            recommendation = "Consider discussing nutrition and monitoring with your doctor."
+        elif predicted_weight > 4000:
+            weight_category = "High Birth Weight"
+            risk_level = RiskLevel.MEDIUM
+            recommendation = "Monitor glucose levels and discuss delivery plans with your healthcare provider."
+        else:
+            weight_category = "Normal Birth Weight"
+            risk_level = RiskLevel.NORMAL
+            recommendation = "Predicted weight is within normal range. Continue regular check-ups."
+        
+        # Calculate confidence (simplified)
+        confidence = 0.85  # This could be calculated based on model uncertainty
+        
+        return PredictionResponse(
+            success=True,
+            prediction_type="baby_weight",
+            predicted_weight=round(predicted_weight),
+            weight_category=weight_category,
+            risk_level=risk_level,
+            recommendation=recommendation,
+            confidence=confidence,
+            disclaimer="This prediction is based on statistical models and should not replace professional medical advice. Actual birth weight can vary significantly.",
+            model_version=model_version,
+            prediction_timestamp=datetime.now().isoformat(),
+            input_data=input_data
+        )
+    
     async def predict(self, request: BabyWeightRequest) -> PredictionResponse:
         """Make a baby weight prediction"""
         try:
-            if self.model is None:
+            predictions = await self.predict_batch([request])
+            return predictions[0]
+            
+        except Exception as e:
+            logger.error(f"Error making prediction: {e}")
+            raise e
+    
+    async def predict_batch(self, requests: List[BabyWeightRequest]) -> List[PredictionResponse]:
+        """Make baby weight predictions for many requests in one vectorized model call"""
+        try:
+            # Pin one bundle for the whole batch so a concurrent promotion cannot mix versions
+            bundle = self.bundle
+            if bundle is None:
                 raise ValueError("Model not loaded. Please train or load the model first.")
             
-            # Prepare input data
-            input_data = {
-                'gestation_weeks': request.gestational_age,
-                'age': request.maternal_age,
-                'height': request.maternal_height,
-                'weight': request.maternal_weight,
-                'parity': request.previous_pregnancies,
-                'smoke': request.smoking_status,
-                'bmi': request.maternal_weight / ((request.maternal_height / 100) ** 2)
-            }
+            if not requests:
+                return []
             
-            # Convert to array and scale
-            X = np.array([list(input_data.values())])
-            X_scaled = self.scaler.transform(X)
-            
-            # Make prediction
-            predicted_weight = self.model.predict(X_scaled)[0]
-            
-            # Add some debugging
-            logger.info(f"Raw prediction: {predicted_weight}")
-            logger.info(f"Input features: {input_data}")
-            
-            # Ensure prediction is reasonable
-            if predicted_weight < 1000 or predicted_weight > 6000:
-                logger.warning(f"Unrealistic prediction: {predicted_weight}g, using fallback calculation")
-                # Use a simple formula as fallback
-                base_weight = 2500 + (request.gestational_age - 24) * 100
-                age_factor = 0 if 25 <= request.maternal_age <= 35 else (50 if request.maternal_age > 35 else -50)
-                height_factor = (request.maternal_height - 165) * 5
-                weight_factor = (request.maternal_weight - 65) * 3
-                parity_factor = request.previous_pregnancies * 50
-                smoke_factor = request.smoking_status * -100
-                
-                predicted_weight = base_weight + age_factor + height_factor + weight_factor + parity_factor + smoke_factor
-                predicted_weight = max(2000, min(5000, predicted_weight))
-            
-            # Final clipping to reasonable range
-            predicted_weight = max(2000, min(5000, predicted_weight))
+            # Build the full feature matrix once
+            rows = [self._build_input_data(request) for request in requests]
+            X = np.array([list(row.values()) for row in rows], dtype=float)
             
-            # Determine weight category and risk level
-            if predicted_weight < 2500:
-                weight_category = "Low Birth Weight"
-                risk_level = RiskLevel.LOW
-                recommendation = "Consider discussing nutrition and monitoring with your doctor."
-            elif predicted_weight > 4000:
-                weight_category = "High Birth Weight"
-                risk_level = RiskLevel.MEDIUM
-                recommendation = "Monitor glucose levels and discuss delivery plans with your healthcare provider."
-            else:
-                weight_category = "Normal Birth Weight"
-                risk_level = RiskLevel.NORMAL
-                recommendation = "Predicted weight is within normal range. Continue regular check-ups."
+            # Predict on the inference pool through the fused model + scaler artifact,
+            # scoring only the rows that are not already cached for this version
+            predicted_weights = await self._score(bundle, X)
             
-            # Calculate confidence (simplified)
-            confidence = 0.85  # This could be calculated based on model uncertainty
+            logger.info(f"Scored {len(requests)} baby weight request(s)")
             
-            return PredictionResponse(
+            return [
+                self._build_response(request, input_data, float(predicted_weight), bundle.version)
+                for request, input_data, predicted_weight in zip(requests, rows, predicted_weights)
+            ]
+            
+        except Exception as e:
+            logger.error(f"Error making batch prediction: {e}")
+            raise e
+    
+    async def predict_trajectory(self, request: BabyWeightTrajectoryRequest) -> BabyWeightTrajectoryResponse:
+        """Predict the birth weight curve of one maternal profile in one vectorized model call"""
+        try:
+            # One request per point so every point goes through the same checks, clipping
+            # and categories as /predict/baby-weight; predict_batch scores them together
+            points = [
+                BabyWeightRequest(
+                    gestational_age=gestational_age,
+                    maternal_age=request.maternal_age,
+                    maternal_height=request.maternal_height,
+                    maternal_weight=request.maternal_weight,
+                    previous_pregnancies=request.previous_pregnancies,
+                    smoking_status=request.smoking_status
+                )
+                for gestational_age in trajectory_ages(
+                    request.gestational_age_start, request.gestational_age_end, request.gestational_age_step
+                )
+            ]
+            predictions = await self.predict_batch(points)
+            
+            return BabyWeightTrajectoryResponse(
                 success=True,
-                prediction_type="baby_weight",
-                predicted_weight=round(predicted_weight),
-                weight_category=weight_category,
-                risk_level=risk_level,
-                recommendation=recommendation,
-                confidence=confidence,
-                disclaimer="This prediction is based on statistical models and should not replace professional medical advice. Actual birth weight can vary significantly.",
-                model_version=self.model_version,
+                points=[
+                    TrajectoryPoint(
+                        gestational_age=point.gestational_age,
+                        predicted_weight=prediction.predicted_weight,
+                        weight_category=prediction.weight_category,
+                        risk_level=prediction.risk_level
+                    )
+                    for point, prediction in zip(points, predictions)
+                ],
+                disclaimer=predictions[0].disclaimer,
+                model_version=predictions[0].model_version,
                 prediction_timestamp=datetime.now().isoformat(),
-                input_data=input_data
+                input_data={
+                    'age': request.maternal_age,
+                    'height': request.maternal_height,
+                    'weight': request.maternal_weight,
+                    'parity': request.previous_pregnancies,
+                    'smoke': request.smoking_status,
+                    'bmi': request.maternal_weight / ((request.maternal_height / 100) ** 2),
+                    'gestation_weeks': [point.gestational_age for point in points]
+                }
             )
             
         except Exception as e:
-            logger.error(f"Error making prediction: {e}")
+            logger.error(f"Error making trajectory prediction: {e}")
             raise e
     
+    async def _score(self, bundle: ModelBundle, X: np.ndarray) -> np.ndarray:
+        async def compute(rows: np.ndarray) -> np.ndarray:
+            return await get_model_executor().run_inference(bundle.inference_model.predict_many, rows)
+        
+        if self.cache is None:
+            return await compute(X)
+        return await self.cache.get_or_compute(bundle.version, X, compute)
+    
     def evaluate_model(self, test_data_path: str) -> Dict[str, float]:
         """Evaluate model performance on test data"""
+        from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+        
         try:
-            df = self.load_csv_data(test_data_path)
+            df = self.load_data(test_data_path, columns=REQUIRED_COLUMNS)
             processed_df = self.preprocess_data(df)
             
-            X = processed_df[['gestation_weeks', 'age', 'height', 'weight', 'parity', 'smoke', 'bmi']]
+            X = processed_df[MODEL_FEATURES]
             y = processed_df['bwt']
             
-            X_scaled = self.scaler.transform(X)
-            y_pred = self.model.predict(X_scaled)
+            y_pred = self.bundle.inference_model.predict_many(X.to_numpy(dtype=float))
             
             metrics = {
                 'mae': mean_absolute_error(y, y_pred),
@@ -329,3 +806,30 @@ class BabyWeightPredictor:
         except Exception as e:
             logger.error(f"Error evaluating model: {e}")
             raise e
+
+
+def trajectory_ages(start: float, end: float, step: float) -> List[float]:
+    """Gestational ages from start to end (inclusive when it lands on a step)"""
+    n_points = int(np.floor((end - start) / step + 1e-9)) + 1
+    return [round(start + i * step, 6) for i in range(n_points)]
+
+
+def prepare_baby_weight_data(data_file_path: Optional[str] = None) -> Dict[str, Any]:
+    """Prepare the baby weight training data inside a training worker process"""
+    return BabyWeightPredictor().prepare_training_data(data_file_path)
+
+
+def distill_baby_weight_model(teacher, scaler, X_train_raw: np.ndarray, X_val_raw: np.ndarray,
+                              y_val: np.ndarray):
+    """Distill the served baby weight model inside a training worker process"""
+    predictor = BabyWeightPredictor()
+    synthetic = predictor.preprocess_data(predictor.generate_sample_data())[MODEL_FEATURES]
+    return distill_model(
+        teacher, scaler, X_train_raw, synthetic.to_numpy(dtype=float), X_val_raw, y_val, 'r2',
+        route_fraction=TRAINING_DISTILL_ROUTE_FRACTION, tolerance=TRAINING_DISTILL_TOLERANCE
+    )
+
+
+def update_baby_weight_model(model_path: str, base_version: str) -> Dict[str, Any]:
+    """Update a saved baby weight model version inside a training worker process"""
+    return BabyWeightPredictor(model_path).prepare_incremental_update(base_version)
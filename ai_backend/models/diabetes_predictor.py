@@ -1,69 +1,296 @@
 import pandas as pd
 import numpy as np
-from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
-from sklearn.linear_model import LogisticRegression
-from sklearn.model_selection import train_test_split, cross_val_score
-from sklearn.preprocessing import StandardScaler
-from sklearn.metrics import accuracy_score, classification_report, roc_auc_score
 import joblib
 import os
+import time
 from datetime import datetime
 from loguru import logger
-from typing import Dict, Any, Optional
-import xgboost as xgb
-import lightgbm as lgb
+from typing import Dict, Any, Optional, List, Callable
 
+from utils.model_executor import get_model_executor
+from utils.prediction_cache import PredictionCache
+from utils.table_io import read_table
+from utils.training_store import get_training_store
+from models.training import (
+    compile_serving_model, incremental_update, select_best_model, supports_incremental_update
+)
+from models.hyperparameter_search import tune_candidates
+from models.registry import ModelBundle, ModelRegistry
+from models.distillation import distill_model
+from models.lookup_table import tabulate_model
+from models.inference import DerivedFeature, compile_fused_model
 from schemas.prediction_schemas import DiabetesRequest, PredictionResponse, RiskLevel
 
+# Stop candidates whose partial validation score cannot catch up with the best one
+TRAINING_EARLY_ABANDON = os.getenv("TRAINING_EARLY_ABANDON", "false").lower() == "true"
+TRAINING_ABANDON_MARGIN = float(os.getenv("TRAINING_ABANDON_MARGIN", "0.02"))
+
+# Serving budgets for model selection: candidates over the p99 single-row latency or
+# artifact size are skipped, and scores within the tolerance of the best count as a
+# tie won by the faster model (0 disables a budget)
+TRAINING_LATENCY_BUDGET_MS = float(os.getenv("TRAINING_LATENCY_BUDGET_MS", "0")) or None
+TRAINING_SIZE_BUDGET_MB = float(os.getenv("TRAINING_SIZE_BUDGET_MB", "0")) or None
+TRAINING_SCORE_TOLERANCE = float(os.getenv("TRAINING_SCORE_TOLERANCE", "0"))
+
+# Cut a winning random forest back to the fewest trees / shallowest depth scoring
+# within this tolerance of the full forest before serving it
+TRAINING_COMPACT_FORESTS = os.getenv("TRAINING_COMPACT_FORESTS", "true").lower() == "true"
+TRAINING_COMPACTION_TOLERANCE = float(os.getenv("TRAINING_COMPACTION_TOLERANCE", "0.002"))
+
+# Optionally distill the served model into a small student; rows the student is least
+# sure about (about this share of traffic) still go to the full model, and the student
+# is only served if the combined score stays within the tolerance of the full model's
+TRAINING_DISTILL = os.getenv("TRAINING_DISTILL", "false").lower() == "true"
+TRAINING_DISTILL_ROUTE_FRACTION = float(os.getenv("TRAINING_DISTILL_ROUTE_FRACTION", "0.05"))
+TRAINING_DISTILL_TOLERANCE = float(os.getenv("TRAINING_DISTILL_TOLERANCE", "0.005"))
+
+# Serve risk from a table of the model's output over the request domain, built when a
+# model is published (optionally interpolated between grid points instead of snapped).
+# The table is only served if its largest error against the live model on validation
+# rows is within the tolerance (absolute probability). Steps are the grid spacing of
+# weight (kg) and height (cm); BMI is derived from them rather than tabulated
+DIABETES_LOOKUP_TABLE = os.getenv("DIABETES_LOOKUP_TABLE", "false").lower() == "true"
+DIABETES_LOOKUP_INTERPOLATE = os.getenv("DIABETES_LOOKUP_INTERPOLATE", "true").lower() == "true"
+DIABETES_LOOKUP_TOLERANCE = float(os.getenv("DIABETES_LOOKUP_TOLERANCE", "0.02"))
+DIABETES_LOOKUP_STEPS = [float(step) for step in os.getenv("DIABETES_LOOKUP_STEPS", "5,5").split(",")]
+
+# Requests are answered from the table only if their BMI is weight / height^2 to within
+# this much; the frontend sends it rounded to one decimal
+LOOKUP_BMI_TOLERANCE = 0.05 + 1e-6
+
+# Incremental retraining: trees / boosting rounds added per update, and how far
+# below the production model's holdout score an update may land and still be promoted
+TRAINING_INCREMENTAL_ESTIMATORS = int(os.getenv("TRAINING_INCREMENTAL_ESTIMATORS", "20"))
+TRAINING_INCREMENTAL_TOLERANCE = float(os.getenv("TRAINING_INCREMENTAL_TOLERANCE", "0.005"))
+
+# Columns the model is trained and served on, in order
+MODEL_FEATURES = ['Age', 'Pregnancy No', 'Weight', 'Height', 'BMI', 'Heredity']
+
+
+def bmi_from_weight_height(X: np.ndarray) -> np.ndarray:
+    """BMI of raw feature rows in MODEL_FEATURES order (weight in kg, height in cm)"""
+    return X[:, 2] / (X[:, 3] / 100) ** 2
+
+
+def lookup_grid(weight_step: float, height_step: float) -> Dict[str, Any]:
+    """Lookup table grid over the DiabetesRequest bounds, per model feature.
+
+    Integer and flag inputs are exact; the continuous ones are interpolated
+    between points. BMI has no axis (see LOOKUP_BMI).
+    """
+    return {
+        'Age': (np.arange(13, 61), True),
+        'Pregnancy No': (np.arange(1, 11), True),
+        'Weight': (np.arange(30, 200 + 1e-9, weight_step), False),
+        'Height': (np.arange(120, 220 + 1e-9, height_step), False),
+        'BMI': (None, None),
+        'Heredity': (np.arange(0, 2), True)
+    }
+
+
+LOOKUP_GRID = lookup_grid(*DIABETES_LOOKUP_STEPS[:2])
+# Weight and height fix BMI, so most points of a BMI axis would be impossible inputs
+LOOKUP_BMI = DerivedFeature(MODEL_FEATURES.index('BMI'), bmi_from_weight_height, LOOKUP_BMI_TOLERANCE)
+
+# Columns read from data files (everything preprocessing needs, nothing more)
+REQUIRED_COLUMNS = ['Age', 'Pregnancy No', 'Weight', 'Height', 'BMI', 'Heredity', 'Prediction']
+
 class DiabetesPredictor:
-    def __init__(self, model_path: str = "models/saved/diabetes_model.joblib"):
+    def __init__(self, model_path: str = "models/saved/diabetes_model.joblib",
+                 cache: Optional[PredictionCache] = None):
         self.model_path = model_path
-        self.model = None
-        self.scaler = StandardScaler()
-        self.model_version = "1.0.0"
+        # Served model, scaler and metadata, replaced as a single reference
+        self.bundle: Optional[ModelBundle] = None
+        # Optional cache of model outputs for repeated feature rows
+        self.cache = cache
+        # not_loaded -> loading -> (training) -> ready | failed, reported by the readiness probe
+        self.state = "not_loaded"
+        self.load_error: Optional[str] = None
+        self.load_time: Optional[float] = None
+        self.registry = ModelRegistry(
+            os.path.splitext(os.path.basename(model_path))[0],
+            root=os.path.dirname(model_path)
+        )
         self.feature_names = [
             'age', 'pregnancy_no', 'weight', 'height', 'bmi', 'heredity'
         ]
         
-    async def load_model(self):
-        """Load the trained model from disk"""
+    @property
+    def model(self):
+        """Raw estimator, or the fused inference object when only that was loaded"""
+        if self.bundle is None:
+            return None
+        return self.bundle.model if self.bundle.model is not None else self.bundle.inference_model
+    
+    @property
+    def scaler(self):
+        return self.bundle.scaler if self.bundle else None
+    
+    @property
+    def model_version(self) -> str:
+        return self.bundle.version if self.bundle else "unversioned"
+    
+    @property
+    def load_stats(self) -> Dict[str, Any]:
+        """Per-artifact timings of the last registry load"""
+        return self.registry.last_load
+    
+    @property
+    def is_ready(self) -> bool:
+        return self.bundle is not None
+    
+    def status(self) -> Dict[str, Any]:
+        """Lifecycle state reported by the readiness probe"""
+        return {
+            'state': self.state,
+            'ready': self.is_ready,
+            'model_version': self.model_version,
+            'load_time': self.load_time,
+            'error': self.load_error
+        }
+    
+    async def load_model(self, allow_training: bool = True):
+        """Load the current diabetes model version from the registry.
+
+        Falls back to training a new model when nothing usable is saved, unless
+        ``allow_training`` is off, in which case the load fails instead.
+        """
+        started = time.perf_counter()
+        self.state = "loading"
+        self.load_error = None
         try:
-            if os.path.exists(self.model_path):
-                logger.info(f"Loading existing diabetes model from {self.model_path}")
-                self.model = joblib.load(self.model_path)
-                
-                # Load the fitted scaler
-                scaler_path = self.model_path.replace('.joblib', '_scaler.joblib')
-                if os.path.exists(scaler_path):
-                    logger.info(f"Loading fitted scaler from {scaler_path}")
-                    self.scaler = joblib.load(scaler_path)
-                else:
-                    logger.warning("Scaler not found, retraining model...")
-                    await self.train_model()
-            else:
+            try:
+                loaded = await self._load_saved_model()
+            except Exception as e:
+                logger.error(f"Error loading diabetes model: {e}")
+                if not allow_training:
+                    raise
+                loaded = False
+            
+            if not loaded:
+                if not allow_training:
+                    raise FileNotFoundError(f"No saved diabetes model found and training at startup is disabled")
                 logger.warning("No existing diabetes model found. Training new model...")
+                self.state = "training"
                 await self.train_model()
         except Exception as e:
-            logger.error(f"Error loading diabetes model: {e}")
-            await self.train_model()
+            self.state = "failed"
+            self.load_error = str(e)
+            raise
+        finally:
+            self.load_time = round(time.perf_counter() - started, 3)
     
-    def load_csv_data(self, file_path: str) -> pd.DataFrame:
-        """Load diabetes data from CSV file"""
+    async def _load_saved_model(self) -> bool:
+        """Serve the registry's current version, importing legacy pickles if needed"""
+        executor = get_model_executor()
+        
+        if self.registry.current_version():
+            logger.info(f"Loading diabetes model version {self.registry.current_version()} from {self.registry.root}")
+            self._serve(await executor.run_inference(self.registry.load_serving))
+            return True
+        
+        # Pre-registry deployments kept a bare model and scaler next to each other
+        scaler_path = self.model_path.replace('.joblib', '_scaler.joblib')
+        if os.path.exists(self.model_path) and os.path.exists(scaler_path):
+            logger.info(f"Importing legacy diabetes model from {self.model_path} into the registry")
+            self._serve(await executor.run_inference(self._import_legacy_artifacts, scaler_path))
+            return True
+        
+        return False
+    
+    def _serve(self, bundle: ModelBundle):
+        """Swap in the bundle used for predictions"""
+        self.bundle = bundle
+        self.state = "ready"
+        self.load_error = None
+        if self.cache is not None:
+            self.cache.invalidate(keep_version=bundle.version)
+    
+    def _import_legacy_artifacts(self, scaler_path: str) -> ModelBundle:
+        """Register the legacy model and scaler pickles as version 1.0.0 (blocking)"""
+        model, scaler = joblib.load(self.model_path), joblib.load(scaler_path)
+        bundle = ModelBundle(
+            model,
+            scaler,
+            MODEL_FEATURES,
+            metrics={'source': 'legacy'},
+            version="1.0.0",
+            fused=compile_fused_model(model, scaler, self._parity_rows())
+        )
+        if not self.registry.has_version(bundle.version):
+            self.registry.save(bundle)
+        self.registry.promote(bundle.version)
+        return bundle
+    
+    def _parity_rows(self, n_rows: int = 256) -> np.ndarray:
+        """Raw feature rows to check a fused artifact against its model: ingested data, else synthetic rows"""
+        store = get_training_store()
+        if store.has_data('diabetes'):
+            df = store.load('diabetes', columns=REQUIRED_COLUMNS, parts=1)
+        else:
+            df = self.generate_sample_data()
+        return self.preprocess_data(df)[MODEL_FEATURES].to_numpy(dtype=float)[:n_rows]
+    
+    def _publish(self, bundle: ModelBundle, X_check: Optional[np.ndarray] = None,
+                 promote: bool = True) -> ModelBundle:
+        """Fuse if needed, save and (unless told otherwise) promote a freshly trained bundle (blocking)"""
+        if bundle.fused is None:
+            bundle.fused = compile_fused_model(bundle.model, bundle.scaler, X_check)
+        self.registry.save(bundle)
+        if not promote:
+            return bundle
+        self.registry.promote(bundle.version)
+        # Serve from the saved artifact so this worker maps the same pages as its peers
+        return self.registry.load_serving(bundle.version)
+    
+    async def promote(self, version: str) -> str:
+        """Serve a previously saved version"""
+        executor = get_model_executor()
+        bundle = await executor.run_inference(self.registry.load_serving, version)
+        await executor.run_inference(self.registry.promote, version)
+        self._serve(bundle)
+        return version
+    
+    async def rollback(self) -> str:
+        """Go back to the version served before the current one"""
+        executor = get_model_executor()
+        version = await executor.run_inference(self.registry.rollback)
+        self._serve(await executor.run_inference(self.registry.load_serving, version))
+        return version
+    
+    async def refresh(self) -> bool:
+        """Pick up a version promoted by another worker; returns True if the model changed"""
+        current = self.registry.current_version()
+        if current is None or (self.bundle and self.bundle.version == current):
+            return False
+        self._serve(await get_model_executor().run_inference(self.registry.load_serving, current))
+        logger.info(f"Switched diabetes model to version {current}")
+        return True
+    
+    def load_data(self, file_path: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """Load diabetes data from a CSV, Excel, Parquet or Feather file.
+        
+        ``columns`` limits what is read; Parquet and Feather files (the
+        processed-data formats) then load just those columns, already typed.
+        """
         try:
-            logger.info(f"Loading diabetes data from CSV file: {file_path}")
+            logger.info(f"Loading data from: {file_path}")
             
-            # Load the CSV file
-            df = pd.read_csv(file_path)
+            df = read_table(file_path, columns=columns)
             
-            logger.info(f"Loaded {len(df)} records from CSV file")
+            logger.info(f"Loaded {len(df)} records from {os.path.basename(file_path)}")
             logger.info(f"Columns: {df.columns.tolist()}")
             
             return df
             
         except Exception as e:
-            logger.error(f"Error loading CSV data: {e}")
+            logger.error(f"Error loading data: {e}")
             raise e
     
+    def load_csv_data(self, file_path: str) -> pd.DataFrame:
+        """Load diabetes data from CSV file"""
+        return self.load_data(file_path)
+    
     def preprocess_data(self, df: pd.DataFrame) -> pd.DataFrame:
         """Preprocess the diabetes data for training"""
         try:
@@ -76,9 +303,7 @@ class DiabetesPredictor:
             processed_df = processed_df.dropna()
             
             # Ensure all required columns exist
-            required_columns = [
-                'Age', 'Pregnancy No', 'Weight', 'Height', 'BMI', 'Heredity', 'Prediction'
-            ]
+            required_columns = REQUIRED_COLUMNS
             
             # Check if we have the required columns
             missing_columns = [col for col in required_columns if col not in processed_df.columns]
@@ -102,28 +327,260 @@ class DiabetesPredictor:
             logger.error(f"Error preprocessing diabetes data: {e}")
             raise e
     
-    async def train_model(self, data_file_path: Optional[str] = None):
+    async def train_model(self, data_file_path: Optional[str] = None,
+                          progress_callback: Optional[Callable[..., None]] = None,
+                          early_abandon: Optional[bool] = None, incremental: bool = False,
+                          hyperparameters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Train the diabetes prediction model"""
         try:
             logger.info("Starting diabetes model training...")
+            executor = get_model_executor()
+            report = progress_callback or (lambda progress, stage, candidate=None: None)
+            if early_abandon is None:
+                early_abandon = TRAINING_EARLY_ABANDON
+            
+            if incremental and not data_file_path:
+                summary = await self._train_incremental(report)
+                if summary is not None:
+                    return summary
+            
+            # Load, split and scale the data in a training worker
+            report(0.02, "preparing data")
+            data = await executor.run_training(prepare_diabetes_data, data_file_path)
+            
+            # Apply requested hyperparameters and/or tune them on the training rows
+            candidates = self.build_candidates()
+            tuning = {'params': {}, 'search': None}
+            if hyperparameters:
+                tuning = await tune_candidates(
+                    candidates, data['X_train'], data['y_train'],
+                    metric='roc_auc',
+                    executor=executor,
+                    hyperparameters=hyperparameters,
+                    checkpoint_dir=os.path.join(self.registry.root, 'searches'),
+                    dataset=data['dataset'],
+                    progress_callback=report
+                )
+            
+            # Fit every candidate concurrently and keep the best one
+            report(0.1, "fitting candidate models")
+            result = await select_best_model(
+                candidates,
+                data['X_train'], data['y_train'], data['X_test'], data['y_test'],
+                metric='roc_auc',
+                executor=executor,
+                early_abandon=early_abandon,
+                abandon_margin=TRAINING_ABANDON_MARGIN,
+                progress_callback=report,
+                scaler=data['scaler'],
+                X_profile=data['X_test_raw'],
+                latency_budget_ms=TRAINING_LATENCY_BUDGET_MS,
+                size_budget_mb=TRAINING_SIZE_BUDGET_MB,
+                score_tolerance=TRAINING_SCORE_TOLERANCE
+            )
+            
+            # Fuse the winner for serving; a forest is also compacted
+            report(0.87, "compiling inference artifact")
+            fused, compaction = await executor.run_training(
+                compile_serving_model, result['model'], data['scaler'], data['X_test_raw'], data['y_test'],
+                'roc_auc', TRAINING_COMPACTION_TOLERANCE if TRAINING_COMPACT_FORESTS else None
+            )
+            distillation = None
+            if TRAINING_DISTILL:
+                report(0.88, "distilling student model")
+                fused, distillation = await executor.run_training(
+                    distill_diabetes_model, fused, data['scaler'], data['X_train_raw'], data['X_test_raw'], data['y_test']
+                )
+            lookup_table = None
+            if DIABETES_LOOKUP_TABLE:
+                report(0.89, "building lookup table")
+                fused, lookup_table = await executor.run_training(
+                    tabulate_diabetes_model, result['model'], data['scaler'], data['X_test_raw'], fused
+                )
+            
+            bundle = ModelBundle(
+                result['model'],
+                data['scaler'],
+                MODEL_FEATURES,
+                fused=fused,
+                metrics={
+                    'best_model': result['best_model'],
+                    'best_score': result['best_score'],
+                    'scores': result['scores'],
+                    'fit_times': result['fit_times'],
+                    'training_rows': len(data['y_train']),
+                    'data_file_path': data_file_path,
+                    'dataset': data['dataset'],
+                    'hyperparameters': tuning['params'].get(result['best_model'], {}),
+                    'serving_cost': result['serving_costs'].get(result['best_model']),
+                    'serving_costs': result['serving_costs'],
+                    'selection': result['selection'],
+                    'compaction': compaction,
+                    'distillation': distillation,
+                    'lookup_table': lookup_table,
+                    'search': tuning['search']
+                }
+            )
+            
+            # Save the bundle as a new version, promote it, then swap the served
+            # reference so predictions never pair a new model with an old scaler
+            report(0.9, "saving model")
+            self._serve(await executor.run_inference(self._publish, bundle))
+            
+            logger.info(f"Diabetes model training completed. Best ROC AUC score: {result['best_score']:.4f}")
+            logger.info(f"Model version {bundle.version} saved to {self.registry.root}")
             
+            summary = {key: value for key, value in result.items() if key != 'model'}
+            summary['model_version'] = bundle.version
+            summary['search'] = tuning['search']
+            return summary
+            
+        except Exception as e:
+            logger.error(f"Error training diabetes model: {e}")
+            raise e
+    
+    async def _train_incremental(self, report: Callable[[float, str], None]) -> Optional[Dict[str, Any]]:
+        """Update the served model with the rows ingested since its version was trained.
+        
+        Returns None when the served model cannot be updated that way, so the
+        caller falls back to a full refit.
+        """
+        if self.bundle is None:
+            logger.info("No diabetes model is served yet; running a full retrain")
+            return None
+        
+        executor = get_model_executor()
+        base_version = self.bundle.version
+        report(0.05, "updating production model")
+        update = await executor.run_training(update_diabetes_model, self.model_path, base_version)
+        if 'fallback' in update:
+            logger.info(f"Cannot update {base_version} incrementally ({update['fallback']}); running a full retrain")
+            return None
+        
+        # Promote only if the update held up on the holdout; otherwise keep it for inspection
+        bundle = update['bundle']
+        if DIABETES_LOOKUP_TABLE and update['accepted']:
+            report(0.85, "building lookup table")
+            bundle.fused, bundle.metrics['lookup_table'] = await executor.run_training(
+                tabulate_diabetes_model, bundle.model, bundle.scaler, update['X_holdout'], bundle.fused
+            )
+        report(0.9, "saving model")
+        published = await executor.run_inference(self._publish, bundle, update['X_holdout'], update['accepted'])
+        if update['accepted']:
+            self._serve(published)
+        
+        metrics = bundle.metrics
+        summary = {
+            'best_model': metrics['best_model'],
+            'best_score': metrics['best_score'],
+            'scores': {metrics['best_model']: metrics['best_score'], 'production': metrics['base_score']},
+            'fit_times': metrics['fit_times'],
+            'abandoned': [],
+            'training_mode': 'incremental',
+            'base_version': base_version,
+            'new_rows': metrics['new_rows'],
+            'promoted': update['accepted'],
+            'model_version': bundle.version,
+            'message': (
+                f"Updated {metrics['best_model']} {base_version} with {metrics['new_rows']} new rows: "
+                f"holdout roc_auc {metrics['best_score']:.4f} vs {metrics['base_score']:.4f}; "
+                + (f"promoted {bundle.version}" if update['accepted'] else f"kept {base_version}, saved {bundle.version} unpromoted")
+            )
+        }
+        logger.info(summary['message'])
+        return summary
+    
+    def prepare_incremental_update(self, base_version: str) -> Dict[str, Any]:
+        """Continue training ``base_version`` on the training store rows added since it was trained (blocking).
+        
+        Returns ``{'fallback': reason}`` when that version cannot be updated
+        incrementally and needs a full refit instead.
+        """
+        base = self.registry.load(base_version)
+        dataset = base.metrics.get('dataset') or {}
+        if dataset.get('source') != 'training_store':
+            return {'fallback': "it was not trained on the training store"}
+        if base.model is None or not supports_incremental_update(base.model):
+            return {'fallback': f"{type(base.model).__name__} cannot be updated incrementally"}
+        
+        store = get_training_store()
+        parts = store.manifest('diabetes')['parts']
+        if len(parts) <= dataset['parts']:
+            return {'fallback': f"no diabetes data has been ingested since version {base_version}"}
+        
+        # Parts are append-only, so rows of the parts the base saw come first
+        df = store.load('diabetes', columns=REQUIRED_COLUMNS, parts=len(parts))
+        seen_rows = sum(part['rows'] for part in parts[:dataset['parts']])
+        old_df = self.preprocess_data(df.iloc[:seen_rows])
+        new_df = self.preprocess_data(df.iloc[seen_rows:])
+        
+        result = incremental_update(
+            base.model,
+            base.scaler,
+            new_df[MODEL_FEATURES].to_numpy(dtype=float),
+            new_df['Prediction'].to_numpy(),
+            old_df[MODEL_FEATURES].to_numpy(dtype=float),
+            old_df['Prediction'].to_numpy(),
+            metric='roc_auc',
+            extra_estimators=TRAINING_INCREMENTAL_ESTIMATORS,
+            tolerance=TRAINING_INCREMENTAL_TOLERANCE
+        )
+        if 'fallback' in result:
+            return result
+        
+        best_model = base.metrics.get('best_model', type(base.model).__name__)
+        bundle = ModelBundle(
+            result['model'],
+            base.scaler,
+            MODEL_FEATURES,
+            metrics={
+                'best_model': best_model,
+                'best_score': result['score'],
+                'fit_times': {best_model: result['fit_time']},
+                'training_mode': 'incremental',
+                'base_version': base_version,
+                'base_score': result['base_score'],
+                'new_rows': result['new_rows'],
+                'holdout_rows': result['holdout_rows'],
+                'training_rows': base.metrics.get('training_rows', 0) + result['new_rows'],
+                'data_file_path': None,
+                'dataset': {'source': 'training_store', 'parts': len(parts), 'rows': len(df)}
+            }
+        )
+        return {'bundle': bundle, 'accepted': result['accepted'], 'X_holdout': result['X_holdout']}
+    
+    def prepare_training_data(self, data_file_path: Optional[str] = None) -> Dict[str, Any]:
+        """Load, split and scale the training data (blocking)"""
+        from sklearn.model_selection import train_test_split
+        from sklearn.preprocessing import StandardScaler
+        
+        try:
             # Load data
+            store = get_training_store()
             if data_file_path:
-                df = self.load_csv_data(data_file_path)
+                df = self.load_data(data_file_path, columns=REQUIRED_COLUMNS)
+                dataset = {'source': data_file_path}
+            elif store.has_data('diabetes'):
+                # Everything ingested so far, already deduplicated across uploads
+                parts = len(store.manifest('diabetes')['parts'])
+                df = store.load('diabetes', columns=REQUIRED_COLUMNS, parts=parts)
+                dataset = {'source': 'training_store', 'parts': parts, 'rows': len(df)}
             else:
                 # Use the GestationalDiabetes.csv file in uploads directory
                 upload_path = "uploads/GestationalDiabetes.csv"
                 if os.path.exists(upload_path):
-                    df = self.load_csv_data(upload_path)
+                    df = self.load_data(upload_path, columns=REQUIRED_COLUMNS)
+                    dataset = {'source': upload_path}
                 else:
                     # Use sample data if no file provided
                     df = self.generate_sample_data()
+                    dataset = {'source': 'sample'}
             
             # Preprocess data
             processed_df = self.preprocess_data(df)
             
             # Prepare features and target
-            X = processed_df[['Age', 'Pregnancy No', 'Weight', 'Height', 'BMI', 'Heredity']]
+            X = processed_df[MODEL_FEATURES]
             y = processed_df['Prediction']
             
             # Split data
@@ -131,53 +588,42 @@ class DiabetesPredictor:
                 X, y, test_size=0.2, random_state=42, stratify=y
             )
             
-            # Scale features
-            X_train_scaled = self.scaler.fit_transform(X_train)
-            X_test_scaled = self.scaler.transform(X_test)
-            
-            # Train multiple models and select the best one
-            models = {
-                'random_forest': RandomForestClassifier(n_estimators=100, random_state=42),
-                'gradient_boosting': GradientBoostingClassifier(random_state=42),
-                'xgboost': xgb.XGBClassifier(random_state=42),
-                'lightgbm': lgb.LGBMClassifier(random_state=42),
-                'logistic_regression': LogisticRegression(random_state=42)
+            # Scale features with a fresh scaler so the served one is never mutated mid-fit
+            scaler = StandardScaler()
+            X_train_scaled = scaler.fit_transform(X_train)
+            X_test_scaled = scaler.transform(X_test)
+            
+            return {
+                'X_train': X_train_scaled,
+                'X_test': X_test_scaled,
+                'X_train_raw': X_train.to_numpy(dtype=float),
+                'X_test_raw': X_test.to_numpy(dtype=float),
+                'y_train': y_train.to_numpy(),
+                'y_test': y_test.to_numpy(),
+                'scaler': scaler,
+                'dataset': dataset
             }
             
-            best_model = None
-            best_score = -np.inf
-            
-            for name, model in models.items():
-                logger.info(f"Training {name}...")
-                model.fit(X_train_scaled, y_train)
-                
-                # Evaluate model
-                y_pred = model.predict(X_test_scaled)
-                score = roc_auc_score(y_test, y_pred)
-                
-                logger.info(f"{name} ROC AUC score: {score:.4f}")
-                
-                if score > best_score:
-                    best_score = score
-                    best_model = model
-            
-            self.model = best_model
-            
-            # Save the model
-            os.makedirs(os.path.dirname(self.model_path), exist_ok=True)
-            joblib.dump(self.model, self.model_path)
-            
-            # Save scaler
-            scaler_path = self.model_path.replace('.joblib', '_scaler.joblib')
-            joblib.dump(self.scaler, scaler_path)
-            
-            logger.info(f"Diabetes model training completed. Best ROC AUC score: {best_score:.4f}")
-            logger.info(f"Model saved to {self.model_path}")
-            
         except Exception as e:
-            logger.error(f"Error training diabetes model: {e}")
+            logger.error(f"Error preparing diabetes training data: {e}")
             raise e
     
+    def build_candidates(self) -> Dict[str, Any]:
+        """Candidate models compared during training"""
+        # Training-only libraries are imported here so serving processes never load them
+        from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
+        from sklearn.linear_model import LogisticRegression
+        import xgboost as xgb
+        import lightgbm as lgb
+        
+        return {
+            'random_forest': RandomForestClassifier(n_estimators=100, random_state=42),
+            'gradient_boosting': GradientBoostingClassifier(random_state=42),
+            'xgboost': xgb.XGBClassifier(random_state=42),
+            'lightgbm': lgb.LGBMClassifier(random_state=42),
+            'logistic_regression': LogisticRegression(random_state=42)
+        }
+    
     def generate_sample_data(self) -> pd.DataFrame:
         """Generate sample diabetes data for training if no CSV file is available"""
         logger.info("Generating sample diabetes training data...")
@@ -210,77 +656,114 @@ class DiabetesPredictor:
         
         return pd.DataFrame(data)
     
+    def _build_input_data(self, request: DiabetesRequest) -> Dict[str, float]:
+        """Map schema fields onto the model feature layout"""
+        return {
+            'Age': request.age,
+            'Pregnancy No': request.pregnancy_no,
+            'Weight': request.weight,
+            'Height': request.height,
+            'BMI': request.bmi,
+            'Heredity': request.heredity
+        }
+    
+    def _build_response(self, input_data: Dict[str, float], risk_probability: float,
+                        model_version: str) -> PredictionResponse:
+        """Turn a diabetes probability into a prediction response"""
+        risk_score = risk_probability * 100  # Convert to percentage
+        
+        # Determine risk level and recommendation
+        if risk_score <= 30:
+            risk_level = RiskLevel.LOW
+            risk_assessment = "Low Risk"
+            recommendation = "Your risk appears low. Continue healthy eating and regular exercise. Monitor with routine check-ups."
+        elif risk_score <= 60:
+            risk_level = RiskLevel.MEDIUM
+            risk_assessment = "Moderate Risk"
+            recommendation = "You may have moderate risk. Consider more frequent glucose monitoring and dietary consultation."
+        else:
+            risk_level = RiskLevel.HIGH
+            risk_assessment = "High Risk"
+            recommendation = "You may be at higher risk. Please consult your healthcare provider immediately for proper testing and monitoring."
+        
+        # Calculate confidence (simplified)
+        confidence = 0.80  # This could be calculated based on model uncertainty
+        
+        return PredictionResponse(
+            success=True,
+            prediction_type="diabetes",
+            risk_score=round(risk_score, 1),
+            risk_assessment=risk_assessment,
+            risk_level=risk_level,
+            recommendation=recommendation,
+            confidence=confidence,
+            disclaimer="This is a preliminary risk assessment tool. Only proper medical testing can definitively diagnose gestational diabetes. Please consult your healthcare provider.",
+            model_version=model_version,
+            prediction_timestamp=datetime.now().isoformat(),
+            input_data=input_data
+        )
+    
     async def predict(self, request: DiabetesRequest) -> PredictionResponse:
         """Make a diabetes risk prediction"""
         try:
-            if self.model is None:
+            predictions = await self.predict_batch([request])
+            return predictions[0]
+            
+        except Exception as e:
+            logger.error(f"Error making diabetes prediction: {e}")
+            raise e
+    
+    async def predict_batch(self, requests: List[DiabetesRequest]) -> List[PredictionResponse]:
+        """Make diabetes risk predictions for many requests in one vectorized model call"""
+        try:
+            # Pin one bundle for the whole batch so a concurrent promotion cannot mix versions
+            bundle = self.bundle
+            if bundle is None:
                 raise ValueError("Diabetes model not loaded. Please train or load the model first.")
             
-            # Prepare input data - map schema fields to model features
-            input_data = {
-                'Age': request.age,
-                'Pregnancy No': request.pregnancy_no,
-                'Weight': request.weight,
-                'Height': request.height,
-                'BMI': request.bmi,
-                'Heredity': request.heredity
-            }
+            if not requests:
+                return []
             
-            # Convert to array and scale
-            X = np.array([list(input_data.values())])
-            X_scaled = self.scaler.transform(X)
-            
-            # Make prediction
-            risk_probability = self.model.predict_proba(X_scaled)[0][1]  # Probability of diabetes
-            risk_score = risk_probability * 100  # Convert to percentage
-            
-            # Determine risk level and recommendation
-            if risk_score <= 30:
-                risk_level = RiskLevel.LOW
-                risk_assessment = "Low Risk"
-                recommendation = "Your risk appears low. Continue healthy eating and regular exercise. Monitor with routine check-ups."
-            elif risk_score <= 60:
-                risk_level = RiskLevel.MEDIUM
-                risk_assessment = "Moderate Risk"
-                recommendation = "You may have moderate risk. Consider more frequent glucose monitoring and dietary consultation."
-            else:
-                risk_level = RiskLevel.HIGH
-                risk_assessment = "High Risk"
-                recommendation = "You may be at higher risk. Please consult your healthcare provider immediately for proper testing and monitoring."
-            
-            # Calculate confidence (simplified)
-            confidence = 0.80  # This could be calculated based on model uncertainty
-            
-            return PredictionResponse(
-                success=True,
-                prediction_type="diabetes",
-                risk_score=round(risk_score, 1),
-                risk_assessment=risk_assessment,
-                risk_level=risk_level,
-                recommendation=recommendation,
-                confidence=confidence,
-                disclaimer="This is a preliminary risk assessment tool. Only proper medical testing can definitively diagnose gestational diabetes. Please consult your healthcare provider.",
-                model_version=self.model_version,
-                prediction_timestamp=datetime.now().isoformat(),
-                input_data=input_data
-            )
+            # Build the full feature matrix once
+            rows = [self._build_input_data(request) for request in requests]
+            X = np.array([list(row.values()) for row in rows], dtype=float)
+            
+            # Probability of diabetes for every row, computed on the inference pool
+            # through the fused model + scaler artifact for rows not already cached
+            risk_probabilities = await self._score(bundle, X)
+            
+            logger.info(f"Scored {len(requests)} diabetes request(s)")
+            
+            return [
+                self._build_response(input_data, float(risk_probability), bundle.version)
+                for input_data, risk_probability in zip(rows, risk_probabilities)
+            ]
             
         except Exception as e:
-            logger.error(f"Error making diabetes prediction: {e}")
+            logger.error(f"Error making batch diabetes prediction: {e}")
             raise e
     
+    async def _score(self, bundle: ModelBundle, X: np.ndarray) -> np.ndarray:
+        async def compute(rows: np.ndarray) -> np.ndarray:
+            return await get_model_executor().run_inference(bundle.inference_model.predict_many, rows)
+        
+        if self.cache is None:
+            return await compute(X)
+        return await self.cache.get_or_compute(bundle.version, X, compute)
+    
     def evaluate_model(self, test_data_path: str) -> Dict[str, float]:
         """Evaluate diabetes model performance on test data"""
+        from sklearn.metrics import accuracy_score, roc_auc_score
+        
         try:
-            df = self.load_csv_data(test_data_path)
+            df = self.load_data(test_data_path, columns=REQUIRED_COLUMNS)
             processed_df = self.preprocess_data(df)
             
-            X = processed_df[['Age', 'Pregnancy No', 'Weight', 'Height', 'BMI', 'Heredity']]
+            X = processed_df[MODEL_FEATURES]
             y = processed_df['Prediction']
             
-            X_scaled = self.scaler.transform(X)
-            y_pred = self.model.predict(X_scaled)
-            y_pred_proba = self.model.predict_proba(X_scaled)[:, 1]
+            y_pred_proba = self.bundle.inference_model.predict_many(X.to_numpy(dtype=float))
+            y_pred = (y_pred_proba >= 0.5).astype(int)
             
             metrics = {
                 'accuracy': accuracy_score(y, y_pred),
@@ -293,3 +776,33 @@ class DiabetesPredictor:
         except Exception as e:
             logger.error(f"Error evaluating diabetes model: {e}")
             raise e
+
+
+def prepare_diabetes_data(data_file_path: Optional[str] = None) -> Dict[str, Any]:
+    """Prepare the diabetes training data inside a training worker process"""
+    return DiabetesPredictor().prepare_training_data(data_file_path)
+
+
+def distill_diabetes_model(teacher, scaler, X_train_raw: np.ndarray, X_val_raw: np.ndarray,
+                           y_val: np.ndarray):
+    """Distill the served diabetes model inside a training worker process"""
+    predictor = DiabetesPredictor()
+    synthetic = predictor.preprocess_data(predictor.generate_sample_data())[MODEL_FEATURES]
+    return distill_model(
+        teacher, scaler, X_train_raw, synthetic.to_numpy(dtype=float), X_val_raw, y_val, 'roc_auc',
+        route_fraction=TRAINING_DISTILL_ROUTE_FRACTION, tolerance=TRAINING_DISTILL_TOLERANCE
+    )
+
+
+def tabulate_diabetes_model(model, scaler, X_check: np.ndarray, fused=None):
+    """Build the diabetes lookup table inside a training worker process"""
+    if fused is None:
+        fused = compile_fused_model(model, scaler, X_check)
+    axes, exact = zip(*(LOOKUP_GRID[feature] for feature in MODEL_FEATURES))
+    return tabulate_model(fused, list(axes), list(exact), DIABETES_LOOKUP_INTERPOLATE, X_check,
+                          tolerance=DIABETES_LOOKUP_TOLERANCE, derived=LOOKUP_BMI)
+
+
+def update_diabetes_model(model_path: str, base_version: str) -> Dict[str, Any]:
+    """Update a saved diabetes model version inside a training worker process"""
+    return DiabetesPredictor(model_path).prepare_incremental_update(base_version)
@@ -0,0 +1,102 @@
+import numpy as np
+from loguru import logger
+from typing import Any, Dict, Optional, Tuple
+
+from models.inference import AffineLinearModel, DistilledModel, FusedModel, compile_fused_model
+from models.training import measure_artifact, score_predictions
+
+# Student: a shallow gradient-boosted model fitted to the teacher's outputs
+STUDENT_ESTIMATORS = 80
+STUDENT_MAX_DEPTH = 3
+STUDENT_LEARNING_RATE = 0.1
+# Gate: a smaller model of the student's error against the teacher
+GATE_ESTIMATORS = 30
+GATE_MAX_DEPTH = 2
+# Share of distillation rows kept out of the student's fit to train the gate on honest errors
+GATE_HOLDOUT_FRACTION = 0.25
+# Probabilities are clipped before taking log-odds for classifier students
+_PROBABILITY_EPSILON = 1e-6
+
+
+def _logit(p: np.ndarray) -> np.ndarray:
+    p = np.clip(p, _PROBABILITY_EPSILON, 1 - _PROBABILITY_EPSILON)
+    return np.log(p / (1 - p))
+
+
+def distill_model(teacher: FusedModel, scaler, X_real: np.ndarray, X_synthetic: np.ndarray,
+                  X_val: np.ndarray, y_val: np.ndarray, metric: str, route_fraction: float,
+                  tolerance: float, seed: int = 42) -> Tuple[FusedModel, Optional[Dict[str, Any]]]:
+    """Distill a served ensemble into a student with a teacher fallback (blocking).
+
+    The student is fitted to the teacher's outputs (log-odds for
+    classifiers) on real training rows plus synthetic ones, which cover
+    inputs the real data rarely shows. The gate is fitted to the student's
+    absolute error on held-out distillation rows. Its threshold sends about
+    ``route_fraction`` of the validation rows to the teacher. The distilled
+    model is returned only if its validation score is within ``tolerance``
+    of the teacher's and its median single-row latency is lower. Otherwise
+    the teacher is returned unchanged. Rows are raw (unscaled) features.
+    """
+    from sklearn.ensemble import GradientBoostingRegressor
+
+    if isinstance(teacher, (AffineLinearModel, DistilledModel)):
+        # A linear model is already cheaper than any student
+        return teacher, None
+
+    X_all = np.vstack([np.asarray(X_real, dtype=np.float64), np.asarray(X_synthetic, dtype=np.float64)])
+    teacher_output = teacher.predict_many(X_all)
+    target = _logit(teacher_output) if teacher.task == 'classifier' else teacher_output
+
+    order = np.random.default_rng(seed).permutation(len(X_all))
+    n_gate = int(len(X_all) * GATE_HOLDOUT_FRACTION)
+    fit_rows, gate_rows = order[n_gate:], order[:n_gate]
+
+    student = GradientBoostingRegressor(
+        n_estimators=STUDENT_ESTIMATORS, max_depth=STUDENT_MAX_DEPTH,
+        learning_rate=STUDENT_LEARNING_RATE, random_state=seed
+    ).fit(scaler.transform(X_all[fit_rows]), target[fit_rows])
+    student_fused = compile_fused_model(student, scaler, X_all[gate_rows][:256])
+
+    # Gap between student and teacher in output units (probabilities for classifiers)
+    student_output = student_fused.predict_many(X_all[gate_rows])
+    if teacher.task == 'classifier':
+        student_output = 1 / (1 + np.exp(-student_output))
+    gap = np.abs(student_output - teacher_output[gate_rows])
+    gate = GradientBoostingRegressor(
+        n_estimators=GATE_ESTIMATORS, max_depth=GATE_MAX_DEPTH, random_state=seed
+    ).fit(scaler.transform(X_all[gate_rows]), gap)
+    gate_fused = compile_fused_model(gate, scaler, X_all[gate_rows][:256])
+
+    X_val = np.asarray(X_val, dtype=np.float64)
+    threshold = float(np.quantile(gate_fused.predict_many(X_val), 1 - route_fraction))
+    distilled = DistilledModel(student_fused, gate_fused, teacher, threshold)
+
+    teacher_val = teacher.predict_many(X_val)
+    student_val = distilled.predict_student(X_val)
+    distilled_val = distilled.predict_many(X_val)
+    teacher_score = score_predictions(y_val, teacher_val, metric)
+    distilled_score = score_predictions(y_val, distilled_val, metric)
+    teacher_cost, distilled_cost = measure_artifact(teacher, X_val), measure_artifact(distilled, X_val)
+    # A teacher that is already small gains nothing from a student in front of it
+    accepted = distilled_score >= teacher_score - tolerance and distilled_cost['p50_ms'] < teacher_cost['p50_ms']
+
+    report = {
+        'accepted': bool(accepted),
+        'tolerance': tolerance,
+        'distillation_rows': {'real': len(X_real), 'synthetic': len(X_synthetic)},
+        'teacher_score': teacher_score,
+        'student_score': score_predictions(y_val, student_val, metric),
+        'distilled_score': distilled_score,
+        'student_teacher_mae': float(np.mean(np.abs(student_val - teacher_val))),
+        'distilled_teacher_mae': float(np.mean(np.abs(distilled_val - teacher_val))),
+        'routed_fraction': float(distilled.routed(X_val).mean()),
+        'gate_threshold': threshold,
+        'teacher_cost': teacher_cost,
+        'distilled_cost': distilled_cost
+    }
+    logger.info(
+        f"Distilled {teacher.source_model}: {metric} {distilled_score:.4f} vs teacher {teacher_score:.4f}, "
+        f"{report['routed_fraction']:.1%} routed to the teacher, p99 {distilled_cost['p99_ms']} ms vs "
+        f"{teacher_cost['p99_ms']} ms ({'serving student' if accepted else 'keeping teacher'})"
+    )
+    return (distilled if accepted else teacher), report
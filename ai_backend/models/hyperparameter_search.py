@@ -0,0 +1,314 @@
+import asyncio
+import hashlib
+import json
+import math
+import os
+import re
+import time
+import numpy as np
+from loguru import logger
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from models.training import _set_thread_count, score_model, threads_per_candidate
+from utils.model_executor import ModelExecutor
+
+# Defaults for a "search" request; every key can be overridden per request
+SEARCH_METHOD = os.getenv("TRAINING_SEARCH_METHOD", "halving")
+SEARCH_MAX_TRIALS = int(os.getenv("TRAINING_SEARCH_MAX_TRIALS", "40"))
+SEARCH_TIME_BUDGET = float(os.getenv("TRAINING_SEARCH_TIME_BUDGET", "300"))
+SEARCH_CV_FOLDS = 3
+# Successive halving keeps the best 1/ETA configurations per rung and gives them ETA times the rows
+SEARCH_ETA = 3
+SEARCH_MIN_ROWS = 100
+# Allowed user-supplied search ids (the id names the checkpoint file)
+SEARCH_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]+$')
+
+# Parameter distributions per candidate family:
+#   ["int", low, high]    uniform integer
+#   ["float", low, high]  uniform float
+#   ["log", low, high]    log-uniform float
+#   ["choice", [...]]     one of the listed values
+SEARCH_SPACES: Dict[str, Dict[str, list]] = {
+    'random_forest': {
+        'n_estimators': ['int', 30, 300],
+        'max_depth': ['choice', [None, 4, 6, 8, 12, 16]],
+        'min_samples_leaf': ['int', 1, 20],
+        'max_features': ['choice', [1.0, 'sqrt', 0.5]]
+    },
+    'gradient_boosting': {
+        'n_estimators': ['int', 30, 300],
+        'learning_rate': ['log', 0.01, 0.3],
+        'max_depth': ['int', 2, 5],
+        'subsample': ['float', 0.6, 1.0]
+    },
+    'xgboost': {
+        'n_estimators': ['int', 30, 400],
+        'learning_rate': ['log', 0.01, 0.3],
+        'max_depth': ['int', 2, 8],
+        'subsample': ['float', 0.6, 1.0],
+        'colsample_bytree': ['float', 0.6, 1.0],
+        'min_child_weight': ['log', 1.0, 10.0]
+    },
+    'lightgbm': {
+        'n_estimators': ['int', 30, 400],
+        'learning_rate': ['log', 0.01, 0.3],
+        'num_leaves': ['int', 4, 63],
+        'min_child_samples': ['int', 5, 50],
+        'colsample_bytree': ['float', 0.6, 1.0]
+    },
+    'logistic_regression': {
+        'C': ['log', 0.01, 100.0]
+    }
+}
+
+
+def sample_params(space: Dict[str, list], rng: np.random.Generator) -> Dict[str, Any]:
+    """Draw one configuration from a search space (JSON-serializable values)"""
+    params = {}
+    for name, spec in sorted(space.items()):
+        kind = spec[0]
+        if kind == 'int':
+            params[name] = int(rng.integers(spec[1], spec[2] + 1))
+        elif kind == 'float':
+            params[name] = round(float(rng.uniform(spec[1], spec[2])), 6)
+        elif kind == 'log':
+            params[name] = round(float(math.exp(rng.uniform(math.log(spec[1]), math.log(spec[2])))), 6)
+        elif kind == 'choice':
+            params[name] = spec[1][int(rng.integers(len(spec[1])))]
+        else:
+            raise ValueError(f"Unknown distribution '{kind}' for {name}")
+    return params
+
+
+def make_folds(n_rows: int, n_folds: int, seed: int) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """Shuffled K-fold (train, validation) indices, computed once per search.
+
+    Training indices are in shuffled order, so the first ``n`` of them are a
+    random subsample and smaller rungs of successive halving use nested rows.
+    """
+    order = np.random.default_rng(seed).permutation(n_rows)
+    folds = np.array_split(order, n_folds)
+    return [
+        (np.concatenate([fold for other, fold in enumerate(folds) if other != index]), folds[index])
+        for index in range(n_folds)
+    ]
+
+
+def run_trial(estimator, params: Dict[str, Any], X: np.ndarray, y: np.ndarray,
+              folds: List[Tuple[np.ndarray, np.ndarray]], rows: int, metric: str,
+              n_threads: int = 1) -> Dict[str, Any]:
+    """Mean cross-validated score of one configuration, trained on ``rows`` rows per fold"""
+    from sklearn.base import clone
+    from threadpoolctl import threadpool_limits
+
+    started = time.perf_counter()
+    scores = []
+    with threadpool_limits(limits=n_threads):
+        for train_index, val_index in folds:
+            model = clone(estimator).set_params(**params)
+            _set_thread_count(model, n_threads)
+            train_index = train_index[:rows]
+            model.fit(X[train_index], y[train_index])
+            scores.append(score_model(model, X[val_index], y[val_index], metric))
+
+    return {'score': float(np.mean(scores)), 'fit_time': round(time.perf_counter() - started, 3)}
+
+
+class TrialCheckpoint:
+    """Append-only JSONL record of finished trials, so a search resumes where it stopped"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.results: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    try:
+                        trial = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A line cut short by an interruption; that trial simply runs again
+                        continue
+                    self.results[trial['key']] = trial
+
+    @staticmethod
+    def key(family: str, params: Dict[str, Any], rows: int) -> str:
+        return f"{family}|{json.dumps(params, sort_keys=True)}|{rows}"
+
+    def record(self, trial: Dict[str, Any]):
+        self.results[trial['key']] = trial
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, 'a') as f:
+            f.write(json.dumps(trial) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def search_settings(hyperparameters: Dict[str, Any]) -> Dict[str, Any]:
+    """Search options of a training request merged over the defaults"""
+    requested = hyperparameters.get('search') or {}
+    if requested is True:
+        requested = {}
+    settings = {
+        'method': SEARCH_METHOD,
+        'max_trials': SEARCH_MAX_TRIALS,
+        'time_budget': SEARCH_TIME_BUDGET,
+        'cv_folds': SEARCH_CV_FOLDS,
+        'eta': SEARCH_ETA,
+        'seed': 42,
+        'families': None,
+        'spaces': {},
+        'search_id': None
+    }
+    unknown = set(requested) - set(settings)
+    if unknown:
+        raise ValueError(f"Unknown search options: {', '.join(sorted(unknown))}")
+    settings.update(requested)
+    if settings['method'] not in ('halving', 'random'):
+        raise ValueError(f"Unknown search method: {settings['method']}")
+    # The id names the checkpoint file, so it must not carry a path
+    if settings['search_id'] is not None and not SEARCH_ID_PATTERN.match(str(settings['search_id'])):
+        raise ValueError("search_id may only contain letters, digits, '_' and '-'")
+    return settings
+
+
+def apply_fixed_params(candidates: Dict[str, Any], hyperparameters: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """Set explicit per-family parameters, e.g. {"xgboost": {"max_depth": 4}}"""
+    fixed = {name: params for name, params in hyperparameters.items() if name != 'search'}
+    unknown = set(fixed) - set(candidates)
+    if unknown:
+        raise ValueError(
+            f"Unknown model families in hyperparameters: {', '.join(sorted(unknown))}. "
+            f"Expected one of: {', '.join(candidates)}"
+        )
+    for name, params in fixed.items():
+        candidates[name].set_params(**params)
+    return fixed
+
+
+async def tune_candidates(candidates: Dict[str, Any], X: np.ndarray, y: np.ndarray, metric: str,
+                          executor: ModelExecutor, hyperparameters: Dict[str, Any], checkpoint_dir: str,
+                          dataset: Any = None,
+                          progress_callback: Optional[Callable[..., None]] = None) -> Dict[str, Any]:
+    """Tune each candidate family on cross-validation folds of the training rows.
+
+    Explicit per-family parameters are applied first. With a ``search``
+    entry, every family then gets its own random or successive-halving
+    search within the trial and wall-clock budget. Trials of a rung run
+    on the training pool in waves of one per worker, and no new wave starts
+    once the time budget is spent. The best configuration of each
+    family is set on its candidate, so the usual selection compares tuned
+    models. Finished trials are checkpointed, so the same request (same
+    search id) skips them after an interruption.
+    """
+    report = progress_callback or (lambda progress, stage, candidate=None: None)
+    fixed = apply_fixed_params(candidates, hyperparameters)
+    if 'search' not in hyperparameters:
+        return {'params': fixed, 'search': None}
+
+    settings = search_settings(hyperparameters)
+    families = settings['families'] or [name for name in candidates if name in SEARCH_SPACES or name in settings['spaces']]
+    spaces = {name: {**SEARCH_SPACES.get(name, {}), **settings['spaces'].get(name, {})} for name in families}
+    for name in families:
+        if name not in candidates:
+            raise ValueError(f"Unknown model family to search: {name}")
+        # Explicitly fixed parameters are not searched
+        for param in fixed.get(name, {}):
+            spaces[name].pop(param, None)
+
+    search_id = settings['search_id'] or hashlib.sha1(json.dumps(
+        {'dataset': dataset, 'metric': metric, 'fixed': fixed, 'settings': settings, 'rows': len(y)},
+        sort_keys=True, default=str
+    ).encode()).hexdigest()[:12]
+    checkpoint = TrialCheckpoint(os.path.join(checkpoint_dir, f"{search_id}.jsonl"))
+    resumed = len(checkpoint.results)
+
+    folds = make_folds(len(y), settings['cv_folds'], settings['seed'])
+    full_rows = min(len(train) for train, _ in folds)
+    eta = settings['eta']
+    if settings['method'] == 'halving':
+        rungs = max(1, min(4, 1 + int(math.log(max(1.0, full_rows / SEARCH_MIN_ROWS), eta))))
+    else:
+        rungs = 1
+    # Configurations per family so all rungs together fit in the trial budget
+    trials_per_config = sum(eta ** -rung for rung in range(rungs))
+    n_configs = max(1, int(settings['max_trials'] / (len(families) * trials_per_config)))
+
+    rng = np.random.default_rng(settings['seed'])
+    alive = {name: [sample_params(spaces[name], rng) for _ in range(n_configs)] for name in families}
+    best: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+    # Trials run in waves of at most one per training worker, so the time budget is
+    # checked between waves rather than only once a whole rung has been queued
+    wave_size = max(1, executor.training_processes)
+
+    started = time.perf_counter()
+    launched = 0
+    stopped_by = None
+    logger.info(
+        f"Hyperparameter search {search_id}: {settings['method']}, {n_configs} configs x {len(families)} "
+        f"families, {rungs} rung(s), {settings['cv_folds']}-fold CV ({resumed} trials already checkpointed)"
+    )
+
+    for rung in range(rungs):
+        rows = full_rows if rung == rungs - 1 else max(SEARCH_MIN_ROWS, int(full_rows * eta ** (rung - rungs + 1)))
+        pending = [
+            (name, params, key) for name in families for params in alive[name]
+            if (key := TrialCheckpoint.key(name, params, rows)) not in checkpoint.results
+        ]
+        if launched + len(pending) > settings['max_trials']:
+            pending = pending[:settings['max_trials'] - launched]
+            stopped_by = 'trials'
+
+        for start in range(0, len(pending), wave_size):
+            if time.perf_counter() - started > settings['time_budget']:
+                stopped_by = 'time'
+                break
+            wave = pending[start:start + wave_size]
+            n_threads = threads_per_candidate(len(wave), executor.training_processes)
+            launched += len(wave)
+            tasks = [
+                executor.run_training(run_trial, candidates[name], params, X, y, folds, rows, metric, n_threads)
+                for name, params, _ in wave
+            ]
+            for (name, params, key), outcome in zip(wave, await asyncio.gather(*tasks, return_exceptions=True)):
+                if isinstance(outcome, BaseException):
+                    logger.warning(f"Trial {name} {params} failed: {outcome}")
+                    outcome = {'score': float('-inf'), 'fit_time': 0.0, 'error': str(outcome)}
+                checkpoint.record({'key': key, 'family': name, 'params': params, 'rows': rows, **outcome})
+        report(0.02 + 0.08 * (rung + 1) / rungs, f"hyperparameter search rung {rung + 1}/{rungs}")
+
+        # Rank what finished at this rung; configs never run (budget hit) drop out
+        for name in families:
+            scored = [
+                (checkpoint.results[key]['score'], params) for params in alive[name]
+                if (key := TrialCheckpoint.key(name, params, rows)) in checkpoint.results
+            ]
+            scored.sort(key=lambda item: item[0], reverse=True)
+            # The latest rung with results saw the most rows, so its winner is kept
+            if scored and np.isfinite(scored[0][0]):
+                best[name] = scored[0]
+            keep = max(1, math.ceil(len(scored) / eta)) if rung < rungs - 1 else len(scored)
+            alive[name] = [params for _, params in scored[:keep]]
+        if stopped_by:
+            break
+
+    tuned = {}
+    for name in families:
+        if name in best:
+            params = {**best[name][1], **fixed.get(name, {})}
+            candidates[name].set_params(**params)
+            tuned[name] = params
+
+    summary = {
+        'search_id': search_id,
+        'method': settings['method'],
+        'rungs': rungs,
+        'configs_per_family': n_configs,
+        'trials_run': launched,
+        'trials_resumed': resumed,
+        'seconds': round(time.perf_counter() - started, 3),
+        'stopped_by_budget': stopped_by,
+        'cv_scores': {name: best[name][0] for name in families if name in best},
+        'checkpoint': checkpoint.path
+    }
+    logger.info(f"Hyperparameter search {search_id} finished: {summary}")
+    return {'params': {**fixed, **tuned}, 'search': summary}
@@ -0,0 +1,683 @@
+import copy
+import json
+import os
+import time
+from abc import ABC, abstractmethod
+import numpy as np
+from loguru import logger
+from typing import Any, Callable, Dict, List, Optional
+
+# Largest difference between fused and original outputs accepted at export:
+# absolute, plus relative to the output (XGBoost and LightGBM sum in float32)
+PARITY_TOLERANCE = 1e-6
+PARITY_RTOL = 1e-5
+
+# native: compile every supported ensemble (sklearn, XGBoost, LightGBM) into flat
+# node arrays; estimator: always serve the pickled estimator behind the scaler
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "native").lower()
+
+
+def _scaler_arrays(scaler, n_features: int):
+    """Mean and scale of a fitted StandardScaler (identity when centring/scaling is off)"""
+    mean = getattr(scaler, 'mean_', None)
+    scale = getattr(scaler, 'scale_', None)
+    mean = np.zeros(n_features) if mean is None else np.asarray(mean, dtype=np.float64)
+    scale = np.ones(n_features) if scale is None else np.asarray(scale, dtype=np.float64)
+    return mean, scale
+
+
+def _sigmoid(x: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-x))
+
+
+class FusedModel(ABC):
+    """Compact inference object with the feature scaling folded in.
+
+    ``predict_many`` takes raw (unscaled) feature rows and returns the
+    predicted value for regressors or the positive-class probability for
+    binary classifiers.
+    """
+
+    def __init__(self, task: str, n_features: int, source_model: str):
+        self.task = task
+        self.n_features = n_features
+        self.source_model = source_model
+
+    @abstractmethod
+    def predict_many(self, X: np.ndarray) -> np.ndarray:
+        """Outputs for a 2-D array of raw feature rows"""
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            'artifact': type(self).__name__,
+            'task': self.task,
+            'source_model': self.source_model
+        }
+
+
+class ScaledModel(FusedModel):
+    """Fallback for estimators whose internals cannot be rewritten (XGBoost, LightGBM, ...).
+
+    Scaling is a single vectorized affine step instead of a trip through
+    ``StandardScaler.transform`` and its input validation.
+    """
+
+    def __init__(self, model, scaler, n_features: int):
+        super().__init__(
+            'classifier' if hasattr(model, 'predict_proba') else 'regressor',
+            n_features,
+            type(model).__name__
+        )
+        self.model = model
+        self.mean, self.scale = _scaler_arrays(scaler, n_features)
+
+    def predict_many(self, X: np.ndarray) -> np.ndarray:
+        X_scaled = (np.asarray(X, dtype=np.float64) - self.mean) / self.scale
+        if self.task == 'classifier':
+            return self.model.predict_proba(X_scaled)[:, 1]
+        return self.model.predict(X_scaled)
+
+
+class AffineLinearModel(FusedModel):
+    """Linear or logistic regression with the scaler folded into the coefficients"""
+
+    def __init__(self, model, scaler, n_features: int):
+        task = 'classifier' if hasattr(model, 'predict_proba') else 'regressor'
+        super().__init__(task, n_features, type(model).__name__)
+
+        mean, scale = _scaler_arrays(scaler, n_features)
+        coef = np.asarray(model.coef_, dtype=np.float64).reshape(-1)
+        intercept = float(np.asarray(model.intercept_, dtype=np.float64).reshape(-1)[0])
+
+        # w·((x - m) / s) + b == (w / s)·x + (b - (w / s)·m)
+        self.coef = coef / scale
+        self.intercept = intercept - float(self.coef @ mean)
+
+    def predict_many(self, X: np.ndarray) -> np.ndarray:
+        raw = np.asarray(X, dtype=np.float64) @ self.coef + self.intercept
+        return _sigmoid(raw) if self.task == 'classifier' else raw
+
+
+class FlatTreeEnsemble(FusedModel):
+    """Tree ensemble flattened into contiguous node arrays.
+
+    All trees share one set of arrays (feature, threshold, children, leaf
+    value) with per-tree root offsets. Prediction walks every (row, tree)
+    pair one level per step with vectorized NumPy indexing.
+
+    Scaling stays as one affine step followed by a cast to ``input_dtype``
+    rather than being folded into the thresholds: sklearn and XGBoost route
+    on float32-rounded scaled values (LightGBM on float64), and raw-unit
+    thresholds would send rows that sit exactly on a split down the other
+    branch.
+    """
+
+    def __init__(self, task: str, n_features: int, source_model: str, trees: List[Any],
+                 scaler, aggregate: str, base_score: float = 0.0, learning_rate: float = 1.0,
+                 input_dtype=np.float32, zero_threshold: float = 0.0):
+        super().__init__(task, n_features, source_model)
+        self.mean, self.scale = _scaler_arrays(scaler, n_features)
+        self.input_dtype = input_dtype
+        # Inputs this close to zero are routed as exactly zero (LightGBM does this)
+        self.zero_threshold = zero_threshold
+
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for tree in trees:
+            n_nodes = tree.node_count
+            feature = tree.feature.astype(np.int32)
+            is_leaf = tree.children_left < 0
+
+            node_values = tree.value[:, 0, :]
+            if aggregate == 'mean_proba':
+                totals = node_values.sum(axis=1)
+                leaf_value = node_values[:, 1] / np.where(totals == 0, 1, totals)
+            else:
+                leaf_value = node_values[:, 0]
+
+            features.append(np.where(is_leaf, 0, feature).astype(np.int32))
+            thresholds.append(np.where(is_leaf, 0.0, tree.threshold))
+            lefts.append(np.where(is_leaf, -1, tree.children_left + offset).astype(np.int32))
+            rights.append(np.where(is_leaf, -1, tree.children_right + offset).astype(np.int32))
+            values.append(leaf_value.astype(np.float64))
+            roots.append(offset)
+
+            offset += n_nodes
+            max_depth = max(max_depth, int(tree.max_depth))
+
+        self.feature = np.concatenate(features)
+        self.threshold = np.concatenate(thresholds)
+        self.left = np.concatenate(lefts)
+        self.right = np.concatenate(rights)
+        self.value = np.concatenate(values)
+        self.roots = np.asarray(roots, dtype=np.int32)
+        self.max_depth = max_depth
+        self.aggregate = aggregate
+        self.base_score = float(base_score)
+        self.learning_rate = float(learning_rate)
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    @property
+    def n_nodes(self) -> int:
+        return len(self.value)
+
+    def leaf_values(self, X: np.ndarray, max_depth: Optional[int] = None) -> np.ndarray:
+        """Leaf value reached by every row in every tree, shape (n_rows, n_trees).
+
+        With ``max_depth``, the value of the node reached at that depth, as if
+        every tree were cut there (forests store a value at every node).
+        """
+        X = ((np.asarray(X, dtype=np.float64) - self.mean) / self.scale).astype(self.input_dtype)
+        if self.zero_threshold:
+            X[np.abs(X) <= self.zero_threshold] = 0.0
+        rows = np.arange(X.shape[0])[:, None]
+        node = np.broadcast_to(self.roots, (X.shape[0], self.n_trees)).copy()
+
+        for _ in range(self.max_depth if max_depth is None else min(max_depth, self.max_depth)):
+            left = self.left[node]
+            internal = left >= 0
+            if not internal.any():
+                break
+            go_left = X[rows, self.feature[node]] <= self.threshold[node]
+            node = np.where(internal, np.where(go_left, left, self.right[node]), node)
+
+        return self.value[node]
+
+    def predict_many(self, X: np.ndarray) -> np.ndarray:
+        leaves = self.leaf_values(X)
+        if self.aggregate in ('mean', 'mean_proba'):
+            return leaves.mean(axis=1, dtype=np.float64)
+
+        # Gradient boosting: constant prior plus the shrunk sum of stage outputs
+        raw = self.base_score + self.learning_rate * leaves.sum(axis=1)
+        return _sigmoid(raw) if self.task == 'classifier' else raw
+
+    def node_depths(self) -> np.ndarray:
+        """Depth of every node below its tree's root"""
+        depth = np.zeros(self.n_nodes, dtype=np.int32)
+        level = self.roots
+        for current in range(1, self.max_depth + 1):
+            internal = level[self.left[level] >= 0]
+            level = np.concatenate([self.left[internal], self.right[internal]])
+            depth[level] = current
+        return depth
+
+    def compact(self, n_trees: int, max_depth: int) -> "FlatTreeEnsemble":
+        """Copy keeping the first ``n_trees`` trees cut at ``max_depth``, in compact arrays.
+
+        Only forests can be cut, since only they store a prediction at inner
+        nodes. Nodes are renumbered level by level. Values and thresholds are
+        stored as float32. Each threshold is rounded down to the nearest
+        float32, so float32 inputs take the same branch as before.
+        """
+        if self.aggregate not in ('mean', 'mean_proba'):
+            raise ValueError("Only forests (averaged trees) can be compacted")
+
+        kept = []
+        level = self.roots[:n_trees]
+        for current in range(max_depth + 1):
+            kept.append(level)
+            if current == max_depth:
+                break
+            internal = level[self.left[level] >= 0]
+            level = np.concatenate([self.left[internal], self.right[internal]])
+        old = np.concatenate(kept)
+
+        new_id = np.full(self.n_nodes, -1, dtype=np.int32)
+        new_id[old] = np.arange(len(old), dtype=np.int32)
+        # Children below the cut were not kept, so their parents become leaves
+        left = np.where(self.left[old] >= 0, new_id[np.maximum(self.left[old], 0)], -1).astype(np.int32)
+        right = np.where(left >= 0, new_id[np.maximum(self.right[old], 0)], -1).astype(np.int32)
+        is_leaf = left < 0
+
+        threshold = self.threshold[old].astype(np.float32)
+        threshold = np.where(threshold > self.threshold[old], np.nextafter(threshold, np.float32(-np.inf)), threshold)
+
+        compacted = copy.copy(self)
+        compacted.feature = np.where(is_leaf, 0, self.feature[old]).astype(np.int32)
+        compacted.threshold = np.where(is_leaf, np.float32(0), threshold).astype(np.float32)
+        compacted.left = left
+        compacted.right = right
+        compacted.value = self.value[old].astype(np.float32)
+        compacted.roots = new_id[self.roots[:n_trees]]
+        compacted.max_depth = min(self.max_depth, max_depth)
+        return compacted
+
+    def describe(self) -> Dict[str, Any]:
+        description = super().describe()
+        description.update({
+            'n_trees': self.n_trees,
+            'n_nodes': self.n_nodes,
+            'max_depth': self.max_depth
+        })
+        return description
+
+
+def _flatten_sklearn_ensemble(model, scaler, n_features: int, X_check: np.ndarray) -> Optional[FlatTreeEnsemble]:
+    """Flatten sklearn forests and gradient boosting; None for anything else"""
+    from sklearn.ensemble import (
+        ExtraTreesClassifier, ExtraTreesRegressor, GradientBoostingClassifier,
+        GradientBoostingRegressor, RandomForestClassifier, RandomForestRegressor
+    )
+
+    name = type(model).__name__
+    if isinstance(model, (RandomForestRegressor, ExtraTreesRegressor)):
+        trees = [estimator.tree_ for estimator in model.estimators_]
+        return FlatTreeEnsemble('regressor', n_features, name, trees, scaler, 'mean')
+
+    if isinstance(model, (RandomForestClassifier, ExtraTreesClassifier)):
+        if len(model.classes_) != 2:
+            return None
+        trees = [estimator.tree_ for estimator in model.estimators_]
+        return FlatTreeEnsemble('classifier', n_features, name, trees, scaler, 'mean_proba')
+
+    if isinstance(model, (GradientBoostingRegressor, GradientBoostingClassifier)):
+        if model.estimators_.shape[1] != 1:
+            return None
+        trees = [stage[0].tree_ for stage in model.estimators_]
+        is_classifier = isinstance(model, GradientBoostingClassifier)
+
+        # Recover the constant prior from the public API: raw output minus the tree sum
+        X_scaled = scaler.transform(X_check[:8]) if X_check is not None else np.zeros((1, n_features))
+        raw = model.decision_function(X_scaled) if is_classifier else model.predict(X_scaled)
+        stages = sum(stage[0].predict(X_scaled) for stage in model.estimators_)
+        priors = np.asarray(raw).reshape(-1) - model.learning_rate * stages
+        if np.ptp(priors) > 1e-9:
+            # Non-constant init estimator; cannot be folded into a single offset
+            return None
+
+        return FlatTreeEnsemble(
+            'classifier' if is_classifier else 'regressor', n_features, name, trees, scaler,
+            'boosting', base_score=float(priors[0]), learning_rate=model.learning_rate
+        )
+
+    return None
+
+
+class DistilledModel(FusedModel):
+    """Small student model served in front of its teacher.
+
+    The student answers by default. A gate model predicts how far the
+    student is from the teacher for each row. Rows whose predicted gap
+    exceeds ``threshold`` are answered by the teacher instead, so only
+    unusual inputs pay for the full ensemble. The teacher also stays
+    available for audits through ``predict_teacher``.
+    """
+
+    def __init__(self, student: FusedModel, gate: FusedModel, teacher: FusedModel, threshold: float):
+        super().__init__(teacher.task, teacher.n_features, teacher.source_model)
+        self.student = student
+        self.gate = gate
+        self.teacher = teacher
+        self.threshold = float(threshold)
+
+    def predict_student(self, X: np.ndarray) -> np.ndarray:
+        raw = self.student.predict_many(X)
+        # Classifier students are fitted to the teacher's log-odds
+        return _sigmoid(raw) if self.task == 'classifier' else raw
+
+    def predict_teacher(self, X: np.ndarray) -> np.ndarray:
+        return self.teacher.predict_many(X)
+
+    def routed(self, X: np.ndarray) -> np.ndarray:
+        """Mask of rows the teacher answers"""
+        return self.gate.predict_many(X) > self.threshold
+
+    def predict_many(self, X: np.ndarray) -> np.ndarray:
+        X = np.asarray(X, dtype=np.float64)
+        output = self.predict_student(X)
+        routed = self.routed(X)
+        if routed.any():
+            output[routed] = self.teacher.predict_many(X[routed])
+        return output
+
+    def describe(self) -> Dict[str, Any]:
+        description = super().describe()
+        description.update({
+            'student': self.student.describe(),
+            'teacher': self.teacher.describe(),
+            'gate_threshold': self.threshold
+        })
+        return description
+
+
+class DerivedFeature:
+    """A model input computed from the others, such as BMI from weight and height.
+
+    ``fn`` maps full feature rows to the feature's value and must be a
+    module-level function so the artifact can be pickled. Rows whose value
+    differs from the computed one by more than ``tolerance`` are not
+    answered from a table built with it.
+    """
+
+    def __init__(self, index: int, fn: Callable[[np.ndarray], np.ndarray], tolerance: float):
+        self.index = index
+        self.fn = fn
+        self.tolerance = tolerance
+
+    def fill(self, X: np.ndarray) -> np.ndarray:
+        """Copy of X with the feature set to its computed value"""
+        X = np.array(X, dtype=np.float64)
+        X[:, self.index] = self.fn(X)
+        return X
+
+    def matches(self, X: np.ndarray) -> np.ndarray:
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.abs(X[:, self.index] - self.fn(X)) <= self.tolerance
+
+
+class LookupTableModel(FusedModel):
+    """Outputs of a model precomputed over a grid of its bounded input domain.
+
+    Every feature has an evenly spaced axis of grid points, so a row's cell
+    is found by arithmetic rather than search. Exact features (integer or
+    flag inputs) must land on a grid point. Continuous features are
+    interpolated multilinearly between their neighbouring points, or
+    snapped to the nearest point without interpolation. A ``derived``
+    feature has no axis (its entry in ``axes`` and ``exact`` is None): grid
+    points take its computed value, and rows whose value does not match
+    are off the table. Scoring is a handful of array operations. Rows off
+    the table go to the wrapped model, which also backs ``error_report``.
+    """
+
+    # Rows scored per model call while the table is built
+    BUILD_CHUNK_ROWS = 100_000
+
+    def __init__(self, model: FusedModel, axes: List[Optional[np.ndarray]], exact: List[Optional[bool]],
+                 interpolate: bool = True, derived: Optional[DerivedFeature] = None):
+        super().__init__(model.task, model.n_features, model.source_model)
+        self.model = model
+        self.derived = derived
+        # Features with an axis, in model order
+        self.dims = np.array([dim for dim in range(len(axes)) if derived is None or dim != derived.index])
+        self.axes = [np.asarray(axes[dim], dtype=np.float64) for dim in self.dims]
+        self.exact = np.asarray([exact[dim] for dim in self.dims], dtype=bool)
+        self.interpolate = interpolate
+        self.shape = tuple(len(axis) for axis in self.axes)
+        self.start = np.array([axis[0] for axis in self.axes])
+        self.step = np.array([axis[1] - axis[0] if len(axis) > 1 else 1.0 for axis in self.axes])
+        for axis, step in zip(self.axes, self.step):
+            if step <= 0 or not np.allclose(np.diff(axis), step):
+                raise ValueError("Lookup table axes must be increasing and evenly spaced")
+        self.last = np.array(self.shape) - 1
+        self.strides = np.array([int(np.prod(self.shape[dim + 1:])) for dim in range(len(self.shape))])
+
+        # Flat-index offset and per-feature upper/lower choice of every corner of a cell
+        self.continuous = np.flatnonzero(~self.exact & (self.last > 0))
+        self.corners = (np.arange(2 ** len(self.continuous))[:, None] >> np.arange(len(self.continuous))) & 1
+        self.corner_offsets = self.corners @ self.strides[self.continuous]
+
+        started = time.perf_counter()
+        grid = np.indices(self.shape).reshape(len(self.shape), -1).T
+        values = np.empty(len(grid), dtype=np.float32)
+        for start in range(0, len(grid), self.BUILD_CHUNK_ROWS):
+            rows = self.grid_rows(grid[start:start + self.BUILD_CHUNK_ROWS])
+            values[start:start + len(rows)] = model.predict_many(rows)
+        self.table = values
+        self.build_seconds = round(time.perf_counter() - started, 3)
+
+    def grid_rows(self, indices: np.ndarray) -> np.ndarray:
+        """Full feature rows of the given grid points (one row of axis indices each)"""
+        rows = np.zeros((len(indices), self.n_features))
+        rows[:, self.dims] = self.start + indices * self.step
+        return self.derived.fill(rows) if self.derived is not None else rows
+
+    def _position(self, X: np.ndarray):
+        """Fractional grid position of every row and whether the row lies on the table"""
+        position = (X[:, self.dims] - self.start) / self.step
+        snapped = np.round(position)
+        inside = ((position >= 0) & (position <= self.last)).all(axis=1)
+        inside &= (np.abs(position - snapped)[:, self.exact] < 1e-9).all(axis=1)
+        if self.derived is not None:
+            inside &= self.derived.matches(X)
+        return np.where(self.exact, snapped, position), inside
+
+    def _lookup(self, position: np.ndarray) -> np.ndarray:
+        if not self.interpolate or not len(self.continuous):
+            return self.table[np.round(position).astype(np.int64) @ self.strides].astype(np.float64)
+        # A continuous feature at the top of its axis sits in the last cell with weight 1
+        upper_cell = np.where(self.exact, self.last, np.maximum(self.last - 1, 0))
+        lower = np.minimum(np.floor(position), upper_cell).astype(np.int64)
+        weight = (position - lower)[:, self.continuous]
+        corner_weights = np.where(self.corners[None], weight[:, None], 1.0 - weight[:, None]).prod(axis=2)
+        values = self.table[(lower @ self.strides)[:, None] + self.corner_offsets]
+        return (corner_weights * values).sum(axis=1)
+
+    def predict_many(self, X: np.ndarray) -> np.ndarray:
+        X = np.asarray(X, dtype=np.float64)
+        position, inside = self._position(X)
+        if inside.all():
+            return self._lookup(position)
+        output = np.empty(len(X))
+        output[inside] = self._lookup(position[inside])
+        output[~inside] = self.model.predict_many(X[~inside])
+        return output
+
+    def error_report(self, X: np.ndarray) -> Dict[str, Any]:
+        """Absolute difference between table and live model on the rows on the table"""
+        X = np.asarray(X, dtype=np.float64)
+        position, inside = self._position(X)
+        error = np.abs(self._lookup(position[inside]) - self.model.predict_many(X[inside])) if inside.any() else np.zeros(1)
+        return {
+            'rows': int(inside.sum()),
+            'outside_grid': int((~inside).sum()),
+            'mean_abs_error': float(error.mean()),
+            'p99_abs_error': float(np.percentile(error, 99)),
+            'max_abs_error': float(error.max())
+        }
+
+    def describe(self) -> Dict[str, Any]:
+        description = super().describe()
+        description.update({
+            'grid_shape': list(self.shape),
+            'grid_points': int(self.table.size),
+            'interpolate': self.interpolate,
+            'derived_feature': int(self.derived.index) if self.derived is not None else None,
+            'model': self.model.describe()
+        })
+        return description
+
+
+class _TreeArrays:
+    """Node arrays of a non-sklearn tree, laid out like sklearn's ``tree_``"""
+
+    def __init__(self, feature, threshold, children_left, children_right, leaf_value):
+        self.feature = np.asarray(feature, dtype=np.int64)
+        self.threshold = np.asarray(threshold, dtype=np.float64)
+        self.children_left = np.asarray(children_left, dtype=np.int64)
+        self.children_right = np.asarray(children_right, dtype=np.int64)
+        self.value = np.asarray(leaf_value, dtype=np.float64).reshape(-1, 1, 1)
+        self.node_count = len(self.feature)
+
+        depth = np.zeros(self.node_count, dtype=np.int64)
+        for node in range(self.node_count):
+            for child in (self.children_left[node], self.children_right[node]):
+                if child >= 0:
+                    depth[child] = depth[node] + 1
+        self.max_depth = int(depth.max()) if self.node_count else 0
+
+
+def _boosting_prior(flat: FlatTreeEnsemble, margin: np.ndarray, X_raw: np.ndarray) -> Optional[float]:
+    """Constant offset between the model's raw margin and the flattened tree sum"""
+    margin = np.asarray(margin, dtype=np.float64).reshape(-1)
+    priors = margin - flat.leaf_values(X_raw).sum(axis=1)
+    if np.ptp(priors) > PARITY_TOLERANCE + PARITY_RTOL * max(1.0, float(np.abs(margin).max())):
+        return None
+    return float(np.mean(priors))
+
+
+def _flatten_xgboost(model, scaler, n_features: int, X_check: np.ndarray) -> Optional[FlatTreeEnsemble]:
+    """Flatten a gbtree XGBRegressor / binary XGBClassifier; None for anything else"""
+    if not type(model).__module__.startswith('xgboost'):
+        return None
+    import xgboost as xgb
+
+    if not isinstance(model, (xgb.XGBRegressor, xgb.XGBClassifier)):
+        return None
+    booster = model.get_booster()
+    config = json.loads(booster.save_raw('json'))['learner']
+    objective = config['objective']['name']
+    if config['gradient_booster']['name'] != 'gbtree':
+        return None
+    if objective == 'binary:logistic':
+        task = 'classifier'
+    elif objective == 'reg:squarederror':
+        task = 'regressor'
+    else:
+        return None
+
+    trees = []
+    for tree in config['gradient_booster']['model']['trees']:
+        if any(tree['split_type']):
+            # Categorical splits
+            return None
+        left = np.asarray(tree['left_children'])
+        is_leaf = left < 0
+        # Split and leaf values are float32; XGBoost sends x < t left, i.e. x <= the float32 just below t
+        conditions = np.asarray(tree['split_conditions'], dtype=np.float32)
+        thresholds = np.nextafter(conditions, np.float32(-np.inf))
+        trees.append(_TreeArrays(
+            tree['split_indices'], thresholds, left, tree['right_children'],
+            np.where(is_leaf, conditions, 0.0)
+        ))
+
+    flat = FlatTreeEnsemble(task, n_features, type(model).__name__, trees, scaler, 'boosting')
+    X_raw = X_check[:8] if X_check is not None else np.zeros((1, n_features))
+    prior = _boosting_prior(flat, model.predict(scaler.transform(X_raw), output_margin=True), X_raw)
+    if prior is None:
+        return None
+    flat.base_score = prior
+    return flat
+
+
+# LightGBM's kZeroThreshold (the float 1e-35f)
+LIGHTGBM_ZERO_THRESHOLD = float(np.float32(1e-35))
+
+
+def _flatten_lightgbm(model, scaler, n_features: int, X_check: np.ndarray) -> Optional[FlatTreeEnsemble]:
+    """Flatten a numeric-split LGBMRegressor / binary LGBMClassifier; None for anything else"""
+    if not type(model).__module__.startswith('lightgbm'):
+        return None
+    import lightgbm as lgb
+
+    if not isinstance(model, (lgb.LGBMRegressor, lgb.LGBMClassifier)):
+        return None
+    dump = model.booster_.dump_model()
+    objective = dump['objective'].split()[0]
+    if objective == 'binary' and isinstance(model, lgb.LGBMClassifier) and 'sigmoid:1' in dump['objective']:
+        task = 'classifier'
+    elif objective == 'regression' and isinstance(model, lgb.LGBMRegressor):
+        task = 'regressor'
+    else:
+        return None
+
+    trees = []
+    for info in dump['tree_info']:
+        feature, threshold, left, right, value = [], [], [], [], []
+        stack = [(info['tree_structure'], None, None)]
+        while stack:
+            node, parent, side = stack.pop()
+            index = len(feature)
+            if parent is not None:
+                (left if side == 'left' else right)[parent] = index
+            if 'leaf_value' in node:
+                feature.append(0)
+                threshold.append(0.0)
+                left.append(-1)
+                right.append(-1)
+                value.append(node['leaf_value'])
+                continue
+            if node['decision_type'] != '<=' or node['missing_type'] == 'Zero':
+                # Categorical splits, or zeros routed as missing
+                return None
+            feature.append(node['split_feature'])
+            threshold.append(node['threshold'])
+            left.append(-1)
+            right.append(-1)
+            value.append(0.0)
+            stack.append((node['right_child'], index, 'right'))
+            stack.append((node['left_child'], index, 'left'))
+        trees.append(_TreeArrays(feature, threshold, left, right, value))
+
+    # LightGBM compares float64 inputs against float64 thresholds, reading |x| <= 1e-35f as 0
+    flat = FlatTreeEnsemble(task, n_features, type(model).__name__, trees, scaler, 'boosting',
+                            input_dtype=np.float64, zero_threshold=LIGHTGBM_ZERO_THRESHOLD)
+    X_raw = X_check[:8] if X_check is not None else np.zeros((1, n_features))
+    prior = _boosting_prior(flat, model.predict(scaler.transform(X_raw), raw_score=True), X_raw)
+    if prior is None:
+        return None
+    flat.base_score = prior
+    return flat
+
+
+# Compilers tried in turn by the native backend; each returns None for models it does not handle
+NATIVE_COMPILERS = [_flatten_sklearn_ensemble, _flatten_xgboost, _flatten_lightgbm]
+
+
+def _reference_output(model, scaler, X: np.ndarray) -> np.ndarray:
+    X_scaled = scaler.transform(X)
+    if hasattr(model, 'predict_proba'):
+        return model.predict_proba(X_scaled)[:, 1]
+    return model.predict(X_scaled)
+
+
+def compile_fused_model(model, scaler, X_check: Optional[np.ndarray] = None,
+                        backend: Optional[str] = None) -> FusedModel:
+    """Compile a fitted model and its scaler into one fused inference object.
+
+    ``X_check`` holds raw feature rows used to verify that the fused object
+    reproduces ``model.predict(scaler.transform(X))``; if it does not, the
+    plain ScaledModel wrapper is returned instead. The rows are required
+    when a tree ensemble is compiled, since its outputs are rebuilt from
+    the library's internals. ``backend`` (default INFERENCE_BACKEND)
+    selects native compilation or the plain wrapper.
+    """
+    n_features = int(getattr(model, 'n_features_in_', len(getattr(scaler, 'mean_', []))))
+    backend = (backend or INFERENCE_BACKEND).lower()
+    if backend not in ('native', 'estimator'):
+        raise ValueError(f"Unknown inference backend: {backend}")
+    fused: Optional[FusedModel] = None
+    if X_check is not None and not len(X_check):
+        X_check = None
+
+    if backend == 'native':
+        try:
+            from sklearn.linear_model import LinearRegression, LogisticRegression
+
+            if isinstance(model, LinearRegression) or (
+                isinstance(model, LogisticRegression) and len(model.classes_) == 2
+            ):
+                fused = AffineLinearModel(model, scaler, n_features)
+            else:
+                for compiler in NATIVE_COMPILERS:
+                    fused = compiler(model, scaler, n_features, X_check)
+                    if fused is not None:
+                        break
+        except Exception as e:
+            logger.warning(f"Could not fuse {type(model).__name__}: {e}")
+            fused = None
+
+    if isinstance(fused, FlatTreeEnsemble) and X_check is None:
+        raise ValueError(f"Compiling {type(model).__name__} to flat trees needs X_check rows for the parity check")
+
+    if fused is not None and X_check is not None:
+        X_check = np.asarray(X_check, dtype=np.float64)
+        reference = _reference_output(model, scaler, X_check)
+        difference = np.abs(fused.predict_many(X_check) - reference)
+        error = float(np.max(difference))
+        if float(np.max(difference - PARITY_RTOL * np.abs(reference))) > PARITY_TOLERANCE:
+            logger.warning(
+                f"Fused {type(model).__name__} differs from the original by {error:.2e}; "
+                f"falling back to the scaled estimator"
+            )
+            fused = None
+        else:
+            logger.info(f"Fused {type(model).__name__} matches the original (max error {error:.2e})")
+
+    if fused is None:
+        fused = ScaledModel(model, scaler, n_features)
+    return fused
@@ -0,0 +1,70 @@
+import numpy as np
+from loguru import logger
+from typing import Any, Dict, List, Optional, Tuple
+
+from models.inference import DerivedFeature, FusedModel, LookupTableModel
+from models.training import measure_artifact
+
+# Random in-domain rows checked against the live model; they fall between grid
+# points, where interpolation error is largest
+ERROR_SAMPLE_ROWS = 20000
+
+
+def sample_domain(axes: List[Optional[np.ndarray]], exact: List[Optional[bool]], n_rows: int, seed: int = 42,
+                  derived: Optional[DerivedFeature] = None) -> np.ndarray:
+    """Uniform rows over a grid's domain: exact features take grid values, others any value in range"""
+    rng = np.random.default_rng(seed)
+    columns = [
+        np.zeros(n_rows) if axis is None else
+        rng.choice(axis, n_rows) if is_exact else rng.uniform(axis[0], axis[-1], n_rows)
+        for axis, is_exact in zip(axes, exact)
+    ]
+    rows = np.column_stack(columns).astype(np.float64)
+    return derived.fill(rows) if derived is not None else rows
+
+
+def tabulate_model(fused: FusedModel, axes: List[Optional[np.ndarray]], exact: List[Optional[bool]],
+                   interpolate: bool, X_check: np.ndarray, tolerance: float,
+                   derived: Optional[DerivedFeature] = None) -> Tuple[FusedModel, Dict[str, Any]]:
+    """Precompute a served model over a grid of its input domain (blocking).
+
+    The report compares table and live model on the validation rows inside
+    the grid and on random rows across the whole domain, and measures both
+    artifacts the way candidate models are measured. With a ``derived``
+    feature, validation rows take its computed value, so they are checked
+    as the requests the table will answer. The table is returned only if
+    its largest absolute error on the validation rows is within
+    ``tolerance``; otherwise the live model is returned unchanged. Rows are
+    raw (unscaled) features in model order.
+    """
+    table = LookupTableModel(fused, axes, exact, interpolate, derived)
+    X_check = np.asarray(X_check, dtype=np.float64)
+    if derived is not None:
+        X_check = derived.fill(X_check)
+    validation_error = table.error_report(X_check)
+    # A table no validation row falls inside has not been checked at all
+    accepted = validation_error['rows'] > 0 and validation_error['max_abs_error'] <= tolerance
+    live_cost, table_cost = measure_artifact(fused, X_check), measure_artifact(table, X_check)
+
+    report = {
+        'accepted': bool(accepted),
+        'tolerance': tolerance,
+        'grid_shape': list(table.shape),
+        'grid_points': int(table.table.size),
+        'table_mb': round(table.table.nbytes / 2 ** 20, 2),
+        'build_seconds': table.build_seconds,
+        'interpolate': interpolate,
+        'validation_error': validation_error,
+        'domain_error': table.error_report(sample_domain(axes, exact, ERROR_SAMPLE_ROWS, derived=derived)),
+        'live_cost': live_cost,
+        'table_cost': table_cost
+    }
+    logger.info(
+        f"Tabulated {fused.source_model} over {report['grid_points']} grid points "
+        f"({report['table_mb']} MB in {table.build_seconds} s): max abs error "
+        f"{validation_error['max_abs_error']:.4f} on validation rows (tolerance {tolerance}), "
+        f"{report['domain_error']['max_abs_error']:.4f} across the domain, "
+        f"p99 {table_cost['p99_ms']} ms vs {live_cost['p99_ms']} ms live "
+        f"({'serving table' if accepted else 'keeping live model'})"
+    )
+    return (table if accepted else fused), report
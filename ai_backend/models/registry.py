@@ -0,0 +1,260 @@
+import json
+import os
+import shutil
+import time
+import uuid
+from datetime import datetime
+import joblib
+from loguru import logger
+from typing import Any, Dict, List, Optional
+
+# Memory-map the NumPy arrays of inference artifacts instead of copying them
+# into each process; workers on one host then share a single page-cache copy
+MODEL_MMAP = os.getenv("MODEL_MMAP", "true").lower() == "true"
+
+
+class ModelBundle:
+    """Everything needed to serve one model version, stored and swapped as a unit"""
+
+    def __init__(self, model, scaler, feature_names: List[str], metrics: Optional[Dict[str, Any]] = None,
+                 version: Optional[str] = None, created_at: Optional[str] = None, fused=None):
+        self.model = model
+        self.scaler = scaler
+        self.feature_names = list(feature_names)
+        self.metrics = metrics or {}
+        self.version = version
+        self.created_at = created_at or datetime.now().isoformat()
+        self.fused = fused
+
+    @property
+    def inference_model(self):
+        """Fused object used to serve predictions (built on the fly for bundles without one)"""
+        if self.fused is None and self.model is not None:
+            from models.inference import ScaledModel
+            self.fused = ScaledModel(self.model, self.scaler, len(self.feature_names))
+        return self.fused
+
+    def metadata(self) -> Dict[str, Any]:
+        return {
+            'version': self.version,
+            'created_at': self.created_at,
+            'model_class': type(self.model).__name__,
+            'feature_names': self.feature_names,
+            'metrics': self.metrics,
+            'inference': self.fused.describe() if self.fused is not None else None
+        }
+
+    @classmethod
+    def from_metadata(cls, metadata: Dict[str, Any], fused) -> "ModelBundle":
+        """Serving-only bundle: the fused artifact plus metadata, without the raw estimator"""
+        return cls(
+            None,
+            None,
+            metadata.get('feature_names', []),
+            metrics=metadata.get('metrics'),
+            version=metadata.get('version'),
+            created_at=metadata.get('created_at'),
+            fused=fused
+        )
+
+
+class ModelRegistry:
+    """Versioned model bundles on disk with an atomically swapped CURRENT pointer.
+
+    Layout under ``<root>/<name>/``::
+
+        versions/<version>/bundle.joblib     model + scaler + features + metrics
+        versions/<version>/inference.joblib  fused inference object served by default
+        versions/<version>/metadata.json     human-readable copy of the metadata
+        CURRENT                              version currently being served
+        history.json                         promotion history, used for rollback
+    """
+
+    BUNDLE_FILE = "bundle.joblib"
+    INFERENCE_FILE = "inference.joblib"
+    METADATA_FILE = "metadata.json"
+
+    def __init__(self, name: str, root: str = "models/saved", mmap: bool = MODEL_MMAP):
+        self.name = name
+        self.root = os.path.join(root, name)
+        self.versions_dir = os.path.join(self.root, "versions")
+        self.pointer_path = os.path.join(self.root, "CURRENT")
+        self.history_path = os.path.join(self.root, "history.json")
+        self.mmap = mmap
+        # Seconds spent on each artifact by the most recent load
+        self.last_load: Dict[str, Any] = {}
+
+    @staticmethod
+    def new_version() -> str:
+        return f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+
+    def version_dir(self, version: str) -> str:
+        return os.path.join(self.versions_dir, version)
+
+    def has_version(self, version: str) -> bool:
+        return os.path.exists(os.path.join(self.version_dir(version), self.BUNDLE_FILE))
+
+    def save(self, bundle: ModelBundle) -> str:
+        """Write a bundle as a new version; it is not served until promoted"""
+        if bundle.version is None:
+            bundle.version = self.new_version()
+        if self.has_version(bundle.version):
+            raise ValueError(f"{self.name} version {bundle.version} already exists")
+
+        # Write into a scratch directory and rename it into place so readers
+        # never see a half-written version
+        os.makedirs(self.versions_dir, exist_ok=True)
+        staging_dir = os.path.join(self.versions_dir, f".staging-{bundle.version}")
+        os.makedirs(staging_dir, exist_ok=True)
+        try:
+            # The fused object goes in its own file so serving never unpickles the raw estimator
+            fused, bundle.fused = bundle.fused, None
+            try:
+                joblib.dump(bundle, os.path.join(staging_dir, self.BUNDLE_FILE))
+            finally:
+                bundle.fused = fused
+            if fused is not None:
+                # Uncompressed so the arrays can be memory-mapped on load
+                joblib.dump(fused, os.path.join(staging_dir, self.INFERENCE_FILE), compress=0)
+            with open(os.path.join(staging_dir, self.METADATA_FILE), 'w') as f:
+                json.dump(bundle.metadata(), f, indent=2, default=str)
+            os.replace(staging_dir, self.version_dir(bundle.version))
+        except Exception:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            raise
+
+        logger.info(f"Saved {self.name} model version {bundle.version}")
+        return bundle.version
+
+    def load(self, version: Optional[str] = None) -> ModelBundle:
+        """Load a version (the current one by default)"""
+        version = version or self.current_version()
+        if version is None:
+            raise FileNotFoundError(f"No {self.name} model has been promoted yet")
+        if not self.has_version(version):
+            raise FileNotFoundError(f"{self.name} version {version} not found")
+
+        timings: Dict[str, float] = {}
+        # sklearn copies tree nodes out of the arrays it is unpickled from, so
+        # the raw estimator gains nothing from memory mapping
+        bundle = self._timed_load(version, self.BUNDLE_FILE, timings, mmap=False)
+        bundle.version = version
+
+        if os.path.exists(os.path.join(self.version_dir(version), self.INFERENCE_FILE)):
+            bundle.fused = self._timed_load(version, self.INFERENCE_FILE, timings, mmap=self.mmap)
+        self._record_load(version, timings)
+        return bundle
+
+    def load_serving(self, version: Optional[str] = None) -> ModelBundle:
+        """Load only what serving needs: the fused artifact and metadata.
+
+        Falls back to the full bundle for versions saved without a fused artifact.
+        """
+        version = version or self.current_version()
+        if version is None:
+            raise FileNotFoundError(f"No {self.name} model has been promoted yet")
+
+        version_dir = self.version_dir(version)
+        inference_path = os.path.join(version_dir, self.INFERENCE_FILE)
+        if not os.path.exists(inference_path):
+            return self.load(version)
+
+        timings: Dict[str, float] = {}
+        started = time.perf_counter()
+        with open(os.path.join(version_dir, self.METADATA_FILE)) as f:
+            metadata = json.load(f)
+        timings[self.METADATA_FILE] = time.perf_counter() - started
+
+        fused = self._timed_load(version, self.INFERENCE_FILE, timings, mmap=self.mmap)
+        bundle = ModelBundle.from_metadata(metadata, fused)
+        bundle.version = version
+        self._record_load(version, timings)
+        return bundle
+
+    def _timed_load(self, version: str, filename: str, timings: Dict[str, float], mmap: bool):
+        started = time.perf_counter()
+        obj = joblib.load(os.path.join(self.version_dir(version), filename), mmap_mode='r' if mmap else None)
+        timings[filename] = time.perf_counter() - started
+        return obj
+
+    def _record_load(self, version: str, timings: Dict[str, float]):
+        self.last_load = {
+            'version': version,
+            'mmap': self.mmap,
+            'artifacts': {filename: round(seconds * 1000, 2) for filename, seconds in timings.items()},
+            'total_ms': round(sum(timings.values()) * 1000, 2)
+        }
+        artifacts = ', '.join(f"{filename} {ms}ms" for filename, ms in self.last_load['artifacts'].items())
+        logger.info(f"Loaded {self.name} version {version} ({artifacts}{', mmap' if self.mmap else ''})")
+
+    def current_version(self) -> Optional[str]:
+        try:
+            with open(self.pointer_path) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def _write_atomic(self, path: str, content: str):
+        temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(temp_path, 'w') as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+
+    def _read_history(self) -> List[str]:
+        try:
+            with open(self.history_path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return []
+
+    def promote(self, version: str) -> str:
+        """Point CURRENT at a saved version"""
+        if not self.has_version(version):
+            raise FileNotFoundError(f"{self.name} version {version} not found")
+
+        history = self._read_history()
+        if not history or history[-1] != version:
+            history.append(version)
+        self._write_atomic(self.history_path, json.dumps(history, indent=2))
+        self._write_atomic(self.pointer_path, version)
+
+        logger.info(f"Promoted {self.name} model version {version}")
+        return version
+
+    def rollback(self) -> str:
+        """Return to the version promoted before the current one"""
+        history = self._read_history()
+        current = self.current_version()
+        while history and history[-1] == current:
+            history.pop()
+        while history and not self.has_version(history[-1]):
+            history.pop()
+        if not history:
+            raise ValueError(f"No earlier {self.name} version to roll back to")
+
+        previous = history[-1]
+        self._write_atomic(self.history_path, json.dumps(history, indent=2))
+        self._write_atomic(self.pointer_path, previous)
+
+        logger.info(f"Rolled {self.name} model back from {current} to {previous}")
+        return previous
+
+    def list_versions(self) -> List[Dict[str, Any]]:
+        """Metadata of every saved version, newest first"""
+        if not os.path.exists(self.versions_dir):
+            return []
+
+        current = self.current_version()
+        versions = []
+        for version in os.listdir(self.versions_dir):
+            metadata_path = os.path.join(self.version_dir(version), self.METADATA_FILE)
+            if version.startswith('.') or not os.path.exists(metadata_path):
+                continue
+            with open(metadata_path) as f:
+                metadata = json.load(f)
+            metadata['current'] = version == current
+            versions.append(metadata)
+
+        return sorted(versions, key=lambda metadata: metadata.get('created_at', ''), reverse=True)
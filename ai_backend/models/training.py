@@ -0,0 +1,527 @@
+import asyncio
+import copy
+import math
+import multiprocessing
+import os
+import threading
+import time
+import numpy as np
+from loguru import logger
+from typing import Any, Callable, Dict, List, Optional
+
+from utils.model_executor import ModelExecutor
+
+# Fractions of the full ensemble at which a staged fit checks its validation score
+ABANDON_CHECKPOINTS = (0.25, 0.5, 1.0)
+
+# XGBoost leaves n_estimators unset and boosts this many rounds by default
+DEFAULT_BOOSTING_ROUNDS = 100
+
+# Share of newly ingested rows held out to validate an incremental update; as
+# many earlier rows join the holdout so forgetting old data is caught too
+INCREMENTAL_HOLDOUT_FRACTION = 0.2
+# Fewest new rows worth an incremental update; smaller uploads go to a full refit
+INCREMENTAL_MIN_NEW_ROWS = 10
+
+# Serving-cost probe: timed single-row calls, and repeats of one batch of BATCH_ROWS
+LATENCY_SINGLE_CALLS = 200
+LATENCY_BATCH_ROWS = 256
+LATENCY_BATCH_CALLS = 20
+
+# Validation rows used to choose how far a served forest can be cut back
+COMPACTION_MAX_ROWS = 5000
+
+
+class _LocalBest:
+    """Stand-in for a Manager Value when candidates run in this process"""
+
+    def __init__(self, value: float):
+        self.value = value
+
+
+def score_model(model, X: np.ndarray, y: np.ndarray, metric: str) -> float:
+    """Validation score used for model selection"""
+    return score_predictions(y, model.predict(X), metric)
+
+
+def score_predictions(y: np.ndarray, y_pred: np.ndarray, metric: str) -> float:
+    from sklearn.metrics import r2_score, roc_auc_score
+
+    if metric == 'r2':
+        return float(r2_score(y, y_pred))
+    if metric == 'roc_auc':
+        return float(roc_auc_score(y, y_pred))
+    raise ValueError(f"Unknown metric: {metric}")
+
+
+def threads_per_candidate(n_candidates: int, n_workers: int) -> int:
+    """Split the machine's cores between concurrently fitting candidates"""
+    concurrent = max(1, min(n_candidates, n_workers))
+    return max(1, (os.cpu_count() or 1) // concurrent)
+
+
+def _set_thread_count(estimator, n_threads: int):
+    """Pin the estimator's own thread pool so parallel workers don't oversubscribe cores"""
+    params = estimator.get_params()
+    if type(estimator).__module__.startswith('sklearn.linear_model'):
+        # Linear models here are single-threaded solvers; n_jobs is deprecated for them
+        return
+    if 'n_jobs' in params:
+        estimator.set_params(n_jobs=n_threads)
+    elif 'nthread' in params:
+        estimator.set_params(nthread=n_threads)
+
+
+def _stage_fit(estimator, n_estimators: int, X: np.ndarray, y: np.ndarray):
+    """Grow an ensemble to n_estimators, reusing the members fitted so far"""
+    module = type(estimator).__module__
+    fitted = hasattr(estimator, 'n_features_in_')
+
+    if module.startswith('xgboost'):
+        grown = estimator.get_booster().num_boosted_rounds() if fitted else 0
+        estimator.set_params(n_estimators=n_estimators - grown)
+        estimator.fit(X, y, xgb_model=estimator.get_booster() if fitted else None)
+    elif module.startswith('lightgbm'):
+        grown = estimator.booster_.current_iteration() if fitted else 0
+        estimator.set_params(n_estimators=n_estimators - grown)
+        estimator.fit(X, y, init_model=estimator.booster_ if fitted else None)
+    else:
+        # sklearn ensembles keep their fitted members when warm_start is on
+        estimator.set_params(warm_start=True, n_estimators=n_estimators)
+        estimator.fit(X, y)
+
+
+def supports_staged_fit(estimator) -> bool:
+    module = type(estimator).__module__
+    params = estimator.get_params()
+    if module.startswith(('xgboost', 'lightgbm')):
+        return True
+    return 'warm_start' in params and 'n_estimators' in params
+
+
+def ensemble_size(estimator) -> int:
+    """Trees or boosting rounds a fitted ensemble holds"""
+    module = type(estimator).__module__
+    if module.startswith('xgboost'):
+        return estimator.get_booster().num_boosted_rounds()
+    if module.startswith('lightgbm'):
+        return estimator.booster_.current_iteration()
+    return len(estimator.estimators_)
+
+
+def supports_incremental_update(estimator) -> bool:
+    """Whether a fitted model can keep learning from new rows without a refit"""
+    return supports_staged_fit(estimator) or hasattr(estimator, 'partial_fit')
+
+
+def update_model(estimator, X: np.ndarray, y: np.ndarray, extra_estimators: int):
+    """Continue training a fitted model on new rows only.
+
+    Boosters get ``extra_estimators`` more rounds fitted to the new rows,
+    sklearn ensembles that many more members through warm_start, and
+    models with ``partial_fit`` one more pass.
+    """
+    if not supports_staged_fit(estimator):
+        estimator.partial_fit(X, y)
+        return
+
+    total = ensemble_size(estimator) + extra_estimators
+    _stage_fit(estimator, total, X, y)
+    estimator.set_params(n_estimators=total)
+
+
+def incremental_data_problem(y_new: np.ndarray, classifier: bool) -> Optional[str]:
+    """Why new rows cannot be split into an update and a holdout, or None if they can"""
+    if len(y_new) < INCREMENTAL_MIN_NEW_ROWS:
+        return f"only {len(y_new)} new rows, at least {INCREMENTAL_MIN_NEW_ROWS} are needed"
+    if classifier:
+        classes, counts = np.unique(y_new, return_counts=True)
+        if len(classes) < 2:
+            return f"every new row has class {classes[0]}"
+        if counts.min() < 2:
+            return f"class {classes[np.argmin(counts)]} has a single new row"
+    return None
+
+
+def incremental_update(model, scaler, X_new: np.ndarray, y_new: np.ndarray, X_old: np.ndarray,
+                       y_old: np.ndarray, metric: str, extra_estimators: int,
+                       tolerance: float) -> Dict[str, Any]:
+    """Update a copy of a production model with new rows and validate it on a holdout.
+
+    Takes raw (unscaled) features; the production scaler is kept so the
+    updated model sees inputs on the same scale it was trained on. The
+    holdout mixes unseen new rows with an equal number of earlier rows, and
+    the update is accepted when it scores no more than ``tolerance`` below
+    the production model there. Classifier rows are split by class, so both
+    the update and the holdout see every class. Returns ``{'fallback':
+    reason}`` when the new rows are too few or (for a classifier) lack a
+    class, since the model then needs a full refit instead.
+    """
+    from sklearn.model_selection import train_test_split
+
+    classifier = hasattr(model, 'predict_proba')
+    problem = incremental_data_problem(y_new, classifier)
+    if problem is not None:
+        return {'fallback': problem}
+
+    X_fit, X_holdout, y_fit, y_holdout = train_test_split(
+        X_new, y_new, test_size=INCREMENTAL_HOLDOUT_FRACTION, random_state=42,
+        stratify=y_new if classifier else None
+    )
+    earlier = np.random.default_rng(42).choice(len(y_old), size=min(len(y_old), len(y_holdout)), replace=False)
+    X_holdout = np.vstack([X_holdout, X_old[earlier]])
+    y_holdout = np.concatenate([y_holdout, y_old[earlier]])
+    X_holdout_scaled = scaler.transform(X_holdout)
+
+    started = time.perf_counter()
+    updated = copy.deepcopy(model)
+    update_model(updated, scaler.transform(X_fit), y_fit, extra_estimators)
+    fit_time = round(time.perf_counter() - started, 3)
+
+    base_score = score_model(model, X_holdout_scaled, y_holdout, metric)
+    score = score_model(updated, X_holdout_scaled, y_holdout, metric)
+    accepted = score >= base_score - tolerance
+    logger.info(
+        f"Incremental {type(model).__name__} update on {len(y_fit)} rows: {metric}={score:.4f} "
+        f"vs {base_score:.4f} in production ({len(y_holdout)} holdout rows, "
+        f"{'accepted' if accepted else 'rejected'}, {fit_time}s)"
+    )
+
+    return {
+        'model': updated,
+        'score': score,
+        'base_score': base_score,
+        'accepted': accepted,
+        'fit_time': fit_time,
+        'new_rows': len(y_fit),
+        'holdout_rows': len(y_holdout),
+        'X_holdout': X_holdout
+    }
+
+
+def fit_candidate(name: str, estimator, X_train: np.ndarray, y_train: np.ndarray,
+                  X_val: np.ndarray, y_val: np.ndarray, metric: str, n_threads: int = 1,
+                  best_score=None, abandon_margin: Optional[float] = None,
+                  best_score_lock=None) -> Dict[str, Any]:
+    """Fit one candidate model inside a training worker.
+
+    With ``abandon_margin`` set and a shared ``best_score`` holder, ensembles
+    are grown in stages (see ABANDON_CHECKPOINTS); a candidate whose partial
+    validation score plus the margin is still below the best finished score
+    is abandoned instead of being grown to full size. ``best_score_lock``
+    guards the holder's compare-and-set against concurrent workers.
+    """
+    from threadpoolctl import threadpool_limits
+
+    started = time.perf_counter()
+    _set_thread_count(estimator, n_threads)
+
+    with threadpool_limits(limits=n_threads):
+        staged = (
+            abandon_margin is not None and best_score is not None and supports_staged_fit(estimator)
+        )
+        if not staged:
+            estimator.fit(X_train, y_train)
+            score = score_model(estimator, X_val, y_val, metric)
+        else:
+            total = estimator.get_params()['n_estimators'] or DEFAULT_BOOSTING_ROUNDS
+            for fraction in ABANDON_CHECKPOINTS:
+                _stage_fit(estimator, max(1, math.ceil(total * fraction)), X_train, y_train)
+                score = score_model(estimator, X_val, y_val, metric)
+
+                if fraction < 1.0 and score + abandon_margin < best_score.value:
+                    logger.info(
+                        f"Abandoning {name} at {fraction:.0%} of {total} estimators "
+                        f"({metric}={score:.4f}, best={best_score.value:.4f})"
+                    )
+                    return {
+                        'name': name,
+                        'model': None,
+                        'score': score,
+                        'fit_time': round(time.perf_counter() - started, 3),
+                        'abandoned': True
+                    }
+            estimator.set_params(n_estimators=total)
+
+    if best_score is not None:
+        with best_score_lock:
+            if score > best_score.value:
+                best_score.value = score
+
+    return {
+        'name': name,
+        'model': estimator,
+        'score': score,
+        'fit_time': round(time.perf_counter() - started, 3),
+        'abandoned': False
+    }
+
+
+def measure_serving_cost(model, scaler, X_raw: np.ndarray) -> Dict[str, Any]:
+    """Latency and size of the inference artifact a fitted model would be served as.
+
+    The model is fused with its scaler exactly as on publish, including the
+    parity check on ``X_raw``, then measured by ``measure_artifact``.
+    """
+    from models.inference import compile_fused_model
+
+    return measure_artifact(compile_fused_model(model, scaler, X_raw), X_raw)
+
+
+def measure_artifact(fused, X_raw: np.ndarray) -> Dict[str, Any]:
+    """Serialized size, load time and latency of an inference artifact.
+
+    Latency is timed on raw rows: p50/p99 of single-row calls and the mean
+    time of a batch. Load time is a plain (not memory-mapped) joblib load.
+    """
+    import joblib
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "artifact.joblib")
+        joblib.dump(fused, path)
+        size = os.path.getsize(path)
+        started = time.perf_counter()
+        joblib.load(path)
+        load_seconds = time.perf_counter() - started
+
+    X_raw = np.asarray(X_raw, dtype=np.float64)
+    rows = X_raw[np.arange(LATENCY_SINGLE_CALLS) % len(X_raw)]
+    batch = X_raw[np.arange(LATENCY_BATCH_ROWS) % len(X_raw)]
+    fused.predict_many(batch)  # warm-up
+
+    single = np.empty(LATENCY_SINGLE_CALLS)
+    for index in range(LATENCY_SINGLE_CALLS):
+        started = time.perf_counter()
+        fused.predict_many(rows[index:index + 1])
+        single[index] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for _ in range(LATENCY_BATCH_CALLS):
+        fused.predict_many(batch)
+    batch_seconds = (time.perf_counter() - started) / LATENCY_BATCH_CALLS
+
+    return {
+        'artifact': type(fused).__name__,
+        'p50_ms': round(float(np.percentile(single, 50)) * 1000, 4),
+        'p99_ms': round(float(np.percentile(single, 99)) * 1000, 4),
+        'batch_rows': LATENCY_BATCH_ROWS,
+        'batch_ms': round(batch_seconds * 1000, 4),
+        'per_row_us': round(batch_seconds / LATENCY_BATCH_ROWS * 1e6, 3),
+        'size_kb': round(size / 1024, 1),
+        'load_ms': round(load_seconds * 1000, 3)
+    }
+
+
+def compact_forest(fused, X_val: np.ndarray, y_val: np.ndarray, metric: str, tolerance: float):
+    """Smallest cut of a flattened forest scoring within ``tolerance`` of the full one.
+
+    Every combination of the first k trees (k on a geometric grid) and a
+    depth cap is scored on the validation rows from one walk per depth.
+    The combination with the fewest nodes that stays within tolerance wins.
+    Returns the compacted artifact and a report, or ``(fused, None)`` when
+    the artifact is not a forest.
+    """
+    from models.inference import FlatTreeEnsemble
+
+    if not isinstance(fused, FlatTreeEnsemble) or fused.aggregate not in ('mean', 'mean_proba'):
+        return fused, None
+
+    X_val = np.asarray(X_val, dtype=np.float64)[:COMPACTION_MAX_ROWS]
+    y_val = np.asarray(y_val)[:COMPACTION_MAX_ROWS]
+    tree_counts = np.unique(np.geomspace(1, fused.n_trees, num=min(fused.n_trees, 24)).round().astype(int))
+    node_depths = fused.node_depths()
+    tree_of_node = np.searchsorted(fused.roots, np.arange(fused.n_nodes), side='right') - 1
+
+    full_score = score_predictions(y_val, fused.predict_many(X_val), metric)
+    best = (fused.n_nodes, fused.n_trees, fused.max_depth, full_score)
+    for depth in range(1, fused.max_depth + 1):
+        # Running mean over the first k trees, for every k at once
+        running = np.cumsum(fused.leaf_values(X_val, max_depth=depth), axis=1, dtype=np.float64)
+        nodes_per_tree = np.bincount(tree_of_node[node_depths <= depth], minlength=fused.n_trees)
+        nodes = np.cumsum(nodes_per_tree)
+        for k in tree_counts:
+            if nodes[k - 1] >= best[0]:
+                continue
+            score = score_predictions(y_val, running[:, k - 1] / k, metric)
+            if score >= full_score - tolerance:
+                best = (int(nodes[k - 1]), int(k), depth, score)
+
+    _, n_trees, max_depth, score = best
+    compacted = fused.compact(n_trees, max_depth)
+    before, after = measure_artifact(fused, X_val), measure_artifact(compacted, X_val)
+    report = {
+        'tolerance': tolerance,
+        'n_trees': [fused.n_trees, n_trees],
+        'max_depth': [fused.max_depth, compacted.max_depth],
+        'n_nodes': [fused.n_nodes, compacted.n_nodes],
+        'score': [full_score, score_predictions(y_val, compacted.predict_many(X_val), metric)],
+        'size_kb': [before['size_kb'], after['size_kb']],
+        'load_ms': [before['load_ms'], after['load_ms']],
+        'p99_ms': [before['p99_ms'], after['p99_ms']],
+        'per_row_us': [before['per_row_us'], after['per_row_us']]
+    }
+    logger.info(f"Compacted {fused.source_model} (before, after): {report}")
+    return compacted, report
+
+
+def compile_serving_model(model, scaler, X_check: np.ndarray, y_check: np.ndarray, metric: str,
+                          compaction_tolerance: Optional[float] = None):
+    """Fuse a trained model for serving (parity-checked) and optionally compact a forest"""
+    from models.inference import compile_fused_model
+
+    fused = compile_fused_model(model, scaler, X_check)
+    if compaction_tolerance is None:
+        return fused, None
+    return compact_forest(fused, X_check, y_check, metric, compaction_tolerance)
+
+
+def profile_candidates(models: Dict[str, Any], scaler, X_raw: np.ndarray) -> Dict[str, Dict[str, Any]]:
+    """Serving cost of each fitted candidate, measured one after another in one worker"""
+    from threadpoolctl import threadpool_limits
+
+    # Serving scores one request per inference thread, so time with a single thread
+    costs = {}
+    with threadpool_limits(limits=1):
+        for name, model in models.items():
+            _set_thread_count(model, 1)
+            costs[name] = measure_serving_cost(model, scaler, X_raw)
+    return costs
+
+
+def choose_model(scores: Dict[str, float], costs: Dict[str, Dict[str, Any]],
+                 latency_budget_ms: Optional[float] = None, size_budget_mb: Optional[float] = None,
+                 score_tolerance: float = 0.0) -> Dict[str, Any]:
+    """Pick a candidate by score subject to serving budgets.
+
+    Candidates whose p99 single-row latency or artifact size exceeds a budget
+    are excluded. Among the rest, every candidate scoring within
+    ``score_tolerance`` of the best counts as equally accurate, and the one
+    with the lowest p99 latency wins. If no candidate fits the budgets, the
+    fastest one is chosen. ``scores`` is in declared order, so ties resolve
+    the same way every run.
+    """
+    def within_budget(name: str) -> bool:
+        cost = costs.get(name)
+        if cost is None:
+            return True
+        if latency_budget_ms and cost['p99_ms'] > latency_budget_ms:
+            return False
+        if size_budget_mb and cost['size_kb'] > size_budget_mb * 1024:
+            return False
+        return True
+
+    eligible = [name for name in scores if within_budget(name)]
+    if not eligible:
+        fastest = min(scores, key=lambda name: costs[name]['p99_ms'])
+        logger.warning(
+            f"No candidate fits the serving budget (p99 {latency_budget_ms} ms, {size_budget_mb} MB); "
+            f"choosing the fastest, {fastest}"
+        )
+        return {'name': fastest, 'within_budget': False, 'excluded': list(scores)}
+
+    top = max(scores[name] for name in eligible)
+    tied = [name for name in eligible if scores[name] >= top - score_tolerance]
+    if costs:
+        name = min(tied, key=lambda name: costs[name]['p99_ms'] if name in costs else np.inf)
+    else:
+        name = max(tied, key=lambda name: scores[name])
+    return {'name': name, 'within_budget': True, 'excluded': [name for name in scores if name not in eligible]}
+
+
+async def select_best_model(candidates: Dict[str, Any], X_train: np.ndarray, y_train: np.ndarray,
+                            X_val: np.ndarray, y_val: np.ndarray, metric: str, executor: ModelExecutor,
+                            early_abandon: bool = False, abandon_margin: float = 0.02,
+                            progress_callback: Optional[Callable[..., None]] = None,
+                            scaler=None, X_profile: Optional[np.ndarray] = None,
+                            latency_budget_ms: Optional[float] = None, size_budget_mb: Optional[float] = None,
+                            score_tolerance: float = 0.0) -> Dict[str, Any]:
+    """Fit every candidate concurrently on the training pool and keep the best one.
+
+    With a ``scaler`` and raw rows in ``X_profile``, the fitted candidates'
+    serving latency and artifact size are then measured (see
+    ``profile_candidates``) and the choice honours the serving budgets of
+    ``choose_model``.
+    """
+    report = progress_callback or (lambda progress, stage, candidate=None: None)
+    n_threads = threads_per_candidate(len(candidates), executor.training_processes)
+    logger.info(
+        f"Fitting {len(candidates)} candidates on {executor.training_processes} worker(s), "
+        f"{n_threads} thread(s) each"
+    )
+
+    # Best finished score, shared with the workers for early abandoning
+    manager = None
+    best_score = None
+    best_score_lock = None
+    if early_abandon:
+        if executor.training_mode == "process":
+            manager = multiprocessing.get_context("spawn").Manager()
+            best_score = manager.Value('d', -np.inf)
+            best_score_lock = manager.Lock()
+        else:
+            best_score = _LocalBest(-np.inf)
+            best_score_lock = threading.Lock()
+
+    try:
+        tasks = [
+            executor.run_training(
+                fit_candidate, name, estimator, X_train, y_train, X_val, y_val, metric, n_threads,
+                best_score, abandon_margin if early_abandon else None, best_score_lock
+            )
+            for name, estimator in candidates.items()
+        ]
+
+        results: List[Dict[str, Any]] = []
+        for finished in asyncio.as_completed(tasks):
+            result = await finished
+            results.append(result)
+            status = "abandoned" if result['abandoned'] else f"{metric}={result['score']:.4f}"
+            logger.info(f"{result['name']} {status} ({result['fit_time']}s)")
+            report(
+                0.1 + 0.75 * len(results) / len(candidates), f"fitted {result['name']}",
+                candidate={key: result[key] for key in ('name', 'score', 'fit_time', 'abandoned')}
+            )
+    finally:
+        if manager is not None:
+            manager.shutdown()
+
+    # Keep the candidates' declared order so ties resolve the same way every run
+    order = list(candidates)
+    results.sort(key=lambda result: order.index(result['name']))
+    completed = [result for result in results if not result['abandoned']]
+    if not completed:
+        raise RuntimeError("Every candidate model was abandoned")
+    fitted = {result['name']: result['model'] for result in completed}
+    scores = {result['name']: result['score'] for result in completed}
+
+    costs: Dict[str, Dict[str, Any]] = {}
+    if scaler is not None and X_profile is not None and len(X_profile):
+        # After every fit has finished, so the timings don't compete with training
+        report(0.86, "measuring serving latency")
+        costs = await executor.run_training(profile_candidates, fitted, scaler, X_profile)
+        for name, cost in costs.items():
+            logger.info(f"{name} serving cost: p99 {cost['p99_ms']} ms/row, "
+                        f"{cost['per_row_us']} us/row in batches, {cost['size_kb']} KB")
+
+    choice = choose_model(scores, costs, latency_budget_ms, size_budget_mb, score_tolerance)
+    best = choice['name']
+    if best != max(scores, key=lambda name: scores[name]):
+        logger.info(f"Selected {best} ({metric}={scores[best]:.4f}) under the serving budget")
+
+    return {
+        'model': fitted[best],
+        'best_model': best,
+        'best_score': scores[best],
+        'scores': {result['name']: result['score'] for result in results},
+        'fit_times': {result['name']: result['fit_time'] for result in results},
+        'abandoned': [result['name'] for result in results if result['abandoned']],
+        'serving_costs': costs,
+        'selection': {
+            'latency_budget_ms': latency_budget_ms,
+            'size_budget_mb': size_budget_mb,
+            'score_tolerance': score_tolerance,
+            'within_budget': choice['within_budget'],
+            'over_budget': choice['excluded']
+        }
+    }
@@ -8,6 +8,16 @@ class RiskLevel(str, Enum):
     HIGH = "high"
     NORMAL = "normal"
 
+def _check_maternal_bmi(weight: float, values: Dict[str, Any]) -> float:
+    """Validate that weight is reasonable compared to height"""
+    if 'maternal_height' in values:
+        height_m = values['maternal_height'] / 100
+        bmi = weight / (height_m ** 2)
+        # Allow more realistic BMI range for pregnant women
+        if bmi < 13 or bmi > 55:
+            raise ValueError(f'Weight seems unreasonable for the given height (BMI: {bmi:.1f}). BMI should be between 13-55.')
+    return weight
+
 class BabyWeightRequest(BaseModel):
     """Schema for baby weight prediction request"""
     gestational_age: float = Field(..., ge=20, le=45, description="Gestational age in weeks")
@@ -20,12 +30,29 @@ class BabyWeightRequest(BaseModel):
     @validator('maternal_weight')
     def weight_must_be_reasonable(cls, v, values):
         """Validate that weight is reasonable compared to height"""
-        if 'maternal_height' in values:
-            height_m = values['maternal_height'] / 100
-            bmi = v / (height_m ** 2)
-            # Allow more realistic BMI range for pregnant women
-            if bmi < 13 or bmi > 55:
-                raise ValueError(f'Weight seems unreasonable for the given height (BMI: {bmi:.1f}). BMI should be between 13-55.')
+        return _check_maternal_bmi(v, values)
+
+class BabyWeightTrajectoryRequest(BaseModel):
+    """Schema for a predicted birth weight curve of one maternal profile over gestational age"""
+    maternal_age: int = Field(..., ge=13, le=60, description="Maternal age in years")
+    maternal_height: float = Field(..., ge=120, le=220, description="Maternal height in cm")
+    maternal_weight: float = Field(..., ge=30, le=200, description="Maternal weight in kg")
+    previous_pregnancies: int = Field(..., ge=0, le=10, description="Number of previous pregnancies (parity)")
+    smoking_status: int = Field(0, ge=0, le=1, description="Smoking status (0=No, 1=Yes)")
+    gestational_age_start: float = Field(20, ge=20, le=45, description="First gestational age of the curve in weeks")
+    gestational_age_end: float = Field(45, ge=20, le=45, description="Last gestational age of the curve in weeks")
+    gestational_age_step: float = Field(1, ge=0.1, le=25, description="Weeks between points of the curve")
+    
+    @validator('maternal_weight')
+    def weight_must_be_reasonable(cls, v, values):
+        """Validate that weight is reasonable compared to height"""
+        return _check_maternal_bmi(v, values)
+    
+    @validator('gestational_age_end')
+    def end_after_start(cls, v, values):
+        """Validate that the curve does not run backwards"""
+        if 'gestational_age_start' in values and v < values['gestational_age_start']:
+            raise ValueError('gestational_age_end must not be before gestational_age_start')
         return v
 
 class DiabetesRequest(BaseModel):
@@ -61,11 +88,33 @@ class PredictionResponse(BaseModel):
     prediction_timestamp: str = Field(..., description="Timestamp of prediction")
     input_data: Dict[str, Any] = Field(..., description="Input data used for prediction")
 
+class TrajectoryPoint(BaseModel):
+    """One point of a predicted birth weight curve"""
+    gestational_age: float = Field(..., description="Gestational age in weeks")
+    predicted_weight: float = Field(..., description="Predicted baby weight in grams")
+    weight_category: str = Field(..., description="Weight category (Low, Normal, High)")
+    risk_level: RiskLevel = Field(..., description="Risk level")
+
+class BabyWeightTrajectoryResponse(BaseModel):
+    """Schema for a predicted birth weight curve"""
+    success: bool = Field(..., description="Whether the prediction was successful")
+    prediction_type: str = Field("baby_weight_trajectory", description="Type of prediction")
+    points: List[TrajectoryPoint] = Field(..., description="Predicted weight per gestational age, in increasing age")
+    disclaimer: str = Field(..., description="Medical disclaimer")
+    model_version: str = Field(..., description="Model version used")
+    prediction_timestamp: str = Field(..., description="Timestamp of prediction")
+    input_data: Dict[str, Any] = Field(..., description="Maternal profile and gestational age range used for prediction")
+
 class ModelTrainingRequest(BaseModel):
     """Schema for model training request"""
-    data_file_path: str = Field(..., description="Path to training data file")
+    data_file_path: str = Field(..., description="Path to a training data file under uploads/ or data/processed/ (empty for the default data)")
     model_type: str = Field(..., description="Type of model to train")
-    hyperparameters: Optional[Dict[str, Any]] = Field(None, description="Model hyperparameters")
+    hyperparameters: Optional[Dict[str, Any]] = Field(
+        None,
+        description='Parameters per candidate family, e.g. {"xgboost": {"max_depth": 4}}, '
+                    'and/or a "search" entry with search options to tune the candidates'
+    )
+    incremental: bool = Field(False, description="Update the production model with newly ingested rows instead of refitting")
 
 class TrainingResponse(BaseModel):
     """Schema for training response"""
@@ -75,6 +124,36 @@ class TrainingResponse(BaseModel):
     model_version: str = Field(..., description="New model version")
     message: str = Field(..., description="Training result message")
 
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+class TrainingJobResponse(BaseModel):
+    """Schema for a background training job"""
+    job_id: str = Field(..., description="Training job identifier")
+    model_type: str = Field(..., description="Type of model being trained (baby_weight or diabetes)")
+    status: JobStatus = Field(..., description="Current job status")
+    progress: float = Field(0.0, ge=0, le=1, description="Job progress (0-1)")
+    stage: str = Field(..., description="Current training stage")
+    data_file_path: Optional[str] = Field(None, description="Training data file used")
+    incremental: bool = Field(False, description="Whether the job updates the production model incrementally")
+    candidate_scores: Dict[str, float] = Field(default_factory=dict, description="Validation score per candidate model")
+    candidate_fit_times: Dict[str, float] = Field(default_factory=dict, description="Fit time in seconds per candidate model")
+    abandoned_candidates: List[str] = Field(default_factory=list, description="Candidates stopped early by the abandon rule")
+    candidate_serving_costs: Dict[str, Dict[str, Any]] = Field(
+        default_factory=dict, description="Inference latency (ms) and artifact size (KB) per fitted candidate"
+    )
+    best_model: Optional[str] = Field(None, description="Name of the selected candidate model")
+    hyperparameter_search: Optional[Dict[str, Any]] = Field(None, description="Summary of the hyperparameter search, if one ran")
+    submitted_at: str = Field(..., description="Timestamp the job was submitted")
+    started_at: Optional[str] = Field(None, description="Timestamp the fit started")
+    finished_at: Optional[str] = Field(None, description="Timestamp the job finished")
+    queue_time: Optional[float] = Field(None, description="Seconds spent waiting for a training slot")
+    error: Optional[str] = Field(None, description="Error message if the job failed")
+    result: Optional[TrainingResponse] = Field(None, description="Training result once the job has finished")
+
 class DataUploadRequest(BaseModel):
     """Schema for data upload request"""
     file_path: str = Field(..., description="Path to uploaded data file")
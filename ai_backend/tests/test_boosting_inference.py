@@ -0,0 +1,70 @@
+import joblib
+import numpy as np
+import pytest
+from sklearn.preprocessing import StandardScaler
+
+import utils.training_store
+from models.diabetes_predictor import MODEL_FEATURES, DiabetesPredictor
+from models.inference import FlatTreeEnsemble, compile_fused_model
+from models.training import measure_serving_cost
+from test_inference import assert_parity, fit, make_data, reference_output
+
+xgb = pytest.importorskip('xgboost')
+lgb = pytest.importorskip('lightgbm')
+
+BOOSTING_CASES = [
+    (lambda: xgb.XGBRegressor(n_estimators=30, max_depth=4), 'regressor'),
+    (lambda: xgb.XGBClassifier(n_estimators=30, max_depth=4), 'classifier'),
+    (lambda: lgb.LGBMRegressor(n_estimators=30, num_leaves=15, verbose=-1), 'regressor'),
+    (lambda: lgb.LGBMClassifier(n_estimators=30, num_leaves=15, verbose=-1), 'classifier'),
+]
+CASE_IDS = ['xgb-regressor', 'xgb-classifier', 'lgbm-regressor', 'lgbm-classifier']
+
+
+@pytest.mark.parametrize('make_estimator,task', BOOSTING_CASES, ids=CASE_IDS)
+def test_flattened_boosting_matches_the_library(make_estimator, task):
+    model, scaler = fit(make_estimator(), task)
+    X_check, _ = make_data(task, n_rows=200, seed=1)
+
+    fused = compile_fused_model(model, scaler, X_check)
+    assert type(fused) is FlatTreeEnsemble
+    X, _ = make_data(task, n_rows=300, seed=2)
+    assert_parity(fused, reference_output(model, scaler, X), X)
+
+
+@pytest.mark.parametrize('make_estimator,task', BOOSTING_CASES, ids=CASE_IDS)
+def test_flattening_boosting_without_check_rows_is_refused(make_estimator, task):
+    model, scaler = fit(make_estimator(), task)
+    with pytest.raises(ValueError, match="X_check"):
+        compile_fused_model(model, scaler)
+    with pytest.raises(ValueError, match="X_check"):
+        compile_fused_model(model, scaler, np.empty((0, model.n_features_in_)))
+
+
+def test_serving_cost_is_measured_on_a_checked_artifact():
+    model, scaler = fit(xgb.XGBClassifier(n_estimators=10, max_depth=3), 'classifier')
+    X, _ = make_data('classifier', n_rows=50, seed=1)
+
+    cost = measure_serving_cost(model, scaler, X)
+    assert cost['size_kb'] > 0 and cost['p99_ms'] > 0
+
+
+def test_legacy_import_checks_flattened_trees(tmp_path, monkeypatch):
+    # An empty training store, so parity rows come from the synthetic sample data
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(utils.training_store, '_store', None)
+    predictor = DiabetesPredictor(model_path=str(tmp_path / "diabetes_model.joblib"))
+
+    df = predictor.preprocess_data(predictor.generate_sample_data())
+    X = df[MODEL_FEATURES].to_numpy(dtype=float)
+    scaler = StandardScaler().fit(X)
+    model = xgb.XGBClassifier(n_estimators=20, max_depth=3).fit(scaler.transform(X), df['Prediction'])
+    joblib.dump(model, predictor.model_path)
+    scaler_path = str(tmp_path / "diabetes_model_scaler.joblib")
+    joblib.dump(scaler, scaler_path)
+
+    bundle = predictor._import_legacy_artifacts(scaler_path)
+    assert bundle.version == "1.0.0"
+    assert predictor.registry.current_version() == "1.0.0"
+    assert type(bundle.fused) is FlatTreeEnsemble
+    assert_parity(bundle.fused, reference_output(model, scaler, X[:500]), X[:500])
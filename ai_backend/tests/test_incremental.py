@@ -0,0 +1,98 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+from sklearn.preprocessing import StandardScaler
+
+import utils.training_store
+from models.diabetes_predictor import MODEL_FEATURES, REQUIRED_COLUMNS, DiabetesPredictor
+from models.registry import ModelBundle
+from models.training import INCREMENTAL_MIN_NEW_ROWS, incremental_update
+from utils.training_store import TrainingStore
+
+xgb = pytest.importorskip('xgboost')
+
+
+def make_data(n_rows: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n_rows, 3))
+    return X, (X[:, 0] + rng.normal(scale=0.5, size=n_rows) > 0).astype(int)
+
+
+def fitted(estimator, X, y):
+    scaler = StandardScaler().fit(X)
+    return estimator.fit(scaler.transform(X), y), scaler
+
+
+CLASSIFIERS = [
+    lambda: RandomForestClassifier(n_estimators=10, random_state=0),
+    lambda: xgb.XGBClassifier(n_estimators=10),
+]
+
+
+@pytest.mark.parametrize('make_estimator', CLASSIFIERS, ids=['random_forest', 'xgboost'])
+@pytest.mark.parametrize('n_new,single_class', [(1, False), (2, False), (30, True)])
+def test_small_or_single_class_upload_falls_back(make_estimator, n_new, single_class):
+    X_old, y_old = make_data(300)
+    model, scaler = fitted(make_estimator(), X_old, y_old)
+    X_new, y_new = make_data(n_new, seed=1)
+    if single_class:
+        y_new = np.ones(n_new, dtype=int)
+
+    result = incremental_update(model, scaler, X_new, y_new, X_old, y_old, 'roc_auc', 5, 0.005)
+    assert set(result) == {'fallback'}
+
+
+def test_class_with_a_single_new_row_falls_back():
+    X_old, y_old = make_data(300)
+    model, scaler = fitted(RandomForestClassifier(n_estimators=10, random_state=0), X_old, y_old)
+    y_new = np.array([0] * 19 + [1])
+
+    result = incremental_update(model, scaler, make_data(20, seed=1)[0], y_new, X_old, y_old, 'roc_auc', 5, 0.005)
+    assert 'single new row' in result['fallback']
+
+
+@pytest.mark.parametrize('make_estimator', CLASSIFIERS, ids=['random_forest', 'xgboost'])
+def test_smallest_valid_upload_is_split_by_class(make_estimator):
+    X_old, y_old = make_data(300)
+    model, scaler = fitted(make_estimator(), X_old, y_old)
+    X_new = make_data(INCREMENTAL_MIN_NEW_ROWS, seed=1)[0]
+    y_new = np.array([0, 1] * (INCREMENTAL_MIN_NEW_ROWS // 2))
+
+    result = incremental_update(model, scaler, X_new, y_new, X_old, y_old, 'roc_auc', 5, 0.005)
+    assert 'fallback' not in result
+    assert result['new_rows'] == INCREMENTAL_MIN_NEW_ROWS - 2
+    assert result['model'] is not model
+
+
+def test_regressor_needs_enough_rows():
+    X_old, _ = make_data(300)
+    y_old = X_old[:, 0] * 2
+    model, scaler = fitted(RandomForestRegressor(n_estimators=10, random_state=0), X_old, y_old)
+
+    too_few = incremental_update(model, scaler, X_old[:5], y_old[:5], X_old, y_old, 'r2', 5, 0.005)
+    assert 'fallback' in too_few
+    enough = incremental_update(model, scaler, X_old[:30], y_old[:30], X_old, y_old, 'r2', 5, 0.005)
+    assert enough['new_rows'] == 24
+
+
+def test_tiny_diabetes_upload_asks_for_a_full_refit(tmp_path, monkeypatch):
+    store = TrainingStore(root=str(tmp_path / "training"), output_format='csv')
+    monkeypatch.setattr(utils.training_store, '_store', store)
+    predictor = DiabetesPredictor(model_path=str(tmp_path / "saved" / "diabetes_model.joblib"))
+
+    df = predictor.preprocess_data(predictor.generate_sample_data())[REQUIRED_COLUMNS]
+    store.append('diabetes', df.iloc[:-2], source="first upload")
+    model, scaler = fitted(
+        RandomForestClassifier(n_estimators=10, random_state=0),
+        df[MODEL_FEATURES].iloc[:-2].to_numpy(dtype=float), df['Prediction'].iloc[:-2]
+    )
+    version = predictor.registry.save(ModelBundle(
+        model, scaler, MODEL_FEATURES,
+        metrics={'dataset': {'source': 'training_store', 'parts': 1, 'rows': len(df) - 2}}
+    ))
+
+    # A second upload of two rows: too few to fit and hold out
+    store.append('diabetes', df.iloc[-2:], source="second upload")
+    assert predictor.prepare_incremental_update(version) == {
+        'fallback': f"only 2 new rows, at least {INCREMENTAL_MIN_NEW_ROWS} are needed"
+    }
@@ -0,0 +1,152 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import (
+    ExtraTreesRegressor, GradientBoostingClassifier, GradientBoostingRegressor,
+    RandomForestClassifier, RandomForestRegressor
+)
+from sklearn.linear_model import LinearRegression, LogisticRegression
+from sklearn.neighbors import KNeighborsRegressor
+from sklearn.preprocessing import StandardScaler
+
+from models.inference import (
+    PARITY_RTOL, PARITY_TOLERANCE, AffineLinearModel, DistilledModel, FlatTreeEnsemble,
+    FusedModel, LookupTableModel, ScaledModel, compile_fused_model
+)
+
+N_FEATURES = 4
+
+
+def make_data(task: str, n_rows: int = 400, seed: int = 0):
+    """Raw rows on different scales, so a missing scaler step shows up in the outputs"""
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n_rows, N_FEATURES)) * [1.0, 10.0, 100.0, 0.1] + [0.0, 50.0, -20.0, 1.0]
+    signal = X[:, 0] + X[:, 1] / 10 - X[:, 2] / 100 + rng.normal(scale=0.3, size=n_rows)
+    y = (signal > np.median(signal)).astype(int) if task == 'classifier' else signal
+    return X, y
+
+
+def fit(estimator, task: str):
+    X, y = make_data(task)
+    scaler = StandardScaler().fit(X)
+    estimator.fit(scaler.transform(X), y)
+    return estimator, scaler
+
+
+def reference_output(model, scaler, X: np.ndarray) -> np.ndarray:
+    X_scaled = scaler.transform(X)
+    if hasattr(model, 'predict_proba'):
+        return model.predict_proba(X_scaled)[:, 1]
+    return model.predict(X_scaled)
+
+
+def assert_parity(fused: FusedModel, expected: np.ndarray, X: np.ndarray):
+    np.testing.assert_allclose(fused.predict_many(X), expected, rtol=PARITY_RTOL, atol=PARITY_TOLERANCE)
+
+
+# (estimator, task, artifact compile_fused_model is expected to produce)
+SKLEARN_CASES = [
+    (LinearRegression(), 'regressor', AffineLinearModel),
+    (LogisticRegression(), 'classifier', AffineLinearModel),
+    (RandomForestRegressor(n_estimators=15, max_depth=6, random_state=0), 'regressor', FlatTreeEnsemble),
+    (RandomForestClassifier(n_estimators=15, max_depth=6, random_state=0), 'classifier', FlatTreeEnsemble),
+    (ExtraTreesRegressor(n_estimators=15, max_depth=6, random_state=0), 'regressor', FlatTreeEnsemble),
+    (GradientBoostingRegressor(n_estimators=30, max_depth=3, random_state=0), 'regressor', FlatTreeEnsemble),
+    (GradientBoostingClassifier(n_estimators=30, max_depth=3, random_state=0), 'classifier', FlatTreeEnsemble),
+    (KNeighborsRegressor(), 'regressor', ScaledModel),
+]
+
+
+@pytest.mark.parametrize('estimator,task,artifact', SKLEARN_CASES, ids=lambda case: getattr(case, '__name__', None))
+def test_compiled_sklearn_model_matches_the_estimator(estimator, task, artifact):
+    model, scaler = fit(estimator, task)
+    X_check, _ = make_data(task, n_rows=200, seed=1)
+
+    fused = compile_fused_model(model, scaler, X_check)
+    assert type(fused) is artifact
+    assert fused.task == task
+    # Fresh rows, not the ones the parity check ran on
+    X, _ = make_data(task, n_rows=300, seed=2)
+    assert_parity(fused, reference_output(model, scaler, X), X)
+
+
+@pytest.mark.parametrize('task', ['regressor', 'classifier'])
+def test_estimator_backend_serves_the_scaled_estimator(task):
+    estimator = RandomForestClassifier(n_estimators=5, random_state=0) if task == 'classifier' \
+        else RandomForestRegressor(n_estimators=5, random_state=0)
+    model, scaler = fit(estimator, task)
+    X, _ = make_data(task, n_rows=100, seed=1)
+
+    fused = compile_fused_model(model, scaler, X, backend='estimator')
+    assert type(fused) is ScaledModel
+    assert_parity(fused, reference_output(model, scaler, X), X)
+
+
+def test_tree_ensemble_needs_check_rows():
+    model, scaler = fit(RandomForestRegressor(n_estimators=5, random_state=0), 'regressor')
+    with pytest.raises(ValueError):
+        compile_fused_model(model, scaler)
+    # Linear models are folded exactly and need no rows
+    model, scaler = fit(LinearRegression(), 'regressor')
+    assert type(compile_fused_model(model, scaler)) is AffineLinearModel
+
+
+def test_uncut_forest_compaction_keeps_outputs():
+    model, scaler = fit(RandomForestClassifier(n_estimators=10, max_depth=5, random_state=0), 'classifier')
+    X, _ = make_data('classifier', n_rows=300, seed=1)
+    fused = compile_fused_model(model, scaler, X)
+
+    compacted = fused.compact(fused.n_trees, fused.max_depth)
+    assert compacted.n_nodes == fused.n_nodes
+    assert_parity(compacted, reference_output(model, scaler, X), X)
+
+
+def test_distilled_model_routes_between_student_and_teacher():
+    X, _ = make_data('classifier', n_rows=300, seed=1)
+    teacher_model, scaler = fit(RandomForestClassifier(n_estimators=10, random_state=0), 'classifier')
+    teacher = compile_fused_model(teacher_model, scaler, X)
+    # A student of the teacher's log-odds, and a gate that varies across rows
+    p = np.clip(teacher.predict_many(X), 0.01, 0.99)
+    student_model = GradientBoostingRegressor(n_estimators=20, random_state=0).fit(
+        scaler.transform(X), np.log(p / (1 - p))
+    )
+    student = compile_fused_model(student_model, scaler, X)
+    gate_model = GradientBoostingRegressor(n_estimators=10, random_state=0).fit(scaler.transform(X), X[:, 0])
+    gate = compile_fused_model(gate_model, scaler, X)
+    threshold = float(np.median(gate.predict_many(X)))
+
+    distilled = DistilledModel(student, gate, teacher, threshold)
+    routed = distilled.routed(X)
+    assert 0 < routed.sum() < len(X)
+
+    student_output = 1 / (1 + np.exp(-student_model.predict(scaler.transform(X))))
+    expected = np.where(routed, reference_output(teacher_model, scaler, X), student_output)
+    assert_parity(distilled, expected, X)
+    assert_parity(DistilledModel(student, gate, teacher, -np.inf), reference_output(teacher_model, scaler, X), X)
+
+
+def test_lookup_table_matches_its_model_on_grid_points():
+    model, scaler = fit(LinearRegression(), 'regressor')
+    live = compile_fused_model(model, scaler)
+    axes = [np.arange(-2, 3), np.linspace(30, 70, 5), np.linspace(-200, 200, 5), np.linspace(0.8, 1.2, 3)]
+    table = LookupTableModel(live, axes, exact=[True, False, False, False])
+
+    X = np.array(np.meshgrid(*axes, indexing='ij')).reshape(N_FEATURES, -1).T
+    # The table stores float32 values
+    np.testing.assert_allclose(table.predict_many(X), reference_output(model, scaler, X), rtol=1e-6, atol=1e-4)
+
+
+def test_every_fused_artifact_is_covered():
+    covered = {AffineLinearModel, ScaledModel, FlatTreeEnsemble, DistilledModel, LookupTableModel}
+    shipped = {cls for cls in FusedModel.__subclasses__() if cls.__module__ == 'models.inference'}
+    assert shipped == covered
+
+
+def test_fused_model_is_abstract():
+    with pytest.raises(TypeError):
+        FusedModel('regressor', N_FEATURES, 'none')
+
+    class Incomplete(FusedModel):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete('regressor', N_FEATURES, 'none')
@@ -0,0 +1,201 @@
+import joblib
+import numpy as np
+import pytest
+from sklearn.linear_model import LinearRegression, LogisticRegression
+
+from models.diabetes_predictor import LOOKUP_BMI, LOOKUP_GRID, MODEL_FEATURES, lookup_grid
+from models.inference import AffineLinearModel, LookupTableModel, compile_fused_model
+from models.lookup_table import sample_domain, tabulate_model
+from schemas.prediction_schemas import DiabetesRequest
+
+# Largest |sigmoid''|, which bounds the curvature of a logistic model along each feature
+SIGMOID_CURVATURE = 1 / (6 * np.sqrt(3))
+# float32 storage of table values
+STORAGE_ERROR = 1e-6
+
+AXES = [np.arange(0, 5), np.linspace(-3, 3, 13), np.linspace(10, 30, 9)]
+EXACT = [True, False, False]
+
+
+def logistic_model() -> AffineLinearModel:
+    """Risk rising with the two continuous features, on a grid that does not resolve it exactly"""
+    rng = np.random.default_rng(0)
+    X = np.column_stack([rng.integers(0, 5, 2000), rng.uniform(-3, 3, 2000), rng.uniform(10, 30, 2000)])
+    y = (X[:, 0] * 0.3 + X[:, 1] + (X[:, 2] - 20) / 5 + rng.normal(size=2000) > 0).astype(int)
+    fused = compile_fused_model(LogisticRegression().fit(X, y), None)
+    assert isinstance(fused, AffineLinearModel)
+    return fused
+
+
+def domain_rows(n_rows: int = 5000) -> np.ndarray:
+    return sample_domain(AXES, EXACT, n_rows, seed=1)
+
+
+def test_interpolation_error_is_within_the_curvature_bound():
+    live = logistic_model()
+    table = LookupTableModel(live, AXES, EXACT, interpolate=True)
+    X = domain_rows()
+
+    step = np.array([axis[1] - axis[0] for axis in AXES])
+    # Multilinear interpolation error: at most h_i^2 / 8 x max |d2f/dx_i2| summed over features
+    bound = (step[1:] ** 2 / 8 * live.coef[1:] ** 2 * SIGMOID_CURVATURE).sum() + STORAGE_ERROR
+    error = np.abs(table.predict_many(X) - live.predict_many(X))
+    assert 0 < error.max() <= bound
+
+    report = table.error_report(X)
+    assert report['rows'] == len(X) and report['outside_grid'] == 0
+    assert report['max_abs_error'] == pytest.approx(error.max())
+    assert report['mean_abs_error'] <= report['p99_abs_error'] <= report['max_abs_error']
+
+
+def test_nearest_point_error_is_within_the_slope_bound():
+    live = logistic_model()
+    table = LookupTableModel(live, AXES, EXACT, interpolate=False)
+    X = domain_rows()
+
+    step = np.array([axis[1] - axis[0] for axis in AXES])
+    # Each continuous feature is off by at most half a step; the logistic slope is at most w / 4
+    bound = (step[1:] / 2 * np.abs(live.coef[1:]) / 4).sum() + STORAGE_ERROR
+    assert table.error_report(X)['max_abs_error'] <= bound
+
+
+def test_finer_grid_has_smaller_error():
+    live = logistic_model()
+    X = domain_rows()
+    coarse = LookupTableModel(live, AXES, EXACT).error_report(X)['max_abs_error']
+    fine_axes = [AXES[0], np.linspace(-3, 3, 25), np.linspace(10, 30, 17)]
+    fine = LookupTableModel(live, fine_axes, EXACT).error_report(X)['max_abs_error']
+    # Halving the steps quarters the bound
+    assert fine < coarse / 2
+
+
+def test_affine_model_is_reproduced_exactly_between_grid_points():
+    rng = np.random.default_rng(0)
+    X = domain_rows()
+    live = compile_fused_model(LinearRegression().fit(X, X @ [0.5, 2.0, -0.1] + rng.normal(size=len(X))), None)
+    table = LookupTableModel(live, AXES, EXACT)
+    np.testing.assert_allclose(table.predict_many(X), live.predict_many(X), atol=1e-5)
+
+
+def test_rows_off_the_grid_are_scored_by_the_live_model():
+    live = logistic_model()
+    table = LookupTableModel(live, AXES, EXACT)
+    # Past the last weight point, and a fractional value of an exact feature
+    X = np.array([[2.0, 0.5, 31.0], [2.5, 0.5, 20.0], [2.0, 0.5, 20.0]])
+
+    output = table.predict_many(X)
+    np.testing.assert_array_equal(output[:2], live.predict_many(X[:2]))
+    report = table.error_report(X)
+    assert (report['rows'], report['outside_grid']) == (1, 2)
+
+
+def test_unevenly_spaced_axis_is_rejected():
+    with pytest.raises(ValueError):
+        LookupTableModel(logistic_model(), [AXES[0], np.array([-3.0, 0.0, 1.0]), AXES[2]], EXACT)
+
+
+@pytest.mark.parametrize('tolerance,accepted', [(1.0, True), (0.0, False)])
+def test_table_is_served_only_within_tolerance(tolerance, accepted):
+    live = logistic_model()
+    served, report = tabulate_model(live, AXES, EXACT, True, domain_rows(500), tolerance=tolerance)
+
+    assert report['accepted'] is accepted
+    if accepted:
+        assert isinstance(served, LookupTableModel) and served.model is live
+    else:
+        assert served is live
+    assert report['grid_points'] == int(np.prod([len(axis) for axis in AXES]))
+    assert report['validation_error']['max_abs_error'] > 0
+
+
+def test_table_no_validation_row_falls_in_is_not_served():
+    live = logistic_model()
+    X_outside = domain_rows(100) + [0.0, 10.0, 0.0]
+    served, report = tabulate_model(live, AXES, EXACT, True, X_outside, tolerance=1.0)
+
+    assert served is live
+    assert not report['accepted'] and report['validation_error']['rows'] == 0
+
+
+def test_diabetes_grid_spans_the_request_bounds():
+    properties = DiabetesRequest.model_json_schema()['properties']
+    fields = ['age', 'pregnancy_no', 'weight', 'height', 'bmi', 'heredity']
+    for field, feature in zip(fields, MODEL_FEATURES):
+        axis, _ = LOOKUP_GRID[feature]
+        if feature == 'BMI':
+            assert axis is None
+            continue
+        assert (axis[0], axis[-1]) == (properties[field]['minimum'], properties[field]['maximum'])
+
+
+def test_diabetes_grid_steps_are_configurable():
+    coarse, fine = lookup_grid(10, 10), lookup_grid(2.5, 5)
+    assert [len(coarse[feature][0]) for feature in ('Weight', 'Height')] == [18, 11]
+    assert [len(fine[feature][0]) for feature in ('Weight', 'Height')] == [69, 21]
+    # Exact features keep every value whatever the steps
+    assert all(len(coarse[feature][0]) == len(fine[feature][0]) for feature in ('Age', 'Pregnancy No', 'Heredity'))
+
+
+def diabetes_model() -> AffineLinearModel:
+    """Logistic risk over raw diabetes features, with BMI carrying most of the weight"""
+    rng = np.random.default_rng(0)
+    n_rows = 3000
+    X = np.column_stack([
+        rng.integers(13, 61, n_rows), rng.integers(1, 11, n_rows), rng.uniform(40, 120, n_rows),
+        rng.uniform(140, 190, n_rows), np.zeros(n_rows), rng.integers(0, 2, n_rows)
+    ])
+    X = LOOKUP_BMI.fill(X)
+    y = ((X[:, 4] - 27) / 4 + X[:, 5] + rng.normal(size=n_rows) > 0).astype(int)
+    return compile_fused_model(LogisticRegression(max_iter=1000).fit(X, y), None)
+
+
+def diabetes_table(live) -> LookupTableModel:
+    axes, exact = zip(*(lookup_grid(10, 10)[feature] for feature in MODEL_FEATURES))
+    return LookupTableModel(live, list(axes), list(exact), derived=LOOKUP_BMI)
+
+
+def test_derived_bmi_has_no_axis_and_is_computed_at_grid_points():
+    live = diabetes_model()
+    table = diabetes_table(live)
+    assert table.shape == (48, 10, 18, 11, 2)
+    assert table.describe()['derived_feature'] == MODEL_FEATURES.index('BMI')
+
+    points = table.grid_rows(np.array([[0, 0, 0, 0, 0], [5, 3, 4, 6, 1]]))
+    np.testing.assert_allclose(points[:, 4], points[:, 2] / (points[:, 3] / 100) ** 2)
+    np.testing.assert_allclose(table.predict_many(points), live.predict_many(points), atol=1e-6)
+
+
+def test_rows_with_a_mismatched_bmi_are_scored_by_the_live_model():
+    live = diabetes_model()
+    table = diabetes_table(live)
+    # 70 kg at 170 cm is a BMI of 24.22; the frontend sends 24.2
+    X = np.array([[30, 2, 70, 170, 24.2, 1], [30, 2, 70, 170, 31.0, 1]])
+
+    position, inside = table._position(X)
+    assert inside.tolist() == [True, False]
+    np.testing.assert_array_equal(table.predict_many(X)[1:], live.predict_many(X[1:]))
+
+
+def test_validation_rows_take_the_derived_bmi():
+    live = diabetes_model()
+    axes, exact = zip(*(lookup_grid(10, 10)[feature] for feature in MODEL_FEATURES))
+    # BMI drawn independently of weight and height, as in the synthetic training data
+    X_check = sample_domain(axes, exact, 300, derived=LOOKUP_BMI)
+    X_check[:, 4] = np.random.default_rng(1).uniform(18, 45, len(X_check))
+
+    served, report = tabulate_model(live, list(axes), list(exact), True, X_check, tolerance=1.0, derived=LOOKUP_BMI)
+    assert report['accepted'] and report['validation_error']['rows'] == len(X_check)
+    assert report['grid_points'] == 48 * 10 * 18 * 11 * 2
+    assert report['table_mb'] == round(report['grid_points'] * 4 / 2 ** 20, 2)
+    assert report['build_seconds'] >= 0
+
+
+def test_table_with_derived_feature_survives_a_save_and_load(tmp_path):
+    live = diabetes_model()
+    table = diabetes_table(live)
+    joblib.dump(table, tmp_path / "inference.joblib")
+    loaded = joblib.load(tmp_path / "inference.joblib", mmap_mode='r')
+
+    X = LOOKUP_BMI.fill(sample_domain([axis for axis, _ in LOOKUP_GRID.values()],
+                                      [is_exact for _, is_exact in LOOKUP_GRID.values()], 200, seed=3))
+    np.testing.assert_array_equal(loaded.predict_many(X), table.predict_many(X))
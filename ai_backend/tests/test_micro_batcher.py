@@ -0,0 +1,104 @@
+import asyncio
+
+import pytest
+
+from utils.micro_batcher import MicroBatcher
+
+
+class RecordingModel:
+    """Doubles each row, recording batch sizes and failing on rows marked bad"""
+
+    def __init__(self):
+        self.batches = []
+
+    async def __call__(self, items):
+        self.batches.append(list(items))
+        if 'bad' in items:
+            raise ValueError("bad row")
+        return [item * 2 for item in items]
+
+
+def test_concurrent_requests_share_one_batch():
+    async def scenario():
+        model = RecordingModel()
+        batcher = MicroBatcher("test", model, max_batch_size=64, max_wait_ms=50)
+        results = await asyncio.gather(*(batcher.submit(i) for i in range(10)))
+        return model, batcher, results
+
+    model, batcher, results = asyncio.run(scenario())
+    assert results == [i * 2 for i in range(10)]
+    assert model.batches == [list(range(10))]
+    assert batcher.stats()['total_batches'] == 1
+
+
+def test_full_queue_flushes_in_chunks_of_max_batch_size():
+    async def scenario():
+        model = RecordingModel()
+        batcher = MicroBatcher("test", model, max_batch_size=4, max_wait_ms=1000, adaptive=False)
+        results = await asyncio.wait_for(asyncio.gather(*(batcher.submit(i) for i in range(10))), timeout=5)
+        return model, results
+
+    model, results = asyncio.run(scenario())
+    assert results == [i * 2 for i in range(10)]
+    assert [len(batch) for batch in model.batches] == [4, 4, 2]
+
+
+def test_partial_batch_flushes_after_the_wait_window():
+    async def scenario():
+        model = RecordingModel()
+        batcher = MicroBatcher("test", model, max_batch_size=64, max_wait_ms=20, adaptive=False)
+        return model, await asyncio.wait_for(asyncio.gather(batcher.submit(1), batcher.submit(2)), timeout=5)
+
+    model, results = asyncio.run(scenario())
+    assert results == [2, 4]
+    assert model.batches == [[1, 2]]
+
+
+def test_close_flushes_pending_requests():
+    async def scenario():
+        model = RecordingModel()
+        batcher = MicroBatcher("test", model, max_batch_size=64, max_wait_ms=60000, adaptive=False)
+        pending = [asyncio.ensure_future(batcher.submit(i)) for i in range(3)]
+        await asyncio.sleep(0)
+        await batcher.close()
+        return batcher, [task.result() for task in pending]
+
+    batcher, results = asyncio.run(scenario())
+    assert results == [0, 2, 4]
+    assert batcher.stats()['queue_depth'] == 0
+
+
+def test_failed_batch_is_retried_row_by_row():
+    async def scenario():
+        model = RecordingModel()
+        batcher = MicroBatcher("test", model, max_batch_size=64, max_wait_ms=50)
+        results = await asyncio.gather(batcher.submit(1), batcher.submit('bad'), batcher.submit(3),
+                                       return_exceptions=True)
+        return model, batcher, results
+
+    model, batcher, results = asyncio.run(scenario())
+    assert results[0] == 2 and results[2] == 6
+    assert isinstance(results[1], ValueError)
+    # The whole batch first, then each row on its own
+    assert model.batches == [[1, 'bad', 3], [1], ['bad'], [3]]
+    assert batcher.stats()['failed_requests'] == 1
+
+
+def test_wrong_result_count_fails_only_the_mismatched_rows():
+    async def short_batch(items):
+        return [0] if len(items) > 1 else [len(items)]
+
+    async def scenario():
+        batcher = MicroBatcher("test", short_batch, max_batch_size=64, max_wait_ms=50)
+        return await asyncio.gather(batcher.submit('a'), batcher.submit('b'))
+
+    assert asyncio.run(scenario()) == [1, 1]
+
+
+@pytest.mark.parametrize('kwargs', [{'max_batch_size': 0}, {'max_wait_ms': -1}])
+def test_invalid_settings_are_rejected(kwargs):
+    async def batch_fn(items):
+        return items
+
+    with pytest.raises(ValueError):
+        MicroBatcher("test", batch_fn, **kwargs)
@@ -0,0 +1,99 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.data_processor import inlier_mask, iqr_bounds, outlier_counts
+from utils.quantile_sketch import LOW_CARDINALITY_MAX_VALUES, ColumnSketches
+
+
+def loop_bounds(df: pd.DataFrame):
+    """The per-column loop validate_data used before iqr_bounds"""
+    lower, upper = [], []
+    for col in df.columns:
+        Q1 = df[col].quantile(0.25)
+        Q3 = df[col].quantile(0.75)
+        IQR = Q3 - Q1
+        lower.append(Q1 - 1.5 * IQR)
+        upper.append(Q3 + 1.5 * IQR)
+    return np.array(lower), np.array(upper)
+
+
+def loop_outliers(df: pd.DataFrame) -> dict:
+    lower, upper = loop_bounds(df)
+    return {col: len(df[(df[col] < low) | (df[col] > high)]) for col, low, high in zip(df.columns, lower, upper)}
+
+
+def make_data(n_rows: int = 20_000, seed: int = 0) -> pd.DataFrame:
+    """Baby weight style columns with spread, missing values and outliers"""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'bwt': rng.normal(120, 18, n_rows),
+        'gestation': rng.normal(280, 15, n_rows),
+        'age': rng.normal(27, 6, n_rows).round(),
+        'weight': rng.lognormal(4.8, 0.2, n_rows),
+        'parity': rng.integers(0, 2, n_rows).astype(float)
+    })
+    for col in ['bwt', 'gestation', 'weight']:
+        df.loc[rng.random(n_rows) < 0.01, col] = np.nan
+    return df
+
+
+def test_bounds_and_counts_match_the_loop():
+    df = make_data()
+    lower, upper = iqr_bounds(df)
+
+    expected_lower, expected_upper = loop_bounds(df)
+    np.testing.assert_allclose(lower, expected_lower)
+    np.testing.assert_allclose(upper, expected_upper)
+    assert outlier_counts(df, lower, upper) == loop_outliers(df)
+
+
+def test_inlier_mask_matches_filtering_on_the_original_bounds():
+    df = make_data()
+    lower, upper = loop_bounds(df)
+    expected = np.ones(len(df), dtype=bool)
+    for col, low, high in zip(df.columns, lower, upper):
+        expected &= ((df[col] >= low) & (df[col] <= high)).to_numpy()
+
+    mask = inlier_mask(df, *iqr_bounds(df))
+    np.testing.assert_array_equal(mask, expected)
+    # Missing values fail the check, as they did in the loop
+    assert not mask[df.isna().any(axis=1).to_numpy()].any()
+
+
+def test_mostly_constant_flag_column_is_not_fenced():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({'bwt': rng.normal(120, 18, 1000), 'smoke': (rng.random(1000) < 0.1).astype(float)})
+
+    lower, upper = iqr_bounds(df)
+    assert (lower[1], upper[1]) == (-np.inf, np.inf)
+    assert outlier_counts(df, lower, upper)['smoke'] == 0
+    # The loop fenced at 0 and flagged every smoker
+    assert loop_outliers(df)['smoke'] == int(df['smoke'].sum())
+
+
+def test_zero_iqr_column_with_many_values_keeps_its_fences():
+    # Mostly one value, plus a long tail of distinct ones: fenced like the loop did
+    values = np.concatenate([np.full(900, 5.0), np.arange(100, 100 + 4 * LOW_CARDINALITY_MAX_VALUES)])
+    df = pd.DataFrame({'dose': values})
+
+    lower, upper = iqr_bounds(df)
+    assert (lower[0], upper[0]) == (5.0, 5.0)
+    assert outlier_counts(df, lower, upper) == loop_outliers(df) == {'dose': 4 * LOW_CARDINALITY_MAX_VALUES}
+
+
+@pytest.mark.parametrize('n_values,exempt', [(2, True), (LOW_CARDINALITY_MAX_VALUES, True),
+                                             (LOW_CARDINALITY_MAX_VALUES + 1, False)])
+def test_sketch_bounds_agree_on_the_exemption(n_values, exempt):
+    values = np.concatenate([np.zeros(900), np.arange(1, n_values).repeat(3)])
+    df = pd.DataFrame({'code': values})
+
+    sketches = ColumnSketches()
+    for start in range(0, len(df), 250):
+        sketches.add(df.iloc[start:start + 250], ['code'])
+
+    lower, upper = iqr_bounds(df)
+    sketch_lower, sketch_upper = sketches.bounds(['code'])
+    np.testing.assert_array_equal(sketch_lower, lower)
+    np.testing.assert_array_equal(sketch_upper, upper)
+    assert np.isinf(upper[0]) == exempt
@@ -0,0 +1,120 @@
+import asyncio
+import threading
+
+import numpy as np
+import pytest
+
+import utils.prediction_cache
+from utils.prediction_cache import PredictionCache
+
+
+class CountingModel:
+    """Scores rows as their sum, counting the rows it was asked for"""
+
+    def __init__(self):
+        self.rows = 0
+
+    async def __call__(self, X: np.ndarray) -> np.ndarray:
+        self.rows += len(X)
+        return X.sum(axis=1)
+
+
+def rows(*values) -> np.ndarray:
+    return np.array([[value, value / 2] for value in values], dtype=float)
+
+
+def test_only_uncached_rows_are_computed():
+    async def scenario():
+        cache, model = PredictionCache("test"), CountingModel()
+        first = await cache.get_or_compute("v1", rows(1, 2), model)
+        second = await cache.get_or_compute("v1", rows(2, 3), model)
+        other_version = await cache.get_or_compute("v2", rows(2), model)
+        await cache.close()
+        return cache, model, first, second, other_version
+
+    cache, model, first, second, other_version = asyncio.run(scenario())
+    np.testing.assert_array_equal(first, [1.5, 3.0])
+    np.testing.assert_array_equal(second, [3.0, 4.5])
+    np.testing.assert_array_equal(other_version, [3.0])
+    assert model.rows == 4
+    assert cache.stats()['hits'] == 1
+
+
+def test_shared_file_serves_rows_scored_by_another_worker(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+
+    async def scenario():
+        writer, reader, model = PredictionCache("test", path=path), PredictionCache("test", path=path), CountingModel()
+        await writer.get_or_compute("v1", rows(1, 2), model)
+        await writer.close()
+        outputs = await reader.get_or_compute("v1", rows(1, 2, 3), model)
+        await reader.close()
+        return reader, model, outputs
+
+    reader, model, outputs = asyncio.run(scenario())
+    np.testing.assert_array_equal(outputs, [1.5, 3.0, 4.5])
+    assert model.rows == 3
+    assert reader.stats()['shared_hits'] == 2
+
+
+def test_shared_reads_and_writes_stay_off_the_event_loop(tmp_path, monkeypatch):
+    threads = []
+    get_shared, put_shared = PredictionCache._get_shared, PredictionCache._put_shared
+
+    def record(method):
+        def wrapper(self, *args):
+            threads.append(threading.get_ident())
+            return method(self, *args)
+        return wrapper
+
+    monkeypatch.setattr(PredictionCache, '_get_shared', record(get_shared))
+    monkeypatch.setattr(PredictionCache, '_put_shared', record(put_shared))
+
+    async def scenario():
+        cache = PredictionCache("test", path=str(tmp_path / "cache.sqlite"))
+        await cache.get_or_compute("v1", rows(1), CountingModel())
+        await cache.close()
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(scenario())
+    assert len(threads) == 2 and loop_thread not in threads
+
+
+def test_shared_file_is_trimmed_every_few_hundred_writes(tmp_path, monkeypatch):
+    monkeypatch.setattr(utils.prediction_cache, 'SHARED_TRIM_EVERY', 10)
+    trims = []
+    trim_shared = PredictionCache._trim_shared
+
+    def counting_trim(self):
+        trims.append(1)
+        trim_shared(self)
+
+    monkeypatch.setattr(PredictionCache, '_trim_shared', counting_trim)
+
+    cache = PredictionCache("test", max_entries=5, path=str(tmp_path / "cache.sqlite"))
+    for start in range(0, 24, 4):
+        X = rows(*range(start, start + 4))
+        keys, _ = cache.get_many("v1", X)
+        cache.put_many("v1", keys, X.sum(axis=1))
+
+    # 24 rows written: trimmed after the 12th and the 24th
+    assert len(trims) == 2
+    assert cache._db.execute(f"SELECT COUNT(*) FROM {cache._table}").fetchone()[0] == 5
+    asyncio.run(cache.close())
+
+
+def test_invalidate_keeps_only_the_served_version(tmp_path):
+    cache = PredictionCache("test", path=str(tmp_path / "cache.sqlite"))
+    for version in ("v1", "v2"):
+        keys, _ = cache.get_many(version, rows(1))
+        cache.put_many(version, keys, [1.5])
+
+    cache.invalidate(keep_version="v2")
+    assert cache.get_many("v1", rows(1))[1] == [None]
+    assert cache.get_many("v2", rows(1))[1] == [1.5]
+    asyncio.run(cache.close())
+
+
+def test_max_entries_below_one_is_rejected():
+    with pytest.raises(ValueError):
+        PredictionCache("test", max_entries=0)
@@ -0,0 +1,89 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.quantile_sketch import ColumnSketches, KLLSketch, kll_rank_error
+
+FRACTIONS = np.linspace(0.01, 0.99, 99)
+
+
+def rank_errors(sketch: KLLSketch, data: np.ndarray) -> np.ndarray:
+    """How far, as a fraction of the data, each reported quantile is from its target rank"""
+    data = np.sort(data)
+    values = sketch.quantiles(FRACTIONS)
+    low = np.searchsorted(data, values, side='left') / len(data)
+    high = np.searchsorted(data, values, side='right') / len(data)
+    # Any rank the value occupies counts (ties span several ranks)
+    return np.where(FRACTIONS < low, low - FRACTIONS, np.where(FRACTIONS > high, FRACTIONS - high, 0.0))
+
+
+def heavy_tailed(n_rows: int, seed: int) -> np.ndarray:
+    return np.random.default_rng(seed).lognormal(3.0, 1.0, n_rows)
+
+
+@pytest.mark.parametrize('k', [50, 200])
+def test_quantiles_stay_within_the_rank_error(k):
+    data = heavy_tailed(200_000, seed=k)
+    sketch = KLLSketch(k, seed=0)
+    for chunk in np.array_split(data, 37):
+        sketch.update(chunk)
+
+    assert sketch.n == len(data)
+    assert sketch.retained < len(data) / 50
+    assert rank_errors(sketch, data).max() <= kll_rank_error(k)
+
+
+def test_sketch_weight_adds_up_to_the_row_count():
+    sketch = KLLSketch(seed=0)
+    sketch.update(heavy_tailed(12_345, seed=1))
+    assert sum(len(items) * 2 ** level for level, items in enumerate(sketch.levels)) == 12_345
+
+
+def test_merged_sketches_match_one_sketch_of_all_rows():
+    parts = [heavy_tailed(n_rows, seed) for seed, n_rows in enumerate([80_000, 5_000, 120_000, 1])]
+    merged = KLLSketch(seed=0)
+    for part in parts:
+        sketch = KLLSketch(seed=1)
+        sketch.update(part)
+        merged.merge(sketch)
+
+    data = np.concatenate(parts)
+    assert merged.n == len(data)
+    assert (merged.min, merged.max) == (data.min(), data.max())
+    assert rank_errors(merged, data).max() <= kll_rank_error(merged.k)
+
+
+def test_merging_an_empty_sketch_changes_nothing():
+    sketch = KLLSketch(seed=0)
+    sketch.update(np.arange(1000.0))
+    before = sketch.to_dict()
+    sketch.merge(KLLSketch())
+    assert sketch.to_dict() == before
+
+
+def test_small_inputs_are_exact_and_missing_values_ignored():
+    sketch = KLLSketch(seed=0)
+    sketch.update([5.0, np.nan, 1.0, 3.0, 2.0, 4.0])
+    assert sketch.n == 5
+    np.testing.assert_array_equal(sketch.quantiles([0.0, 0.2, 0.6, 1.0]), [1.0, 1.0, 3.0, 5.0])
+    assert np.isnan(KLLSketch().quantiles([0.5])).all()
+
+
+def test_serialized_sketches_round_trip():
+    sketches = ColumnSketches(k=100)
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({'weight': rng.normal(70, 10, 50_000), 'flag': rng.integers(0, 2, 50_000)})
+    sketches.add(df, ['weight', 'flag'])
+
+    restored = ColumnSketches.from_dict(json.loads(json.dumps(sketches.to_dict())))
+    for col in ['weight', 'flag']:
+        np.testing.assert_array_equal(restored.sketches[col].quantiles(FRACTIONS),
+                                      sketches.sketches[col].quantiles(FRACTIONS))
+    np.testing.assert_array_equal(restored.bounds(['weight', 'flag']), sketches.bounds(['weight', 'flag']))
+
+
+def test_k_below_the_minimum_is_rejected():
+    with pytest.raises(ValueError):
+        KLLSketch(k=4)
@@ -0,0 +1,108 @@
+import os
+
+import numpy as np
+import pytest
+from sklearn.linear_model import LinearRegression
+from sklearn.preprocessing import StandardScaler
+
+from models.inference import compile_fused_model
+from models.registry import ModelBundle, ModelRegistry
+
+FEATURES = ['a', 'b', 'c']
+
+
+def make_bundle(seed: int = 0) -> ModelBundle:
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(50, len(FEATURES)))
+    scaler = StandardScaler().fit(X)
+    model = LinearRegression().fit(scaler.transform(X), X @ [1.0, 2.0, 3.0] + seed)
+    return ModelBundle(model, scaler, FEATURES, metrics={'seed': seed},
+                       fused=compile_fused_model(model, scaler, X))
+
+
+@pytest.fixture
+def registry(tmp_path):
+    return ModelRegistry("test", root=str(tmp_path))
+
+
+def test_saved_version_is_not_served_until_promoted(registry):
+    version = registry.save(make_bundle())
+
+    assert registry.has_version(version)
+    assert registry.current_version() is None
+    with pytest.raises(FileNotFoundError):
+        registry.load()
+
+    registry.promote(version)
+    assert registry.current_version() == version
+    assert registry.load().metrics == {'seed': 0}
+
+
+def test_serving_load_matches_the_full_bundle(registry):
+    bundle = make_bundle()
+    registry.promote(registry.save(bundle))
+    X = np.random.default_rng(1).normal(size=(20, len(FEATURES)))
+
+    full, serving = registry.load(), registry.load_serving()
+    assert serving.model is None
+    np.testing.assert_allclose(serving.inference_model.predict_many(X), full.inference_model.predict_many(X))
+    np.testing.assert_allclose(serving.inference_model.predict_many(X),
+                               bundle.model.predict(bundle.scaler.transform(X)))
+
+
+def test_failed_save_leaves_no_partial_version(registry):
+    registry.promote(registry.save(make_bundle()))
+    before = sorted(os.listdir(registry.versions_dir))
+
+    bundle = make_bundle(1)
+    bundle.fused = lambda rows: rows  # cannot be pickled
+    with pytest.raises(Exception):
+        registry.save(bundle)
+
+    assert sorted(os.listdir(registry.versions_dir)) == before
+    assert not registry.has_version(bundle.version)
+    assert registry.current_version() == before[0]
+
+
+def test_saving_an_existing_version_is_rejected(registry):
+    version = registry.save(make_bundle())
+    with pytest.raises(ValueError):
+        registry.save(ModelBundle(None, None, FEATURES, version=version))
+
+
+def test_promote_unknown_version_keeps_current(registry):
+    version = registry.promote(registry.save(make_bundle()))
+    with pytest.raises(FileNotFoundError):
+        registry.promote("missing")
+    assert registry.current_version() == version
+
+
+def test_rollback_walks_back_through_promotions(registry):
+    first, second, third = (registry.save(make_bundle(seed)) for seed in range(3))
+    for version in (first, second, third):
+        registry.promote(version)
+
+    assert registry.rollback() == second
+    assert registry.current_version() == second
+    assert registry.rollback() == first
+    with pytest.raises(ValueError):
+        registry.rollback()
+    assert registry.current_version() == first
+
+
+def test_pointer_writes_leave_no_temporary_files(registry):
+    for seed in range(2):
+        registry.promote(registry.save(make_bundle(seed)))
+    registry.rollback()
+
+    leftovers = [name for name in os.listdir(registry.root) if name.endswith('.tmp')]
+    leftovers += [name for name in os.listdir(registry.versions_dir) if name.startswith('.staging-')]
+    assert leftovers == []
+
+
+def test_list_versions_marks_the_current_one(registry):
+    versions = [registry.save(make_bundle(seed)) for seed in range(2)]
+    registry.promote(versions[0])
+
+    listed = {metadata['version']: metadata['current'] for metadata in registry.list_versions()}
+    assert listed == {versions[0]: True, versions[1]: False}
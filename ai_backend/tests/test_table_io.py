@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.table_io import (
+    COLUMNAR_FORMATS, PYARROW_AVAILABLE, TableWriter, iter_table, read_table, with_format_extension, write_table
+)
+
+FORMATS = [
+    'csv',
+    pytest.param('parquet', marks=pytest.mark.skipif(not PYARROW_AVAILABLE, reason="needs pyarrow")),
+    pytest.param('feather', marks=pytest.mark.skipif(not PYARROW_AVAILABLE, reason="needs pyarrow")),
+]
+
+
+def make_frame(n_rows: int = 500) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        'case': np.arange(n_rows),
+        'bwt': rng.normal(120, 18, n_rows),
+        'smoke': rng.integers(0, 2, n_rows),
+        'notes': [f"row {i}" for i in range(n_rows)],
+        'weight': rng.normal(130, 20, n_rows)
+    })
+
+
+@pytest.fixture(params=FORMATS)
+def table_path(request, tmp_path):
+    path = with_format_extension(str(tmp_path / "data"), request.param)
+    write_table(make_frame(), path, request.param)
+    return path
+
+
+def test_full_read_round_trips(table_path):
+    pd.testing.assert_frame_equal(read_table(table_path), make_frame())
+
+
+def test_projection_reads_only_the_requested_columns(table_path):
+    df = read_table(table_path, columns=['weight', 'bwt'])
+
+    assert sorted(df.columns) == ['bwt', 'weight']
+    pd.testing.assert_frame_equal(df[['bwt', 'weight']], make_frame()[['bwt', 'weight']])
+
+
+def test_missing_requested_columns_are_absent_for_every_format(table_path):
+    df = read_table(table_path, columns=['bwt', 'gestation'])
+    assert list(df.columns) == ['bwt']
+    assert len(df) == 500
+
+
+@pytest.mark.skipif(not PYARROW_AVAILABLE, reason="needs pyarrow")
+@pytest.mark.parametrize('fmt', COLUMNAR_FORMATS)
+def test_columnar_projection_keeps_stored_dtypes(tmp_path, fmt):
+    path = with_format_extension(str(tmp_path / "data"), fmt)
+    frame = make_frame().astype({'smoke': 'int8', 'bwt': 'float32'})
+    write_table(frame, path, fmt)
+
+    df = read_table(path, columns=['smoke', 'bwt'])
+    assert df.dtypes.to_dict() == {'smoke': np.dtype('int8'), 'bwt': np.dtype('float32')}
+
+
+@pytest.mark.parametrize('fmt', FORMATS)
+def test_chunked_writes_read_back_in_order(tmp_path, fmt):
+    path = with_format_extension(str(tmp_path / "data"), fmt)
+    frame = make_frame()
+    with TableWriter(path, fmt) as writer:
+        for start in range(0, len(frame), 120):
+            writer.write(frame.iloc[start:start + 120])
+
+    assert writer.rows == len(frame) and writer.chunks == 5
+    chunks = list(iter_table(path, chunk_size=200))
+    pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), frame)
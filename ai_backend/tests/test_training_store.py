@@ -0,0 +1,129 @@
+import importlib
+import os
+import pickle
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import utils.training_store
+from utils.table_io import PYARROW_AVAILABLE
+from utils.training_store import TrainingStore
+
+FORMATS = [
+    'csv',
+    pytest.param('parquet', marks=pytest.mark.skipif(not PYARROW_AVAILABLE, reason="needs pyarrow")),
+]
+
+
+def make_rows(start: int, stop: int) -> pd.DataFrame:
+    ids = np.arange(start, stop)
+    return pd.DataFrame({'case': ids, 'bwt': 100.0 + ids % 37, 'smoke': ids % 2})
+
+
+@pytest.fixture(params=FORMATS)
+def store(request, tmp_path):
+    return TrainingStore(root=str(tmp_path), output_format=request.param)
+
+
+def test_duplicates_within_and_across_batches_are_dropped(store):
+    first = pd.concat([make_rows(0, 100), make_rows(50, 60)])
+    assert store.append('baby_weight', first) == {'appended': 100, 'duplicates': 10, 'total_rows': 100, 'parts': 1}
+
+    result = store.append('baby_weight', make_rows(80, 150))
+    assert result == {'appended': 50, 'duplicates': 20, 'total_rows': 150, 'parts': 2}
+
+    stored = store.load('baby_weight')
+    assert len(stored) == 150
+    assert sorted(stored['case'].astype(int)) == list(range(150))
+
+
+def test_column_order_and_integer_dtype_do_not_hide_duplicates(store):
+    store.append('baby_weight', make_rows(0, 20))
+    reordered = make_rows(0, 20)[['smoke', 'bwt', 'case']].astype(float)
+
+    assert store.append('baby_weight', reordered)['appended'] == 0
+
+
+def test_batch_of_only_duplicates_adds_no_part(store):
+    store.append('baby_weight', make_rows(0, 20))
+    assert store.append('baby_weight', make_rows(0, 20))['parts'] == 1
+
+    files = os.listdir(os.path.join(store.root, 'baby_weight'))
+    assert not [name for name in files if name.endswith(('.partial', '.tmp'))]
+
+
+def test_chunks_of_one_append_share_a_part(store):
+    chunks = (make_rows(start, start + 30) for start in (0, 20, 40))
+    assert store.append('baby_weight', chunks) == {'appended': 70, 'duplicates': 20, 'total_rows': 70, 'parts': 1}
+
+
+def test_lost_row_index_is_rebuilt_from_the_parts(store):
+    store.append('baby_weight', make_rows(0, 100))
+    os.remove(os.path.join(store.root, 'baby_weight', TrainingStore.INDEX_FILE))
+
+    assert store.append('baby_weight', make_rows(90, 110))['appended'] == 10
+
+
+def test_data_types_are_deduplicated_separately(store):
+    store.append('baby_weight', make_rows(0, 10))
+    assert store.append('diabetes', make_rows(0, 10))['appended'] == 10
+    assert store.stats()['diabetes']['rows'] == 10
+
+
+def test_load_reads_only_parts_added_since_the_last_call(store, monkeypatch):
+    reads = []
+    read_table = utils.training_store.read_table
+
+    def counting_read_table(path, columns=None):
+        reads.append(path)
+        return read_table(path, columns=columns)
+
+    monkeypatch.setattr(utils.training_store, 'read_table', counting_read_table)
+
+    store.append('baby_weight', make_rows(0, 50))
+    assert len(store.load('baby_weight', columns=['case', 'bwt'])) == 50
+    store.append('baby_weight', make_rows(50, 80))
+    frame = store.load('baby_weight', columns=['case', 'bwt'])
+
+    assert len(frame) == 80 and list(frame.columns) == ['case', 'bwt']
+    assert [os.path.basename(path).split('.')[0] for path in reads] == ['part-00001', 'part-00002']
+    assert len(store.load('baby_weight', parts=1)) == 50
+
+
+def test_pickled_store_arrives_without_loaded_frames(store):
+    store.append('baby_weight', make_rows(0, 10))
+    store.load('baby_weight')
+
+    copy = pickle.loads(pickle.dumps(store))
+    assert copy._loaded == {}
+    assert len(copy.load('baby_weight')) == 10
+
+
+class FakeMsvcrt:
+    """Records msvcrt.locking calls so the Windows lock path can run on any platform"""
+
+    LK_LOCK, LK_UNLCK = 1, 0
+
+    def __init__(self):
+        self.calls = []
+
+    def locking(self, fileno, mode, nbytes):
+        self.calls.append((mode, nbytes))
+
+
+def test_appends_lock_with_msvcrt_when_fcntl_is_missing(tmp_path, monkeypatch):
+    fake = FakeMsvcrt()
+    monkeypatch.setitem(sys.modules, 'fcntl', None)
+    monkeypatch.setitem(sys.modules, 'msvcrt', fake)
+    try:
+        windows_store = importlib.reload(utils.training_store)
+        assert windows_store.fcntl is None
+
+        store = windows_store.TrainingStore(root=str(tmp_path), output_format='csv')
+        assert store.append('baby_weight', make_rows(0, 10))['appended'] == 10
+        assert fake.calls == [(FakeMsvcrt.LK_LOCK, 1), (FakeMsvcrt.LK_UNLCK, 1)]
+    finally:
+        monkeypatch.undo()
+        importlib.reload(utils.training_store)
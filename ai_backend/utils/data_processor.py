@@ -1,26 +1,162 @@
+import asyncio
+import multiprocessing
 import pandas as pd
 import numpy as np
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from loguru import logger
 from typing import Dict, Any, Optional, List
 import shutil
 
+from utils.quantile_sketch import (
+    DEFAULT_K, LOW_CARDINALITY_MAX_VALUES, ColumnSketches, iqr_fences, load_sketches, save_sketches
+)
+from utils.table_io import FORMAT_EXTENSIONS, TableWriter, resolve_format, with_format_extension, write_table
+from utils.training_store import TrainingStore, first_occurrences, row_hashes
+
+# CSV uploads at least this large are processed chunk by chunk instead of being loaded whole
+STREAMING_THRESHOLD_MB = 100
+DEFAULT_CHUNK_SIZE = 100_000
+
+# Format of processed files: "parquet" or "feather" (typed, compressed columns
+# that training reads back without re-parsing), "csv", or "auto" (Parquet when
+# pyarrow is installed, CSV otherwise)
+OUTPUT_FORMAT = "auto"
+
+# Columns of the gestational diabetes exports DiabetesPredictor trains on
+GESTATIONAL_DIABETES_COLUMNS = ['Age', 'Pregnancy No', 'Weight', 'Height', 'BMI', 'Heredity', 'Prediction']
+
+# How streaming estimates the quartiles behind the outlier bounds:
+#   "sample" - reservoir sample of QUANTILE_SAMPLE_SIZE rows (exact for smaller files)
+#   "kll"    - per-column KLL sketches of accuracy KLL_K, persisted next to the output
+QUANTILE_METHOD = "sample"
+QUANTILE_SAMPLE_SIZE = 100_000
+KLL_K = DEFAULT_K
+
+# Worker processes used when process_new_data ingests the whole upload directory
+# (None = one per CPU, 1 = process files one after another in this process)
+INGEST_WORKERS: Optional[int] = None
+
+
+def iqr_bounds(numeric_df: pd.DataFrame):
+    """Lower and upper 1.5 x IQR bounds of every column, from one quantile pass"""
+    quartiles = numeric_df.quantile([0.25, 0.75])
+    q1 = quartiles.loc[0.25].to_numpy(dtype=float)
+    q3 = quartiles.loc[0.75].to_numpy(dtype=float)
+    # Distinct values are only counted for the (few) columns without spread
+    flat = np.flatnonzero(q1 == q3)
+    low_cardinality = np.zeros(len(q1), dtype=bool)
+    if len(flat):
+        low_cardinality[flat] = numeric_df.iloc[:, flat].nunique().to_numpy() <= LOW_CARDINALITY_MAX_VALUES
+    return iqr_fences(q1, q3, low_cardinality)
+
+
+def outlier_counts(numeric_df: pd.DataFrame, lower: np.ndarray, upper: np.ndarray) -> Dict[str, int]:
+    """Values outside the bounds per column (missing values are not outliers)"""
+    counts = {}
+    with np.errstate(invalid='ignore'):
+        # Column views rather than one 2-D copy of the frame
+        for col, low, high in zip(numeric_df.columns, lower, upper):
+            values = numeric_df[col].to_numpy(dtype=float)
+            counts[col] = int(np.count_nonzero((values < low) | (values > high)))
+    return counts
+
+
+def inlier_mask(numeric_df: pd.DataFrame, lower: np.ndarray, upper: np.ndarray) -> np.ndarray:
+    """Rows whose values all sit inside the bounds (a missing value fails the check)"""
+    mask = np.ones(len(numeric_df), dtype=bool)
+    with np.errstate(invalid='ignore'):
+        for col, low, high in zip(numeric_df.columns, lower, upper):
+            values = numeric_df[col].to_numpy(dtype=float)
+            mask &= values >= low
+            mask &= values <= high
+    return mask
+
+
+class _ReservoirSample:
+    """Uniform fixed-size sample of the numeric columns seen so far"""
+    
+    def __init__(self, size: int, seed: int = 42):
+        self.size = size
+        self.seen = 0
+        self.columns: Dict[str, np.ndarray] = {}
+        self._rng = np.random.default_rng(seed)
+    
+    def add(self, df: pd.DataFrame, numeric_columns: List[str]):
+        # A column that turned non-numeric in a later chunk drops out of the sample
+        for col in [col for col in self.columns if col not in numeric_columns]:
+            del self.columns[col]
+        if not self.columns and self.seen == 0:
+            self.columns = {col: np.full(self.size, np.nan) for col in numeric_columns}
+        
+        n_rows = len(df)
+        if n_rows == 0:
+            return
+        
+        # Algorithm R, vectorized: row i of the stream replaces a random slot with probability size / (i + 1)
+        positions = np.arange(self.seen, self.seen + n_rows)
+        slots = np.where(
+            positions < self.size,
+            positions,
+            self._rng.integers(0, np.maximum(positions + 1, 1))
+        )
+        keep = slots < self.size
+        for col, values in self.columns.items():
+            values[slots[keep]] = df[col].to_numpy(dtype=float)[keep]
+        self.seen += n_rows
+    
+    def frame(self) -> pd.DataFrame:
+        n_rows = min(self.seen, self.size)
+        return pd.DataFrame({col: values[:n_rows] for col, values in self.columns.items()})
+    
+    def bounds(self, columns: List[str]):
+        return iqr_bounds(self.frame()[columns])
+
+
 class DataProcessor:
-    def __init__(self, upload_dir: str = "uploads", processed_dir: str = "data/processed"):
+    def __init__(self, upload_dir: str = "uploads", processed_dir: str = "data/processed",
+                 chunk_size: int = DEFAULT_CHUNK_SIZE, streaming_threshold_mb: float = STREAMING_THRESHOLD_MB,
+                 sample_size: int = QUANTILE_SAMPLE_SIZE, quantile_method: str = QUANTILE_METHOD,
+                 sketch_k: int = KLL_K, ingest_workers: Optional[int] = INGEST_WORKERS,
+                 output_format: str = OUTPUT_FORMAT, training_store: Optional[TrainingStore] = None):
+        if quantile_method not in ("sample", "kll"):
+            raise ValueError(f"Unknown quantile method: {quantile_method}")
+        
         self.upload_dir = upload_dir
         self.processed_dir = processed_dir
         self.supported_formats = ['.csv', '.xlsx', '.xls']
+        self.chunk_size = chunk_size
+        self.streaming_threshold_mb = streaming_threshold_mb
+        self.sample_size = sample_size
+        self.quantile_method = quantile_method
+        self.sketch_k = sketch_k
+        self.ingest_workers = ingest_workers or os.cpu_count() or 1
+        self.output_format = resolve_format(output_format)
+        # Consolidated per-type dataset every successfully processed file is appended to
+        self.training_store = training_store
         
         # Create directories if they don't exist
         os.makedirs(self.upload_dir, exist_ok=True)
         os.makedirs(self.processed_dir, exist_ok=True)
     
+    def resolve_data_path(self, file_path: str) -> str:
+        """Absolute path of a data file, which must live under the upload or processed directory"""
+        path = os.path.realpath(file_path)
+        for directory in (self.upload_dir, self.processed_dir):
+            root = os.path.realpath(directory)
+            if os.path.commonpath([path, root]) == root:
+                return path
+        raise ValueError(
+            f"Data file must be under {self.upload_dir}/ or {self.processed_dir}/: {file_path}"
+        )
+    
     def detect_data_type(self, file_path: str) -> str:
         """Detect the type of data in the file"""
         try:
-            df = pd.read_csv(file_path)
-            columns = df.columns.tolist()
+            # The header is all that's needed
+            columns = pd.read_csv(file_path, nrows=0).columns.tolist()
             
             # Check for baby weight data columns
             baby_weight_columns = ['case', 'bwt', 'gestation', 'parity', 'age', 'height', 'weight', 'smoke']
@@ -32,6 +168,10 @@ class DataProcessor:
             if all(col in columns for col in diabetes_columns):
                 return 'diabetes'
             
+            # Gestational diabetes exports in the layout DiabetesPredictor trains on
+            if all(col in columns for col in GESTATIONAL_DIABETES_COLUMNS):
+                return 'diabetes'
+            
             return 'unknown'
             
         except Exception as e:
@@ -56,17 +196,13 @@ class DataProcessor:
             # Check data types
             validation_results['data_types'] = df.dtypes.to_dict()
             
-            # Check for outliers (basic check)
-            numeric_columns = df.select_dtypes(include=[np.number]).columns
-            for col in numeric_columns:
-                Q1 = df[col].quantile(0.25)
-                Q3 = df[col].quantile(0.75)
-                IQR = Q3 - Q1
-                outliers = df[(df[col] < Q1 - 1.5 * IQR) | (df[col] > Q3 + 1.5 * IQR)]
-                validation_results['outliers'][col] = len(outliers)
+            # Check for outliers (basic check): all quartiles in one pass
+            numeric_df = df.select_dtypes(include=[np.number])
+            lower, upper = iqr_bounds(numeric_df)
+            validation_results['outliers'] = outlier_counts(numeric_df, lower, upper)
             
             # Calculate quality score
-            quality_score = self._calculate_quality_score(df, validation_results)
+            quality_score = self._calculate_quality_score(validation_results)
             validation_results['quality_score'] = quality_score
             
             return validation_results
@@ -75,19 +211,19 @@ class DataProcessor:
             logger.error(f"Error validating data: {e}")
             return {'error': str(e)}
     
-    def _calculate_quality_score(self, df: pd.DataFrame, validation_results: Dict) -> float:
+    def _calculate_quality_score(self, validation_results: Dict) -> float:
         """Calculate a data quality score"""
         try:
             total_records = validation_results['total_records']
             missing_values = validation_results['missing_values']
             
-            # Calculate missing value percentage
+            # Calculate missing value percentage (one missing-value count per column)
             total_missing = sum(missing_values.values())
-            missing_percentage = total_missing / (total_records * len(df.columns))
+            missing_percentage = total_missing / (total_records * len(missing_values))
             
-            # Calculate outlier percentage
+            # Calculate outlier percentage (one outlier count per numeric column)
             total_outliers = sum(validation_results['outliers'].values())
-            outlier_percentage = total_outliers / (total_records * len(df.select_dtypes(include=[np.number]).columns))
+            outlier_percentage = total_outliers / (total_records * len(validation_results['outliers']))
             
             # Quality score based on missing values and outliers
             quality_score = 1.0 - (missing_percentage * 0.7 + outlier_percentage * 0.3)
@@ -107,35 +243,12 @@ class DataProcessor:
             cleaned_df = cleaned_df.drop_duplicates()
             
             # Handle missing values based on data type
-            if data_type == 'baby_weight':
-                # For baby weight data, remove rows with missing critical values
-                critical_columns = ['bwt', 'gestation', 'age', 'height', 'weight']
-                cleaned_df = cleaned_df.dropna(subset=critical_columns)
-                
-                # Fill missing values for non-critical columns
-                cleaned_df['parity'] = cleaned_df['parity'].fillna(0)
-                cleaned_df['smoke'] = cleaned_df['smoke'].fillna(0)
-                
-            elif data_type == 'diabetes':
-                # For diabetes data, remove rows with missing critical values
-                critical_columns = ['age', 'bmi', 'glucose', 'diabetes_diagnosis']
-                cleaned_df = cleaned_df.dropna(subset=critical_columns)
-                
-                # Fill missing values for non-critical columns
-                cleaned_df['family_history'] = cleaned_df['family_history'].fillna(0)
-                cleaned_df['previous_gd'] = cleaned_df['previous_gd'].fillna(0)
-                cleaned_df['pregnancy_weeks'] = cleaned_df['pregnancy_weeks'].fillna(24)
-            
-            # Remove outliers for numeric columns
-            numeric_columns = cleaned_df.select_dtypes(include=[np.number]).columns
-            for col in numeric_columns:
-                Q1 = cleaned_df[col].quantile(0.25)
-                Q3 = cleaned_df[col].quantile(0.75)
-                IQR = Q3 - Q1
-                cleaned_df = cleaned_df[
-                    (cleaned_df[col] >= Q1 - 1.5 * IQR) & 
-                    (cleaned_df[col] <= Q3 + 1.5 * IQR)
-                ]
+            cleaned_df = self._handle_missing_values(cleaned_df, data_type)
+            
+            # Remove outliers for numeric columns with a single row mask
+            numeric_df = cleaned_df.select_dtypes(include=[np.number])
+            lower, upper = iqr_bounds(numeric_df)
+            cleaned_df = cleaned_df[inlier_mask(numeric_df, lower, upper)]
             
             return cleaned_df
             
@@ -143,15 +256,49 @@ class DataProcessor:
             logger.error(f"Error cleaning data: {e}")
             raise e
     
+    def _handle_missing_values(self, df: pd.DataFrame, data_type: str) -> pd.DataFrame:
+        """Drop rows missing critical values and fill the rest"""
+        if data_type == 'baby_weight':
+            # For baby weight data, remove rows with missing critical values
+            critical_columns = ['bwt', 'gestation', 'age', 'height', 'weight']
+            df = df.dropna(subset=critical_columns)
+            
+            # Fill missing values for non-critical columns
+            df = df.assign(
+                parity=df['parity'].fillna(0),
+                smoke=df['smoke'].fillna(0)
+            )
+            
+        elif data_type == 'diabetes' and 'Prediction' in df.columns:
+            # Gestational diabetes export: age, BMI and outcome are critical
+            df = df.dropna(subset=['Age', 'BMI', 'Prediction'])
+            df = df.assign(Heredity=df['Heredity'].fillna(0))
+            
+        elif data_type == 'diabetes':
+            # For diabetes data, remove rows with missing critical values
+            critical_columns = ['age', 'bmi', 'glucose', 'diabetes_diagnosis']
+            df = df.dropna(subset=critical_columns)
+            
+            # Fill missing values for non-critical columns
+            df = df.assign(
+                family_history=df['family_history'].fillna(0),
+                previous_gd=df['previous_gd'].fillna(0),
+                pregnancy_weeks=df['pregnancy_weeks'].fillna(24)
+            )
+        
+        return df
+    
+    def _processed_path(self, data_type: str, original_filename: str) -> str:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        filename = with_format_extension(f"{data_type}_{timestamp}_{original_filename}", self.output_format)
+        return os.path.join(self.processed_dir, filename)
+    
     def save_processed_data(self, df: pd.DataFrame, data_type: str, original_filename: str) -> str:
         """Save processed data to the processed directory"""
         try:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"{data_type}_{timestamp}_{original_filename}"
-            file_path = os.path.join(self.processed_dir, filename)
+            file_path = self._processed_path(data_type, original_filename)
             
-            # Save as CSV
-            df.to_csv(file_path, index=False)
+            write_table(df, file_path, self.output_format)
             
             logger.info(f"Processed data saved to: {file_path}")
             return file_path
@@ -165,28 +312,113 @@ class DataProcessor:
         try:
             if file_path is None:
                 # Process all files in upload directory
-                files = [f for f in os.listdir(self.upload_dir) 
-                        if any(f.endswith(ext) for ext in self.supported_formats)]
+                files = sorted(f for f in os.listdir(self.upload_dir) 
+                               if any(f.endswith(ext) for ext in self.supported_formats))
                 
                 if not files:
                     return {'message': 'No data files found in upload directory'}
                 
-                results = []
-                for filename in files:
-                    file_path = os.path.join(self.upload_dir, filename)
-                    result = await self._process_single_file(file_path)
-                    results.append(result)
+                file_paths = [os.path.join(self.upload_dir, filename) for filename in files]
+                started = time.perf_counter()
+                if self.ingest_workers > 1 and len(file_paths) > 1:
+                    results = await self._process_parallel(file_paths)
+                else:
+                    results = [await self._process_single_file(path) for path in file_paths]
+                await asyncio.to_thread(self._add_to_training_store, results)
                 
-                return {'processed_files': results}
+                return {
+                    'processed_files': results,
+                    'summary': self._ingestion_summary(results, time.perf_counter() - started)
+                }
             else:
-                return await self._process_single_file(file_path)
+                result = await self._process_single_file(file_path)
+                await asyncio.to_thread(self._add_to_training_store, [result])
+                return result
                 
         except Exception as e:
             logger.error(f"Error processing new data: {e}")
             return {'error': str(e)}
     
+    async def _process_parallel(self, file_paths: List[str]) -> List[Dict[str, Any]]:
+        """Process independent files concurrently on a pool of worker processes.
+        
+        Each file succeeds or fails on its own: an exception, or a worker that
+        dies outright, turns into an error entry for that file only.
+        """
+        workers = min(self.ingest_workers, len(file_paths))
+        logger.info(f"Ingesting {len(file_paths)} files on {workers} worker processes")
+        
+        loop = asyncio.get_running_loop()
+        # Spawned rather than forked so workers do not inherit the server's threads
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            futures = [loop.run_in_executor(pool, self._process_file, path) for path in file_paths]
+            outcomes = await asyncio.gather(*futures, return_exceptions=True)
+        
+        results = []
+        for path, outcome in zip(file_paths, outcomes):
+            if isinstance(outcome, BaseException):
+                logger.error(f"Worker failed on {path}: {outcome!r}")
+                outcome = {
+                    'filename': os.path.basename(path),
+                    'status': 'error',
+                    'message': f"Worker failed: {outcome!r}"
+                }
+            results.append(outcome)
+        return results
+    
+    def _add_to_training_store(self, results: List[Dict[str, Any]]):
+        """Append successfully processed files to the consolidated training data.
+        
+        Runs in this process after any parallel workers finish, one file at a
+        time, so the store's row index sees every batch in order.
+        """
+        if self.training_store is None:
+            return
+        
+        for result in results:
+            if result.get('status') != 'success':
+                continue
+            try:
+                result['training_store'] = self.training_store.append_file(result['data_type'], result['processed_file'])
+            except Exception as e:
+                logger.error(f"Error adding {result['filename']} to the training store: {e}")
+                result['training_store'] = {'error': str(e)}
+    
+    def _ingestion_summary(self, results: List[Dict[str, Any]], wall_seconds: float) -> Dict[str, Any]:
+        succeeded = [result for result in results if result.get('status') == 'success']
+        file_seconds = sum(result.get('seconds', 0.0) for result in results)
+        summary = {
+            'files': len(results),
+            'succeeded': len(succeeded),
+            'failed': len(results) - len(succeeded),
+            'failed_files': [result['filename'] for result in results if result.get('status') != 'success'],
+            'original_records': sum(result['original_records'] for result in succeeded),
+            'processed_records': sum(result['processed_records'] for result in succeeded),
+            'training_rows_appended': sum(result.get('training_store', {}).get('appended', 0) for result in succeeded),
+            'workers': min(self.ingest_workers, len(results)),
+            'wall_seconds': round(wall_seconds, 3),
+            'file_seconds': round(file_seconds, 3),
+            'speedup': round(file_seconds / wall_seconds, 2) if wall_seconds > 0 else None
+        }
+        
+        # Files sketched during streaming combine into bounds over the whole batch
+        sketch_files = [result['sketch_file'] for result in succeeded if 'sketch_file' in result]
+        if sketch_files:
+            summary['outlier_bounds'] = self.merged_bounds(sketch_files)
+        
+        logger.info(
+            f"Ingested {summary['succeeded']}/{summary['files']} files in {summary['wall_seconds']}s "
+            f"({summary['file_seconds']}s of file work, {summary['workers']} workers)"
+        )
+        return summary
+    
     async def _process_single_file(self, file_path: str) -> Dict[str, Any]:
-        """Process a single data file"""
+        """Process a single data file on a worker thread so the event loop keeps serving requests"""
+        return await asyncio.to_thread(self._process_file, file_path)
+    
+    def _process_file(self, file_path: str) -> Dict[str, Any]:
+        """Blocking body of _process_single_file; also what ingestion workers run"""
+        started = time.perf_counter()
         try:
             filename = os.path.basename(file_path)
             logger.info(f"Processing file: {filename}")
@@ -197,20 +429,31 @@ class DataProcessor:
                 return {
                     'filename': filename,
                     'status': 'error',
-                    'message': 'Unknown data format'
+                    'message': 'Unknown data format',
+                    'seconds': round(time.perf_counter() - started, 3)
                 }
             
-            # Load data
-            df = pd.read_csv(file_path)
-            
-            # Validate data
-            validation_results = self.validate_data(df, data_type)
-            
-            # Clean data
-            cleaned_df = self.clean_data(df, data_type)
-            
-            # Save processed data
-            processed_file_path = self.save_processed_data(cleaned_df, data_type, filename)
+            if self._should_stream(file_path):
+                # Large export: bounded-memory chunked pipeline
+                summary = self._process_streaming(file_path, data_type, filename)
+            else:
+                # Load data
+                df = pd.read_csv(file_path)
+                
+                # Validate data
+                validation_results = self.validate_data(df, data_type)
+                
+                # Clean data
+                cleaned_df = self.clean_data(df, data_type)
+                
+                # Save processed data
+                summary = {
+                    'original_records': len(df),
+                    'processed_records': len(cleaned_df),
+                    'validation_results': validation_results,
+                    'processed_file': self.save_processed_data(cleaned_df, data_type, filename)
+                }
+            validation_results = summary['validation_results']
             
             # Move original file to processed directory
             processed_original_path = os.path.join(
@@ -219,25 +462,180 @@ class DataProcessor:
             )
             shutil.move(file_path, processed_original_path)
             
-            return {
+            result = {
                 'filename': filename,
                 'data_type': data_type,
                 'status': 'success',
-                'original_records': len(df),
-                'processed_records': len(cleaned_df),
+                'original_records': summary['original_records'],
+                'processed_records': summary['processed_records'],
                 'quality_score': validation_results['quality_score'],
-                'processed_file': processed_file_path,
-                'validation_results': validation_results
+                'processed_file': summary['processed_file'],
+                'validation_results': validation_results,
+                'seconds': round(time.perf_counter() - started, 3)
             }
+            for key in ('chunks', 'sketch_file', 'quantile_rank_error'):
+                if key in summary:
+                    result[key] = summary[key]
+            return result
             
         except Exception as e:
             logger.error(f"Error processing file {file_path}: {e}")
             return {
                 'filename': os.path.basename(file_path),
                 'status': 'error',
-                'message': str(e)
+                'message': str(e),
+                'seconds': round(time.perf_counter() - started, 3)
             }
     
+    def _should_stream(self, file_path: str) -> bool:
+        """Chunk CSV files at or above the streaming threshold"""
+        if not file_path.endswith('.csv'):
+            return False
+        return os.path.getsize(file_path) >= self.streaming_threshold_mb * 1024 * 1024
+    
+    def _read_chunks(self, file_path: str):
+        return pd.read_csv(file_path, chunksize=self.chunk_size)
+    
+    @staticmethod
+    def _merge_dtype(current, new):
+        if current is None or current == new:
+            return new
+        if pd.api.types.is_numeric_dtype(current) and pd.api.types.is_numeric_dtype(new):
+            return np.result_type(current, new)
+        return np.dtype(object)
+    
+    @staticmethod
+    def _first_occurrences(df: pd.DataFrame, seen: np.ndarray):
+        """Mask of rows not seen earlier in the stream, plus the updated sorted hash set.
+        
+        Only one 8-byte hash per distinct row is kept, so deduplication stays
+        far smaller than the data even though it spans every chunk.
+        """
+        return first_occurrences(row_hashes(df), seen)
+    
+    def _quantile_estimator(self):
+        if self.quantile_method == "kll":
+            return ColumnSketches(self.sketch_k)
+        return _ReservoirSample(self.sample_size)
+    
+    def _process_streaming(self, file_path: str, data_type: str, filename: str) -> Dict[str, Any]:
+        """Validate, clean and save a CSV in two chunked passes with bounded memory.
+        
+        Pass 1 gathers the validation counts and quartile estimators (reservoir
+        samples or KLL sketches) of the raw and the pre-outlier-filter rows;
+        their quartiles give the outlier bounds. Pass 2 counts outliers
+        against the raw bounds and cleans each chunk against the cleaning
+        bounds, appending it to the output file as it goes.
+        """
+        logger.info(f"Streaming {filename} in chunks of {self.chunk_size} rows")
+        
+        # Pass 1: counts, missing values, dtypes and quartile estimates
+        total_records = 0
+        chunks = 0
+        missing_values: Dict[str, int] = {}
+        data_types: Dict[str, Any] = {}
+        raw_quantiles = self._quantile_estimator()
+        clean_quantiles = self._quantile_estimator()
+        seen = np.empty(0, dtype=np.uint64)
+        
+        for chunk in self._read_chunks(file_path):
+            chunks += 1
+            total_records += len(chunk)
+            for col, count in chunk.isnull().sum().items():
+                missing_values[col] = missing_values.get(col, 0) + int(count)
+            for col, dtype in chunk.dtypes.items():
+                data_types[col] = self._merge_dtype(data_types.get(col), dtype)
+            
+            numeric_columns = [col for col, dtype in data_types.items() if pd.api.types.is_numeric_dtype(dtype)]
+            raw_quantiles.add(chunk, numeric_columns)
+            
+            first, seen = self._first_occurrences(chunk, seen)
+            cleaned = self._handle_missing_values(chunk[first], data_type)
+            clean_quantiles.add(cleaned, numeric_columns)
+        
+        numeric_columns = [col for col, dtype in data_types.items() if pd.api.types.is_numeric_dtype(dtype)]
+        raw_bounds = raw_quantiles.bounds(numeric_columns)
+        cleaning_bounds = clean_quantiles.bounds(numeric_columns)
+        
+        # Pass 2: outlier counts, cleaning and incremental output
+        outliers = {col: 0 for col in numeric_columns}
+        processed_file_path = self._processed_path(data_type, filename)
+        partial_path = f"{processed_file_path}.partial"
+        seen = np.empty(0, dtype=np.uint64)
+        # Columnar files need one schema for every chunk: use the dtypes merged in pass 1
+        output_dtypes = data_types if self.output_format != 'csv' else {}
+        try:
+            with TableWriter(partial_path, self.output_format) as writer:
+                for chunk in self._read_chunks(file_path):
+                    for col, count in outlier_counts(chunk[numeric_columns], *raw_bounds).items():
+                        outliers[col] += count
+                    
+                    first, seen = self._first_occurrences(chunk, seen)
+                    cleaned = self._handle_missing_values(chunk[first], data_type)
+                    cleaned = cleaned[inlier_mask(cleaned[numeric_columns], *cleaning_bounds)]
+                    
+                    writer.write(cleaned.astype(output_dtypes))
+            processed_records = writer.rows
+            
+            # Publish the output only once it is complete
+            os.replace(partial_path, processed_file_path)
+        except Exception:
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+            raise
+        
+        validation_results = {
+            'total_records': total_records,
+            'missing_values': missing_values,
+            'data_types': data_types,
+            'outliers': outliers,
+            'quality_score': 0.0
+        }
+        validation_results['quality_score'] = self._calculate_quality_score(validation_results)
+        
+        logger.info(f"Processed data saved to: {processed_file_path} ({chunks} chunks)")
+        summary = {
+            'original_records': total_records,
+            'processed_records': processed_records,
+            'validation_results': validation_results,
+            'processed_file': processed_file_path,
+            'chunks': chunks
+        }
+        
+        if self.quantile_method == "kll":
+            # Keep the sketches so bounds across many uploads can be merged later
+            sketch_path = f"{processed_file_path}.sketch.json"
+            save_sketches(
+                sketch_path,
+                {'raw': raw_quantiles, 'cleaned': clean_quantiles},
+                source=filename,
+                data_type=data_type,
+                rank_error=raw_quantiles.rank_error
+            )
+            summary['sketch_file'] = sketch_path
+            summary['quantile_rank_error'] = round(raw_quantiles.rank_error, 5)
+        
+        return summary
+    
+    @staticmethod
+    def merged_bounds(sketch_files: List[str], which: str = 'raw') -> Dict[str, Any]:
+        """Global outlier bounds from the KLL sketches saved with several processed files.
+        
+        Merging is exact bookkeeping on the sketches, so the merged quartiles
+        carry the same rank error guarantee as a single sketch over all rows.
+        """
+        merged = ColumnSketches(KLL_K)
+        for path in sketch_files:
+            merged.merge(load_sketches(path)[which])
+        
+        columns = list(merged.sketches)
+        lower, upper = merged.bounds(columns)
+        return {
+            'bounds': {col: (float(low), float(high)) for col, low, high in zip(columns, lower, upper)},
+            'rows': {col: merged.sketches[col].n for col in columns},
+            'rank_error': merged.rank_error
+        }
+    
     def get_data_summary(self) -> Dict[str, Any]:
         """Get summary of processed data"""
         try:
@@ -259,7 +657,7 @@ class DataProcessor:
             if os.path.exists(self.processed_dir):
                 summary['processed_files'] = [
                     f for f in os.listdir(self.processed_dir) 
-                    if f.endswith('.csv')
+                    if f.endswith(tuple(FORMAT_EXTENSIONS.values()))
                 ]
             
             return summary
@@ -0,0 +1,161 @@
+import asyncio
+import time
+from loguru import logger
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+
+class MicroBatcher:
+    """Coalesce concurrent single-row requests into one vectorized model call.
+
+    Requests are queued until either ``max_batch_size`` rows are waiting or
+    ``max_wait_ms`` has passed since the first queued row, then handed to
+    ``batch_fn`` as one list. When no batch is in flight the queue is flushed
+    on the next event loop iteration instead of waiting for the full window,
+    so an idle server does not add the window to every request's latency.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        batch_fn: Callable[[List[Any]], Awaitable[List[Any]]],
+        max_batch_size: int = 64,
+        max_wait_ms: float = 5.0,
+        adaptive: bool = True,
+    ):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        if max_wait_ms < 0:
+            raise ValueError("max_wait_ms cannot be negative")
+
+        self.name = name
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.adaptive = adaptive
+
+        self._pending: List[Tuple[Any, asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.Handle] = None
+        self._in_flight = 0
+        self._tasks: set = set()
+
+        # Counters exposed through stats()
+        self._total_requests = 0
+        self._total_batched_rows = 0
+        self._total_batches = 0
+        self._total_failures = 0
+        self._max_observed_batch = 0
+        self._max_observed_queue = 0
+        self._total_batch_seconds = 0.0
+        self._batch_size_histogram: Dict[int, int] = {}
+
+    async def submit(self, item: Any) -> Any:
+        """Queue a single request and wait for its result"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        self._pending.append((item, future))
+        self._total_requests += 1
+        self._max_observed_queue = max(self._max_observed_queue, len(self._pending))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            if self.adaptive and self._in_flight == 0:
+                # Idle: only gather requests that arrived in this loop iteration
+                self._flush_handle = loop.call_soon(self._flush)
+            else:
+                self._flush_handle = loop.call_later(self.max_wait_ms / 1000, self._flush)
+
+        return await future
+
+    def _flush(self):
+        """Dispatch everything queued so far, in chunks of at most max_batch_size"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        while self._pending:
+            batch = self._pending[:self.max_batch_size]
+            self._pending = self._pending[self.max_batch_size:]
+
+            self._in_flight += 1
+            task = asyncio.ensure_future(self._run_batch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, batch: List[Tuple[Any, asyncio.Future]]):
+        """Score one batch and fan the results back out to the waiting callers"""
+        items = [item for item, _ in batch]
+        started = time.perf_counter()
+
+        try:
+            try:
+                results = await self.batch_fn(items)
+                if len(results) != len(items):
+                    raise RuntimeError(
+                        f"{self.name} batch returned {len(results)} results for {len(items)} requests"
+                    )
+                outcomes = [(result, None) for result in results]
+            except Exception as e:
+                if len(items) == 1:
+                    outcomes = [(None, e)]
+                else:
+                    # Retry row by row so one bad request does not fail its neighbours
+                    logger.warning(f"{self.name} batch of {len(items)} failed ({e}), retrying rows individually")
+                    outcomes = []
+                    for item in items:
+                        try:
+                            outcomes.append(((await self.batch_fn([item]))[0], None))
+                        except Exception as row_error:
+                            outcomes.append((None, row_error))
+
+            for (_, future), (result, error) in zip(batch, outcomes):
+                if future.done():
+                    # Caller went away (e.g. client disconnect)
+                    continue
+                if error is not None:
+                    self._total_failures += 1
+                    future.set_exception(error)
+                else:
+                    future.set_result(result)
+        finally:
+            self._in_flight -= 1
+            self._total_batches += 1
+            self._total_batched_rows += len(items)
+            self._total_batch_seconds += time.perf_counter() - started
+            self._max_observed_batch = max(self._max_observed_batch, len(items))
+            self._batch_size_histogram[len(items)] = self._batch_size_histogram.get(len(items), 0) + 1
+
+            # Requests that queued up behind this batch were waiting on a timer;
+            # once the server is idle again there is no reason to keep them waiting
+            if self.adaptive and self._in_flight == 0 and self._pending:
+                self._flush()
+
+    async def close(self):
+        """Flush outstanding requests and wait for in-flight batches"""
+        self._flush()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return queue-depth and batch-size statistics"""
+        return {
+            'name': self.name,
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait_ms,
+            'adaptive': self.adaptive,
+            'queue_depth': len(self._pending),
+            'max_queue_depth': self._max_observed_queue,
+            'in_flight_batches': self._in_flight,
+            'total_requests': self._total_requests,
+            'total_batches': self._total_batches,
+            'failed_requests': self._total_failures,
+            'average_batch_size': (
+                round(self._total_batched_rows / self._total_batches, 2) if self._total_batches else 0.0
+            ),
+            'max_batch_size_observed': self._max_observed_batch,
+            'average_batch_ms': (
+                round(self._total_batch_seconds * 1000 / self._total_batches, 3) if self._total_batches else 0.0
+            ),
+            'batch_size_histogram': dict(sorted(self._batch_size_histogram.items())),
+        }
@@ -0,0 +1,131 @@
+import asyncio
+import functools
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from loguru import logger
+from typing import Any, Callable, Dict, Optional
+
+
+class ModelExecutor:
+    """Run blocking model work off the event loop.
+
+    Inference and artifact loading go to a thread pool: sklearn, XGBoost and
+    LightGBM release the GIL inside their native predict loops, so threads
+    give real parallelism without copying models between processes.
+    Training goes to a process pool so a multi-model fit cannot starve the
+    event loop (or the inference threads) of the GIL.
+    """
+
+    def __init__(
+        self,
+        inference_threads: Optional[int] = None,
+        training_processes: Optional[int] = None,
+        training_mode: str = "process",
+    ):
+        if training_mode not in ("process", "thread", "inline"):
+            raise ValueError(f"Unknown training mode: {training_mode}")
+
+        cpu_count = os.cpu_count() or 1
+        self.inference_threads = inference_threads or min(4, cpu_count)
+        self.training_processes = training_processes or cpu_count
+        self.training_mode = training_mode
+
+        self._inference_pool: Optional[ThreadPoolExecutor] = None
+        self._training_pool: Optional[Executor] = None
+
+    @classmethod
+    def from_env(cls) -> "ModelExecutor":
+        """Build an executor from INFERENCE_THREADS / TRAINING_PROCESSES / TRAINING_EXECUTOR"""
+        inference_threads = os.getenv("INFERENCE_THREADS")
+        training_processes = os.getenv("TRAINING_PROCESSES")
+        return cls(
+            inference_threads=int(inference_threads) if inference_threads else None,
+            training_processes=int(training_processes) if training_processes else None,
+            training_mode=os.getenv("TRAINING_EXECUTOR", "process").lower(),
+        )
+
+    @property
+    def inference_pool(self) -> ThreadPoolExecutor:
+        if self._inference_pool is None:
+            self._inference_pool = ThreadPoolExecutor(
+                max_workers=self.inference_threads,
+                thread_name_prefix="inference"
+            )
+        return self._inference_pool
+
+    @property
+    def training_pool(self) -> Optional[Executor]:
+        if self._training_pool is None and self.training_mode != "inline":
+            if self.training_mode == "process":
+                # Spawn rather than fork: forking a process that already runs
+                # OpenMP/BLAS threads can deadlock XGBoost and LightGBM
+                self._training_pool = ProcessPoolExecutor(
+                    max_workers=self.training_processes,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            else:
+                self._training_pool = ThreadPoolExecutor(
+                    max_workers=self.training_processes,
+                    thread_name_prefix="training"
+                )
+        return self._training_pool
+
+    async def run_inference(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run a blocking inference or loading call on the thread pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.inference_pool, functools.partial(fn, *args, **kwargs))
+
+    async def run_training(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run a blocking training call on the training pool.
+
+        In process mode ``fn`` and its arguments must be picklable, so pass
+        module-level functions rather than bound methods of live predictors.
+        """
+        pool = self.training_pool
+        if pool is None:
+            return fn(*args, **kwargs)
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(pool, functools.partial(fn, *args, **kwargs))
+
+    def stats(self) -> Dict[str, Any]:
+        """Return pool configuration"""
+        return {
+            'inference_threads': self.inference_threads,
+            'training_processes': self.training_processes,
+            'training_mode': self.training_mode,
+            'inference_pool_started': self._inference_pool is not None,
+            'training_pool_started': self._training_pool is not None,
+        }
+
+    def shutdown(self, wait: bool = True):
+        """Stop both pools"""
+        if self._inference_pool is not None:
+            self._inference_pool.shutdown(wait=wait)
+            self._inference_pool = None
+        if self._training_pool is not None:
+            self._training_pool.shutdown(wait=wait)
+            self._training_pool = None
+        logger.info("Model executor shut down")
+
+
+_executor: Optional[ModelExecutor] = None
+
+
+def get_model_executor() -> ModelExecutor:
+    """Return the process-wide executor, creating it from the environment on first use"""
+    global _executor
+    if _executor is None:
+        _executor = ModelExecutor.from_env()
+        logger.info(f"Model executor configured: {_executor.stats()}")
+    return _executor
+
+
+def set_model_executor(executor: ModelExecutor) -> ModelExecutor:
+    """Replace the process-wide executor (e.g. with a custom pool size)"""
+    global _executor
+    if _executor is not None and _executor is not executor:
+        _executor.shutdown(wait=False)
+    _executor = executor
+    return executor
@@ -0,0 +1,254 @@
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+from loguru import logger
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+# Feature values are rounded to this many decimals before keying, so 23.4 and
+# 23.400000000000002 (e.g. a BMI recomputed by the frontend) share an entry
+KEY_DECIMALS = 6
+
+# Rows written to the shared SQLite cache between two trims of its expired and
+# least recently used entries; the file may exceed max_entries by this much
+SHARED_TRIM_EVERY = 500
+
+
+class PredictionCache:
+    """LRU + TTL cache of raw model outputs keyed on model version and feature row.
+
+    Entries live in process memory. With ``path`` set they are also written
+    to a SQLite file, so every worker on the host shares one set of results
+    and a profile scored by one worker is a hit on the others. The model
+    version is part of every key, so a newly promoted model never serves
+    results computed by an older one; ``invalidate`` additionally drops the
+    stale entries so they stop taking up space.
+
+    ``get_or_compute`` never touches SQLite on the event loop: shared reads
+    run in a thread and shared writes are finished in the background, so a
+    busy database delays cache hits rather than every request on the worker.
+    """
+
+    def __init__(self, name: str, max_entries: int = 10000, ttl_seconds: float = 300.0,
+                 path: Optional[str] = None):
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.path = path
+
+        self._entries: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._table = f"predictions_{name}"
+        self._db: Optional[sqlite3.Connection] = None
+        # One connection shared by the threads that read and write it
+        self._db_lock = threading.Lock()
+        self._writes: set = set()
+        self._written_since_trim = 0
+        if path:
+            self._db = self._open_db(path)
+
+        # Counters exposed through stats()
+        self._hits = 0
+        self._shared_hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._invalidations = 0
+
+    def _open_db(self, path: str) -> sqlite3.Connection:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        db = sqlite3.connect(path, timeout=1.0, check_same_thread=False, isolation_level=None)
+        # WAL lets many worker processes read while one writes
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.execute(
+            f"CREATE TABLE IF NOT EXISTS {self._table} "
+            "(key TEXT PRIMARY KEY, version TEXT, value REAL, expires_at REAL, accessed_at REAL)"
+        )
+        logger.info(f"{self.name} prediction cache shared through {path}")
+        return db
+
+    @staticmethod
+    def make_key(model_version: str, row: Sequence[float]) -> str:
+        values = ",".join(repr(round(float(value), KEY_DECIMALS) + 0.0) for value in row)
+        return f"{model_version}|{values}"
+
+    def _get_local(self, model_version: str, X: np.ndarray) -> Tuple[List[str], List[Optional[float]], float]:
+        """Keys and in-memory outputs (None for misses) for every row of X"""
+        keys = [self.make_key(model_version, row) for row in X]
+        now = time.time()
+        values: List[Optional[float]] = []
+
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is not None and entry[1] <= now:
+                    del self._entries[key]
+                    self._expirations += 1
+                    entry = None
+                if entry is not None:
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    values.append(entry[0])
+                else:
+                    values.append(None)
+        return keys, values, now
+
+    def _fill_shared(self, keys: List[str], values: List[Optional[float]],
+                     shared: Dict[str, Tuple[float, float]]) -> List[Optional[float]]:
+        for index, key in enumerate(keys):
+            if values[index] is None and key in shared:
+                values[index] = shared[key][0]
+                self._remember(key, *shared[key])
+                self._shared_hits += 1
+        self._misses += sum(value is None for value in values)
+        return values
+
+    def _missing_keys(self, keys: List[str], values: List[Optional[float]]) -> List[str]:
+        return [key for key, value in zip(keys, values) if value is None] if self._db is not None else []
+
+    def get_many(self, model_version: str, X: np.ndarray) -> Tuple[List[str], List[Optional[float]]]:
+        """Keys and cached outputs (None for misses) for every row of X (blocking)"""
+        keys, values, now = self._get_local(model_version, X)
+        missing = self._missing_keys(keys, values)
+        shared = self._get_shared(missing, now) if missing else {}
+        return keys, self._fill_shared(keys, values, shared)
+
+    def _put_local(self, keys: List[str], values: Sequence[float]) -> float:
+        expires_at = time.time() + self.ttl_seconds
+        for key, value in zip(keys, values):
+            self._remember(key, float(value), expires_at)
+        return expires_at
+
+    def put_many(self, model_version: str, keys: List[str], values: Sequence[float]):
+        """Store outputs in memory and, with a path set, in the shared file (blocking)"""
+        expires_at = self._put_local(keys, values)
+        if self._db is not None:
+            self._put_shared(model_version, keys, values, expires_at)
+
+    async def get_or_compute(self, model_version: str, X: np.ndarray,
+                             compute: Callable[[np.ndarray], Awaitable[np.ndarray]]) -> np.ndarray:
+        """Outputs for every row of X, calling ``compute`` only on the rows not cached"""
+        keys, cached, now = self._get_local(model_version, X)
+        missing_keys = self._missing_keys(keys, cached)
+        shared = await asyncio.to_thread(self._get_shared, missing_keys, now) if missing_keys else {}
+        cached = self._fill_shared(keys, cached, shared)
+        missing = [index for index, value in enumerate(cached) if value is None]
+        if not missing:
+            return np.asarray(cached, dtype=float)
+
+        computed = await compute(X[missing])
+        outputs = np.asarray([np.nan if value is None else value for value in cached], dtype=float)
+        outputs[missing] = computed
+        missing_keys = [keys[index] for index in missing]
+        expires_at = self._put_local(missing_keys, computed)
+        if self._db is not None:
+            # The caller has its outputs; the shared write finishes in the background
+            task = asyncio.ensure_future(asyncio.to_thread(
+                self._put_shared, model_version, missing_keys, np.asarray(computed, dtype=float), expires_at
+            ))
+            self._writes.add(task)
+            task.add_done_callback(self._writes.discard)
+        return outputs
+
+    def _remember(self, key: str, value: float, expires_at: float):
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def _get_shared(self, keys: List[str], now: float) -> Dict[str, Tuple[float, float]]:
+        try:
+            placeholders = ",".join("?" * len(keys))
+            with self._db_lock:
+                rows = self._db.execute(
+                    f"SELECT key, value, expires_at FROM {self._table} "
+                    f"WHERE key IN ({placeholders}) AND expires_at > ?",
+                    [*keys, now]
+                ).fetchall()
+                if rows:
+                    self._db.executemany(
+                        f"UPDATE {self._table} SET accessed_at = ? WHERE key = ?",
+                        [(now, key) for key, _, _ in rows]
+                    )
+            return {key: (value, expires_at) for key, value, expires_at in rows}
+        except sqlite3.Error as e:
+            logger.warning(f"Could not read the shared {self.name} prediction cache: {e}")
+            return {}
+
+    def _put_shared(self, model_version: str, keys: List[str], values: Sequence[float], expires_at: float):
+        now = time.time()
+        try:
+            with self._db_lock:
+                self._db.executemany(
+                    f"INSERT OR REPLACE INTO {self._table} VALUES (?, ?, ?, ?, ?)",
+                    [(key, model_version, float(value), expires_at, now) for key, value in zip(keys, values)]
+                )
+                self._written_since_trim += len(keys)
+                if self._written_since_trim >= SHARED_TRIM_EVERY:
+                    self._trim_shared()
+                    self._written_since_trim = 0
+        except sqlite3.Error as e:
+            logger.warning(f"Could not write {self.name} predictions to the shared cache: {e}")
+
+    def _trim_shared(self):
+        """Drop expired rows and the least recently used ones beyond max_entries"""
+        self._db.execute(f"DELETE FROM {self._table} WHERE expires_at <= ?", (time.time(),))
+        excess = self._db.execute(f"SELECT COUNT(*) FROM {self._table}").fetchone()[0] - self.max_entries
+        if excess > 0:
+            self._db.execute(
+                f"DELETE FROM {self._table} WHERE key IN "
+                f"(SELECT key FROM {self._table} ORDER BY accessed_at LIMIT ?)",
+                (excess,)
+            )
+
+    def invalidate(self, keep_version: Optional[str] = None):
+        """Drop every entry not computed by ``keep_version`` (everything when None)"""
+        with self._lock:
+            stale = [key for key in self._entries if not key.startswith(f"{keep_version}|")]
+            for key in stale:
+                del self._entries[key]
+            self._invalidations += len(stale)
+
+        if self._db is not None:
+            try:
+                with self._db_lock:
+                    self._db.execute(
+                        f"DELETE FROM {self._table} WHERE version IS NOT ?", (keep_version,)
+                    )
+            except sqlite3.Error as e:
+                logger.warning(f"Could not invalidate the shared {self.name} prediction cache: {e}")
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self._hits + self._shared_hits + self._misses
+        return {
+            'backend': 'sqlite' if self._db is not None else 'memory',
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'ttl_seconds': self.ttl_seconds,
+            'hits': self._hits,
+            'shared_hits': self._shared_hits,
+            'misses': self._misses,
+            'hit_rate': round((self._hits + self._shared_hits) / lookups, 4) if lookups else 0.0,
+            'evictions': self._evictions,
+            'expirations': self._expirations,
+            'invalidations': self._invalidations,
+            'pending_shared_writes': len(self._writes)
+        }
+
+    async def close(self):
+        """Finish background writes to the shared file and close it"""
+        if self._writes:
+            await asyncio.gather(*self._writes, return_exceptions=True)
+        if self._db is not None:
+            with self._db_lock:
+                self._db.close()
+            self._db = None
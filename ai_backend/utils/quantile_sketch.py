@@ -0,0 +1,233 @@
+import json
+import math
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Accuracy parameter; memory grows roughly linearly with k and error shrinks with it
+DEFAULT_K = 200
+
+# Lowest-level compactors shrink geometrically by this factor
+_CAPACITY_DECAY = 2.0 / 3.0
+
+# Columns with at most this many distinct values (flags, labels, small counts) are
+# exempt from outlier fences when their quartiles coincide
+LOW_CARDINALITY_MAX_VALUES = 10
+
+
+def kll_rank_error(k: int) -> float:
+    """Normalized rank error of a KLL sketch holding with ~99% confidence.
+
+    Empirical fit published with the Apache DataSketches KLL implementation:
+    with k=200 a reported quartile lies within about 1.65% of the data (in
+    rank) of the true quartile.
+    """
+    return 2.446 / k ** 0.9433
+
+
+def iqr_fences(q1: np.ndarray, q3: np.ndarray, low_cardinality: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Lower and upper 1.5 x IQR outlier fences.
+
+    A low-cardinality column (such as a 0/1 flag or label) whose quartiles
+    coincide because most rows share one value has no meaningful fence and
+    is left unbounded; otherwise every minority value would be dropped.
+    Any other column keeps its fences, even with an IQR of 0.
+    """
+    iqr = q3 - q1
+    exempt = (iqr == 0) & np.asarray(low_cardinality, dtype=bool)
+    return np.where(exempt, -np.inf, q1 - 1.5 * iqr), np.where(exempt, np.inf, q3 + 1.5 * iqr)
+
+
+def _capped_union(seen: Optional[np.ndarray], values: np.ndarray) -> Optional[np.ndarray]:
+    """Distinct values of both, or None once there are more than LOW_CARDINALITY_MAX_VALUES"""
+    if seen is None or values is None:
+        return None
+    distinct = np.union1d(seen, values)
+    return distinct if len(distinct) <= LOW_CARDINALITY_MAX_VALUES else None
+
+
+class KLLSketch:
+    """KLL quantile sketch (Karnin, Lang & Liberty) over a stream of floats.
+
+    Values enter level 0; a level that outgrows its capacity is sorted and
+    every other item (random offset) is promoted to the next level, where
+    it stands for twice as many values. Memory stays O(k log(n / k)) and
+    two sketches merge by concatenating their levels, so files or chunks
+    can be sketched independently and combined afterwards.
+    """
+
+    def __init__(self, k: int = DEFAULT_K, seed: Optional[int] = None):
+        if k < 8:
+            raise ValueError("k must be at least 8")
+        self.k = k
+        self.n = 0
+        self.min = math.inf
+        self.max = -math.inf
+        self.levels: List[np.ndarray] = [np.empty(0)]
+        # Exact distinct values while there are few of them (None past LOW_CARDINALITY_MAX_VALUES)
+        self.distinct: Optional[np.ndarray] = np.empty(0)
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.levels) - level - 1
+        return max(2, int(math.ceil(self.k * _CAPACITY_DECAY ** depth)))
+
+    def update(self, values: Iterable[float]):
+        """Add values (missing values are ignored)"""
+        values = np.asarray(values, dtype=float).ravel()
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return
+        self.n += len(values)
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        self.distinct = _capped_union(self.distinct, values)
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+
+    def merge(self, other: "KLLSketch"):
+        """Fold another sketch into this one"""
+        if other.n == 0:
+            return
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.n += other.n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.distinct = _capped_union(self.distinct, other.distinct)
+        self._compress()
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                items = np.sort(items)
+                # An odd item out stays behind so total weight is preserved exactly
+                leftover = items[:1] if len(items) % 2 else items[:0]
+                paired = items[len(leftover):]
+                promoted = paired[int(self._rng.integers(0, 2))::2]
+                self.levels[level] = leftover
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            level += 1
+
+    @property
+    def retained(self) -> int:
+        return sum(len(items) for items in self.levels)
+
+    @property
+    def rank_error(self) -> float:
+        return kll_rank_error(self.k)
+
+    @property
+    def low_cardinality(self) -> bool:
+        return self.distinct is not None
+
+    def _weighted_items(self) -> Tuple[np.ndarray, np.ndarray]:
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(items), 2 ** level) for level, items in enumerate(self.levels)])
+        order = np.argsort(items, kind='stable')
+        return items[order], np.cumsum(weights[order])
+
+    def quantiles(self, fractions: Iterable[float]) -> np.ndarray:
+        """Approximate values at the given fractions of the data (NaN when empty)"""
+        fractions = np.asarray(list(fractions), dtype=float)
+        if self.n == 0:
+            return np.full(len(fractions), np.nan)
+        items, cumulative = self._weighted_items()
+        positions = np.searchsorted(cumulative, fractions * cumulative[-1], side='left')
+        values = items[np.minimum(positions, len(items) - 1)]
+        # The extremes are tracked exactly
+        values = np.where(fractions <= 0, self.min, values)
+        return np.where(fractions >= 1, self.max, values)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'k': self.k,
+            'n': self.n,
+            'min': self.min if self.n else None,
+            'max': self.max if self.n else None,
+            'distinct': self.distinct.tolist() if self.distinct is not None else None,
+            'levels': [items.tolist() for items in self.levels]
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], seed: Optional[int] = None) -> "KLLSketch":
+        sketch = cls(k=data['k'], seed=seed)
+        sketch.n = data['n']
+        sketch.min = data['min'] if data['min'] is not None else math.inf
+        sketch.max = data['max'] if data['max'] is not None else -math.inf
+        sketch.levels = [np.asarray(items, dtype=float) for items in data['levels']] or [np.empty(0)]
+        # Sketches saved without distinct values count as high-cardinality
+        distinct = data.get('distinct')
+        sketch.distinct = np.asarray(distinct, dtype=float) if distinct is not None else None
+        return sketch
+
+
+class ColumnSketches:
+    """One KLL sketch per numeric column, updated chunk by chunk"""
+
+    def __init__(self, k: int = DEFAULT_K, seed: Optional[int] = 42):
+        self.k = k
+        self.seed = seed
+        self.sketches: Dict[str, KLLSketch] = {}
+
+    def add(self, df: pd.DataFrame, numeric_columns: List[str]):
+        # A column that turned non-numeric in a later chunk is no longer sketched
+        for col in [col for col in self.sketches if col not in numeric_columns]:
+            del self.sketches[col]
+        for col in numeric_columns:
+            if col not in self.sketches:
+                self.sketches[col] = KLLSketch(self.k, seed=self.seed)
+            self.sketches[col].update(df[col].to_numpy(dtype=float))
+
+    def merge(self, other: "ColumnSketches"):
+        for col, sketch in other.sketches.items():
+            if col in self.sketches:
+                self.sketches[col].merge(sketch)
+            else:
+                self.sketches[col] = KLLSketch.from_dict(sketch.to_dict(), seed=self.seed)
+
+    def bounds(self, columns: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """Lower and upper 1.5 x IQR bounds of the given columns"""
+        quartiles = np.array([
+            self.sketches[col].quantiles([0.25, 0.75]) if col in self.sketches else [np.nan, np.nan]
+            for col in columns
+        ]).reshape(len(columns), 2)
+        low_cardinality = [col in self.sketches and self.sketches[col].low_cardinality for col in columns]
+        return iqr_fences(quartiles[:, 0], quartiles[:, 1], np.array(low_cardinality, dtype=bool))
+
+    @property
+    def rank_error(self) -> float:
+        return kll_rank_error(self.k)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'k': self.k,
+            'rank_error': self.rank_error,
+            'columns': {col: sketch.to_dict() for col, sketch in self.sketches.items()}
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], seed: Optional[int] = 42) -> "ColumnSketches":
+        sketches = cls(k=data['k'], seed=seed)
+        sketches.sketches = {col: KLLSketch.from_dict(sketch, seed=seed) for col, sketch in data['columns'].items()}
+        return sketches
+
+
+def save_sketches(path: str, sketches: Dict[str, ColumnSketches], **metadata):
+    """Write named column sketches (e.g. raw and cleaned) to a JSON file"""
+    payload = dict(metadata)
+    payload['sketches'] = {name: column_sketches.to_dict() for name, column_sketches in sketches.items()}
+    with open(path, 'w') as f:
+        json.dump(payload, f)
+
+
+def load_sketches(path: str) -> Dict[str, ColumnSketches]:
+    with open(path) as f:
+        payload = json.load(f)
+    return {name: ColumnSketches.from_dict(data) for name, data in payload['sketches'].items()}
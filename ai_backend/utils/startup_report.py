@@ -0,0 +1,71 @@
+import sys
+import time
+from contextlib import contextmanager
+from loguru import logger
+from typing import Any, Dict, List, Optional
+
+# Third-party libraries whose import cost matters for cold starts
+HEAVY_LIBRARIES = ('pandas', 'sklearn', 'xgboost', 'lightgbm', 'scipy', 'pyarrow', 'tensorflow', 'keras')
+
+
+def _top_level_modules() -> set:
+    """Top-level packages currently imported, excluding the standard library"""
+    stdlib = getattr(sys, 'stdlib_module_names', ())
+    return {
+        name.split('.')[0] for name in list(sys.modules)
+        if not name.startswith('_') and name.split('.')[0] not in stdlib
+    }
+
+
+class StartupReport:
+    """Where the time between process start and the first servable model goes.
+
+    Each phase records its wall time and the top-level packages that were
+    imported for the first time while it ran, so an import that drags in a
+    heavy library shows up against the phase that triggered it.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases: List[Dict[str, Any]] = []
+        self.ready_after: Optional[float] = None
+
+    @contextmanager
+    def timed(self, name: str, **details):
+        before = _top_level_modules()
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(
+                name,
+                time.perf_counter() - started,
+                new_packages=sorted(_top_level_modules() - before),
+                **details
+            )
+
+    def record(self, name: str, seconds: float, **details):
+        phase = {'phase': name, 'seconds': round(seconds, 4)}
+        phase.update({key: value for key, value in details.items() if value})
+        self.phases.append(phase)
+
+    def mark_ready(self):
+        """Record the time from process start until every model can serve"""
+        self.ready_after = time.perf_counter() - self.started
+        logger.info(f"Startup finished in {self.ready_after:.3f}s")
+        for phase in self.phases:
+            packages = phase.get('new_packages')
+            suffix = f" (imported {', '.join(packages)})" if packages else ""
+            logger.info(f"  {phase['phase']}: {phase['seconds'] * 1000:.1f}ms{suffix}")
+
+    def report(self) -> Dict[str, Any]:
+        loaded = _top_level_modules()
+        return {
+            'ready_after': round(self.ready_after, 4) if self.ready_after is not None else None,
+            'phases': self.phases,
+            'heavy_libraries_loaded': [name for name in HEAVY_LIBRARIES if name in loaded]
+        }
+
+
+# Timed from the first import of this module, at the start of main.py's own imports
+startup_report = StartupReport()
@@ -0,0 +1,161 @@
+import importlib.util
+import os
+import pandas as pd
+from loguru import logger
+from typing import Iterator, List, Optional
+
+# Optional dependency: without pyarrow, processed data falls back to CSV. It is
+# only imported when a columnar file is actually read or written
+PYARROW_AVAILABLE = importlib.util.find_spec("pyarrow") is not None
+
+# File extension written for each processed-data format
+FORMAT_EXTENSIONS = {'csv': '.csv', 'parquet': '.parquet', 'feather': '.feather'}
+COLUMNAR_FORMATS = ('parquet', 'feather')
+
+# zstd keeps Parquet small; lz4 keeps Feather (Arrow IPC) fast to memory-map
+PARQUET_COMPRESSION = 'zstd'
+FEATHER_COMPRESSION = 'lz4'
+
+
+def resolve_format(output_format: str) -> str:
+    """Concrete output format for a setting of csv, parquet, feather or auto"""
+    output_format = output_format.lower()
+    if output_format == 'auto':
+        return 'parquet' if PYARROW_AVAILABLE else 'csv'
+    if output_format not in FORMAT_EXTENSIONS:
+        raise ValueError(f"Unknown data format: {output_format}")
+    if output_format in COLUMNAR_FORMATS and not PYARROW_AVAILABLE:
+        logger.warning(f"pyarrow is not installed; writing CSV instead of {output_format}")
+        return 'csv'
+    return output_format
+
+
+def with_format_extension(path: str, output_format: str) -> str:
+    """Replace the extension of ``path`` with the one of ``output_format``"""
+    return os.path.splitext(path)[0] + FORMAT_EXTENSIONS[output_format]
+
+
+def table_format(path: str) -> str:
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.parquet':
+        return 'parquet'
+    if extension in ('.feather', '.arrow'):
+        return 'feather'
+    if extension in ('.xlsx', '.xls'):
+        return 'excel'
+    return 'csv'
+
+
+def read_table(path: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """Read a data file of any supported format, loading only ``columns`` when given.
+
+    Columnar files read just the requested columns with their stored dtypes;
+    CSV and Excel still parse the whole text but keep only those columns.
+    A requested column that is missing is simply absent from the result, so
+    callers report missing columns the same way for every format.
+    """
+    fmt = table_format(path)
+    if fmt in COLUMNAR_FORMATS:
+        if columns is not None:
+            available = set(_columnar_schema_names(path, fmt))
+            columns = [col for col in columns if col in available]
+        if fmt == 'parquet':
+            return pd.read_parquet(path, columns=columns)
+        return pd.read_feather(path, columns=columns)
+
+    usecols = (lambda col: col in columns) if columns is not None else None
+    if fmt == 'excel':
+        return pd.read_excel(path, usecols=usecols)
+    return pd.read_csv(path, usecols=usecols)
+
+
+def _columnar_schema_names(path: str, fmt: str) -> List[str]:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    if fmt == 'parquet':
+        return pq.read_schema(path).names
+    with pa.memory_map(path) as source:
+        return pa.ipc.open_file(source).schema.names
+
+
+def write_table(df: pd.DataFrame, path: str, output_format: str):
+    """Write a whole frame in the given format (csv, parquet or feather)"""
+    if output_format == 'parquet':
+        df.to_parquet(path, index=False, compression=PARQUET_COMPRESSION)
+    elif output_format == 'feather':
+        df.reset_index(drop=True).to_feather(path, compression=FEATHER_COMPRESSION)
+    else:
+        df.to_csv(path, index=False)
+
+
+class TableWriter:
+    """Append frames chunk by chunk to one CSV, Parquet or Feather file.
+
+    Columnar files take their schema from the first chunk and every later
+    chunk is converted to it, so callers should pass chunks of stable dtypes.
+    """
+
+    def __init__(self, path: str, output_format: str):
+        self.path = path
+        self.output_format = output_format
+        self.rows = 0
+        self.chunks = 0
+        self._writer = None
+        self._schema = None
+
+    def write(self, df: pd.DataFrame):
+        if self.output_format == 'csv':
+            first = self.chunks == 0
+            df.to_csv(self.path, mode='w' if first else 'a', header=first, index=False)
+        else:
+            self._write_columnar(df)
+        self.rows += len(df)
+        self.chunks += 1
+
+    def _write_columnar(self, df: pd.DataFrame):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        table = pa.Table.from_pandas(df, schema=self._schema, preserve_index=False)
+        if self._writer is None:
+            self._schema = table.schema
+            if self.output_format == 'parquet':
+                self._writer = pq.ParquetWriter(self.path, self._schema, compression=PARQUET_COMPRESSION)
+            else:
+                self._writer = pa.ipc.new_file(
+                    self.path, self._schema, options=pa.ipc.IpcWriteOptions(compression=FEATHER_COMPRESSION)
+                )
+        self._writer.write_table(table)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def __enter__(self) -> "TableWriter":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def iter_table(path: str, chunk_size: int) -> Iterator[pd.DataFrame]:
+    """Read a data file as frames of at most ``chunk_size`` rows"""
+    fmt = table_format(path)
+    if fmt == 'parquet':
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    elif fmt == 'feather':
+        import pyarrow as pa
+
+        with pa.memory_map(path) as source:
+            reader = pa.ipc.open_file(source)
+            for index in range(reader.num_record_batches):
+                yield reader.get_batch(index).to_pandas()
+    elif fmt == 'excel':
+        yield pd.read_excel(path)
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_size)
@@ -0,0 +1,198 @@
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from loguru import logger
+from typing import Any, Dict, List, Optional
+
+from schemas.prediction_schemas import JobStatus, TrainingJobResponse, TrainingResponse
+
+
+class TrainingJob:
+    """State of one background training run"""
+
+    def __init__(self, model_type: str, data_file_path: Optional[str] = None,
+                 hyperparameters: Optional[Dict[str, Any]] = None, incremental: bool = False):
+        self.job_id = uuid.uuid4().hex
+        self.model_type = model_type
+        self.data_file_path = data_file_path
+        self.hyperparameters = hyperparameters
+        # Update the production model with newly ingested rows instead of refitting
+        self.incremental = incremental
+        self.status = JobStatus.QUEUED
+        self.progress = 0.0
+        self.stage = "queued"
+        self.candidate_scores: Dict[str, float] = {}
+        self.candidate_fit_times: Dict[str, float] = {}
+        self.abandoned_candidates: List[str] = []
+        self.candidate_serving_costs: Dict[str, Dict[str, Any]] = {}
+        self.best_model: Optional[str] = None
+        self.hyperparameter_search: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.result: Optional[TrainingResponse] = None
+
+        self.submitted_at = datetime.now()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self._started_clock: Optional[float] = None
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in (JobStatus.COMPLETED, JobStatus.FAILED)
+
+    def update_progress(self, progress: float, stage: str, candidate: Optional[Dict[str, Any]] = None):
+        """Progress callback handed to train_model; ``candidate`` is a candidate fit that just finished"""
+        self.progress = max(self.progress, min(1.0, progress))
+        self.stage = stage
+        if candidate is not None:
+            self.candidate_fit_times[candidate['name']] = candidate['fit_time']
+            if candidate['abandoned']:
+                self.abandoned_candidates.append(candidate['name'])
+            else:
+                self.candidate_scores[candidate['name']] = candidate['score']
+
+    def start(self):
+        self.status = JobStatus.RUNNING
+        self.started_at = datetime.now()
+        self._started_clock = time.perf_counter()
+        self.update_progress(0.01, "starting")
+
+    def complete(self, summary: Dict[str, Any], model_version: str):
+        training_time = time.perf_counter() - self._started_clock
+        self.status = JobStatus.COMPLETED
+        self.finished_at = datetime.now()
+        self.candidate_scores = summary.get('scores', {})
+        self.candidate_fit_times = summary.get('fit_times', {})
+        self.abandoned_candidates = summary.get('abandoned', [])
+        self.candidate_serving_costs = summary.get('serving_costs', {})
+        self.best_model = summary.get('best_model')
+        self.hyperparameter_search = summary.get('search')
+        self.update_progress(1.0, "completed")
+        self.result = TrainingResponse(
+            success=True,
+            model_accuracy=summary.get('best_score'),
+            training_time=round(training_time, 3),
+            model_version=model_version,
+            message=summary.get('message') or (
+                f"Selected {self.best_model} out of {len(self.candidate_scores)} candidate models"
+            )
+        )
+
+    def fail(self, error: Exception, model_version: str):
+        self.status = JobStatus.FAILED
+        self.finished_at = datetime.now()
+        self.error = str(error)
+        self.stage = "failed"
+        self.result = TrainingResponse(
+            success=False,
+            training_time=(
+                round(time.perf_counter() - self._started_clock, 3) if self._started_clock else None
+            ),
+            model_version=model_version,
+            message=f"Training failed: {error}"
+        )
+
+    def to_response(self) -> TrainingJobResponse:
+        queue_time = None
+        if self.started_at:
+            queue_time = round((self.started_at - self.submitted_at).total_seconds(), 3)
+
+        return TrainingJobResponse(
+            job_id=self.job_id,
+            model_type=self.model_type,
+            status=self.status,
+            progress=round(self.progress, 3),
+            stage=self.stage,
+            data_file_path=self.data_file_path,
+            incremental=self.incremental,
+            candidate_scores=self.candidate_scores,
+            candidate_fit_times=self.candidate_fit_times,
+            abandoned_candidates=self.abandoned_candidates,
+            candidate_serving_costs=self.candidate_serving_costs,
+            best_model=self.best_model,
+            hyperparameter_search=self.hyperparameter_search,
+            submitted_at=self.submitted_at.isoformat(),
+            started_at=self.started_at.isoformat() if self.started_at else None,
+            finished_at=self.finished_at.isoformat() if self.finished_at else None,
+            queue_time=queue_time,
+            error=self.error,
+            result=self.result
+        )
+
+
+class TrainingJobManager:
+    """Accept training requests, run them in the background and track their status.
+
+    Jobs for the same model type run one at a time; the fit itself happens in
+    a training worker process (see ``utils.model_executor``), so polling
+    ``/jobs/{id}`` stays responsive while it runs.
+    """
+
+    def __init__(self, predictors: Dict[str, Any], max_jobs: int = 100):
+        self.predictors = predictors
+        self.max_jobs = max_jobs
+        self._jobs: "OrderedDict[str, TrainingJob]" = OrderedDict()
+        self._locks = {model_type: asyncio.Lock() for model_type in predictors}
+        self._tasks: set = set()
+
+    @staticmethod
+    def normalize_model_type(model_type: str) -> str:
+        return model_type.strip().lower().replace('-', '_')
+
+    def submit(self, model_type: str, data_file_path: Optional[str] = None,
+               hyperparameters: Optional[Dict[str, Any]] = None, incremental: bool = False) -> TrainingJob:
+        """Queue a training job and return it immediately"""
+        model_type = self.normalize_model_type(model_type)
+        if model_type not in self.predictors:
+            raise ValueError(
+                f"Unknown model type '{model_type}'. Expected one of: {', '.join(self.predictors)}"
+            )
+
+        job = TrainingJob(model_type, data_file_path, hyperparameters, incremental)
+        self._jobs[job.job_id] = job
+        self._prune()
+
+        task = asyncio.ensure_future(self._run(job))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+        logger.info(f"Queued training job {job.job_id} for {model_type}")
+        return job
+
+    async def _run(self, job: TrainingJob):
+        predictor = self.predictors[job.model_type]
+
+        async with self._locks[job.model_type]:
+            job.start()
+            logger.info(f"Training job {job.job_id} started")
+            try:
+                summary = await predictor.train_model(
+                    job.data_file_path,
+                    progress_callback=job.update_progress,
+                    incremental=job.incremental,
+                    hyperparameters=job.hyperparameters
+                )
+                # An update saved without being promoted is not the served version
+                job.complete(summary, summary.get('model_version') or predictor.model_version)
+                logger.info(f"Training job {job.job_id} completed in {job.result.training_time}s")
+            except Exception as e:
+                job.fail(e, predictor.model_version)
+                logger.error(f"Training job {job.job_id} failed: {e}")
+
+    def get(self, job_id: str) -> Optional[TrainingJob]:
+        return self._jobs.get(job_id)
+
+    def list(self) -> List[TrainingJob]:
+        return list(reversed(self._jobs.values()))
+
+    def _prune(self):
+        """Forget the oldest finished jobs once more than max_jobs are tracked"""
+        finished = [job_id for job_id, job in self._jobs.items() if job.is_finished]
+        while len(self._jobs) > self.max_jobs and finished:
+            del self._jobs[finished.pop(0)]
+
+    async def close(self):
+        """Wait for running jobs to finish"""
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
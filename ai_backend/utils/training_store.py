@@ -0,0 +1,258 @@
+import json
+import os
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from loguru import logger
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+from utils.table_io import TableWriter, iter_table, read_table, resolve_format, with_format_extension
+
+# Appends are serialized with an OS file lock: flock on Unix, msvcrt byte locks on Windows
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+# Consolidated training data lives here, one directory per data type
+TRAINING_DATA_DIR = os.getenv("TRAINING_DATA_DIR", "data/training")
+TRAINING_DATA_FORMAT = os.getenv("DATA_OUTPUT_FORMAT", "auto").lower()
+
+# Rows read at a time when appending a file
+APPEND_CHUNK_SIZE = 100_000
+
+
+def _lock_file(lock_file):
+    """Block until this process holds the exclusive lock on an open file"""
+    if fcntl is not None:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        return
+    lock_file.seek(0)
+    while True:
+        try:
+            # LK_LOCK retries for about 10 seconds before giving up
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+            return
+        except OSError:
+            continue
+
+
+def _unlock_file(lock_file):
+    if fcntl is not None:
+        fcntl.flock(lock_file, fcntl.LOCK_UN)
+        return
+    lock_file.seek(0)
+    msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def row_hashes(df: pd.DataFrame) -> np.ndarray:
+    """64-bit hash of every row, independent of column order and numeric dtype"""
+    # Hash numbers as float so 5 and 5.0 in differently typed batches match
+    normalized = df[sorted(df.columns)].apply(
+        lambda col: col.astype(float) if pd.api.types.is_numeric_dtype(col) else col
+    )
+    return pd.util.hash_pandas_object(normalized, index=False).to_numpy()
+
+
+def first_occurrences(hashes: np.ndarray, seen: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Mask of hashes neither repeated earlier nor in the sorted ``seen``, plus the updated set"""
+    first = ~pd.Series(hashes).duplicated().to_numpy()
+    if len(seen):
+        positions = np.minimum(np.searchsorted(seen, hashes), len(seen) - 1)
+        first &= seen[positions] != hashes
+
+    new_hashes = np.sort(hashes[first])
+    return first, np.insert(seen, np.searchsorted(seen, new_hashes), new_hashes)
+
+
+class TrainingStore:
+    """Append-only consolidated training data per data type.
+
+    Layout under ``<root>/<data_type>/``::
+
+        part-00001.parquet ...  appended batches, none repeating a stored row
+        row_index.npy           sorted 64-bit hashes of every stored row
+        manifest.json           parts with their row counts and sources
+
+    Appending checks each row against the index, so duplicates are dropped
+    across every batch ever added while only the new batch is read. Parts
+    are never rewritten, so ``load`` keeps the parts it has already read and
+    only reads the ones added since.
+
+    That cache belongs to one store object in one process. Training runs in
+    spawned pool workers, each with its own ``get_training_store()``, so a
+    worker reads every part on its first training run and only new parts on
+    later ones. A store pickled to a worker arrives with an empty cache.
+    """
+
+    MANIFEST_FILE = "manifest.json"
+    INDEX_FILE = "row_index.npy"
+
+    def __init__(self, root: str = TRAINING_DATA_DIR, output_format: str = TRAINING_DATA_FORMAT):
+        self.root = root
+        self.output_format = resolve_format(output_format)
+        # (data_type, columns) -> (part names, frame of those parts)
+        self._loaded: Dict[Tuple[str, Optional[Tuple[str, ...]]], Tuple[List[str], pd.DataFrame]] = {}
+
+    def __getstate__(self):
+        # Loaded frames stay behind when the store is sent to a worker process
+        state = self.__dict__.copy()
+        state['_loaded'] = {}
+        return state
+
+    def _dir(self, data_type: str) -> str:
+        return os.path.join(self.root, data_type)
+
+    def manifest(self, data_type: str) -> Dict[str, Any]:
+        try:
+            with open(os.path.join(self._dir(data_type), self.MANIFEST_FILE)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {'data_type': data_type, 'rows': 0, 'parts': []}
+
+    def has_data(self, data_type: str) -> bool:
+        return self.manifest(data_type)['rows'] > 0
+
+    @contextmanager
+    def _locked(self, data_type: str):
+        """Serialize appends to one data type, also across worker processes"""
+        os.makedirs(self._dir(data_type), exist_ok=True)
+        with open(os.path.join(self._dir(data_type), ".lock"), 'w') as lock:
+            _lock_file(lock)
+            try:
+                yield
+            finally:
+                _unlock_file(lock)
+
+    def _read_index(self, data_type: str, manifest: Dict[str, Any]) -> np.ndarray:
+        index_path = os.path.join(self._dir(data_type), self.INDEX_FILE)
+        index = np.load(index_path) if os.path.exists(index_path) else np.empty(0, dtype=np.uint64)
+        if len(index) != manifest['rows']:
+            # Interrupted append: rebuild from the parts the manifest vouches for
+            logger.warning(f"Rebuilding the {data_type} training row index")
+            index = np.empty(0, dtype=np.uint64)
+            for part in manifest['parts']:
+                for chunk in iter_table(os.path.join(self._dir(data_type), part['file']), APPEND_CHUNK_SIZE):
+                    _, index = first_occurrences(row_hashes(chunk), index)
+        return index
+
+    def _write_atomic(self, path: str, write):
+        temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(temp_path, 'wb') as f:
+                write(f)
+            os.replace(temp_path, path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def append(self, data_type: str, frames: Union[pd.DataFrame, Iterable[pd.DataFrame]],
+               source: Optional[str] = None) -> Dict[str, Any]:
+        """Add the rows of ``frames`` not already stored as a new part"""
+        if isinstance(frames, pd.DataFrame):
+            frames = [frames]
+
+        with self._locked(data_type):
+            manifest = self.manifest(data_type)
+            index = self._read_index(data_type, manifest)
+            indexed_rows = len(index)
+
+            part_file = with_format_extension(f"part-{len(manifest['parts']) + 1:05d}", self.output_format)
+            part_path = os.path.join(self._dir(data_type), part_file)
+            partial_path = f"{part_path}.partial"
+            received = 0
+            try:
+                with TableWriter(partial_path, self.output_format) as writer:
+                    for frame in frames:
+                        received += len(frame)
+                        first, index = first_occurrences(row_hashes(frame), index)
+                        new_rows = frame[first]
+                        if len(new_rows):
+                            # Numbers are stored as float so batches typed differently share one schema
+                            writer.write(new_rows.apply(
+                                lambda col: col.astype(float) if pd.api.types.is_numeric_dtype(col) else col
+                            ))
+
+                appended = len(index) - indexed_rows
+                if appended:
+                    os.replace(partial_path, part_path)
+                    manifest['parts'].append({
+                        'file': part_file,
+                        'rows': appended,
+                        'source': source,
+                        'added_at': datetime.now().isoformat()
+                    })
+                    manifest['rows'] += appended
+                    self._write_atomic(
+                        os.path.join(self._dir(data_type), self.INDEX_FILE),
+                        lambda f: np.save(f, index)
+                    )
+                    self._write_atomic(
+                        os.path.join(self._dir(data_type), self.MANIFEST_FILE),
+                        lambda f: f.write(json.dumps(manifest, indent=2).encode())
+                    )
+            finally:
+                if os.path.exists(partial_path):
+                    os.remove(partial_path)
+
+        result = {
+            'appended': appended,
+            'duplicates': received - appended,
+            'total_rows': manifest['rows'],
+            'parts': len(manifest['parts'])
+        }
+        logger.info(f"Training store {data_type}: {result} from {source}")
+        return result
+
+    def append_file(self, data_type: str, path: str, chunk_size: int = APPEND_CHUNK_SIZE) -> Dict[str, Any]:
+        """Append a processed data file chunk by chunk"""
+        return self.append(data_type, iter_table(path, chunk_size), source=os.path.basename(path))
+
+    def load(self, data_type: str, columns: Optional[List[str]] = None, parts: Optional[int] = None) -> pd.DataFrame:
+        """Stored rows of a data type (the first ``parts`` parts, all by default).
+
+        Parts read by earlier calls are reused, so each call only reads the
+        parts appended since. The frame is shared with later calls, so
+        callers must not modify it in place.
+        """
+        part_files = [part['file'] for part in self.manifest(data_type)['parts']][:parts]
+        key = (data_type, tuple(columns) if columns is not None else None)
+        loaded_parts, frame = self._loaded.get(key, ([], None))
+        if part_files[:len(loaded_parts)] != loaded_parts:
+            loaded_parts, frame = [], None
+
+        new_parts = part_files[len(loaded_parts):]
+        if new_parts or frame is None:
+            frames = [frame] if frame is not None else []
+            frames += [read_table(os.path.join(self._dir(data_type), part), columns=columns) for part in new_parts]
+            frame = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=columns)
+            self._loaded[key] = (part_files, frame)
+            logger.info(f"Training store {data_type}: read {len(new_parts)} new parts, {len(frame)} rows in total")
+        return frame
+
+    def stats(self) -> Dict[str, Any]:
+        if not os.path.exists(self.root):
+            return {}
+        stats = {}
+        for data_type in sorted(os.listdir(self.root)):
+            manifest = self.manifest(data_type)
+            stats[data_type] = {
+                'rows': manifest['rows'],
+                'parts': len(manifest['parts']),
+                'last_added': manifest['parts'][-1]['added_at'] if manifest['parts'] else None
+            }
+        return stats
+
+
+_store: Optional[TrainingStore] = None
+
+
+def get_training_store() -> TrainingStore:
+    """Return the process-wide training store, creating it on first use"""
+    global _store
+    if _store is None:
+        _store = TrainingStore()
+    return _store